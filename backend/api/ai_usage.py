@@ -7,11 +7,15 @@ from sqlalchemy.orm import Session
 from sqlalchemy import func
 from typing import Optional
 from datetime import datetime, timedelta
+import json
 import logging
 
 from config.database import get_db
-from models.ai_usage import AIUsage, AIAgentLog, UsageType
+from models.ai_usage import AIUsage, AIAgentLog, UsageType, AGENT_CALL_OPERATION
 from models.organization import Organization, PlanType
+from services.llm_gateway import llm_gateway
+from services.model_router import model_router
+from services.single_flight import single_flight_metrics
 
 logger = logging.getLogger(__name__)
 
@@ -85,30 +89,78 @@ async def get_usage(
                 "unlimited": limit == float('inf')
             }
 
-        # Get performance metrics
+        # Get performance metrics (per-agent rows are reported separately)
+        operations = [usage_type.value for usage_type in UsageType]
+
         avg_processing_time = db.query(func.avg(AIAgentLog.processing_time_ms)).filter(
             AIAgentLog.organization_id == organizationId,
+            AIAgentLog.operation.in_(operations),
             AIAgentLog.created_at >= start_of_month
         ).scalar()
 
-        avg_tokens = db.query(func.avg(AIAgentLog.tokens_used)).filter(
+        avg_tokens, total_tokens = db.query(
+            func.avg(AIAgentLog.tokens_used), func.sum(AIAgentLog.tokens_used)
+        ).filter(
             AIAgentLog.organization_id == organizationId,
+            AIAgentLog.operation.in_(operations),
             AIAgentLog.created_at >= start_of_month,
             AIAgentLog.tokens_used.isnot(None)
-        ).scalar()
+        ).one()
 
         success_rate = db.query(
             func.count(AIAgentLog.id).filter(AIAgentLog.status == "success")
         ).filter(
             AIAgentLog.organization_id == organizationId,
+            AIAgentLog.operation.in_(operations),
             AIAgentLog.created_at >= start_of_month
         ).scalar()
 
         total_operations = db.query(func.count(AIAgentLog.id)).filter(
             AIAgentLog.organization_id == organizationId,
+            AIAgentLog.operation.in_(operations),
             AIAgentLog.created_at >= start_of_month
         ).scalar()
 
+        agent_tokens = db.query(
+            AIAgentLog.agent_type,
+            func.count(AIAgentLog.id),
+            func.sum(AIAgentLog.tokens_used),
+        ).filter(
+            AIAgentLog.organization_id == organizationId,
+            AIAgentLog.operation == AGENT_CALL_OPERATION,
+            AIAgentLog.created_at >= start_of_month
+        ).group_by(AIAgentLog.agent_type).all()
+
+        # The serving model is recorded in output_data of agent and report rows
+        routed_calls = db.query(
+            AIAgentLog.agent_type,
+            AIAgentLog.output_data,
+            AIAgentLog.tokens_used,
+            AIAgentLog.processing_time_ms,
+        ).filter(
+            AIAgentLog.organization_id == organizationId,
+            AIAgentLog.operation.in_([AGENT_CALL_OPERATION, UsageType.REPORT_GENERATION.value]),
+            AIAgentLog.status == "success",
+            AIAgentLog.created_at >= start_of_month
+        ).all()
+
+        tokens_by_model = {}
+        for agent_type, output_data, tokens, processing_time in routed_calls:
+            try:
+                route = json.loads(output_data or "{}")
+            except ValueError:
+                continue
+            if not isinstance(route, dict) or not route.get("model"):
+                continue
+            stats = tokens_by_model.setdefault(
+                f"{agent_type}:{route['model']}",
+                {"calls": 0, "tokensUsed": 0, "totalProcessingTime": 0, "fallbacks": 0},
+            )
+            stats["calls"] += 1
+            stats["tokensUsed"] += tokens or 0
+            stats["totalProcessingTime"] += processing_time or 0
+            stats["fallbacks"] += 1 if route.get("modelFallback") else 0
+
         return {
             "success": True,
             "usage": usage_stats,
@@ -116,7 +168,21 @@ async def get_usage(
             "metrics": {
                 "avgProcessingTime": round(avg_processing_time, 2) if avg_processing_time else 0,
                 "avgTokensUsed": round(avg_tokens, 2) if avg_tokens else 0,
+                "totalTokensUsed": int(total_tokens or 0),
                 "successRate": round((success_rate / total_operations * 100), 2) if total_operations else 0
+            },
+            "tokensByAgent": {
+                agent_type: {"calls": calls, "tokensUsed": int(tokens or 0)}
+                for agent_type, calls, tokens in agent_tokens
+            },
+            "tokensByModel": {
+                route: {
+                    "calls": stats["calls"],
+                    "tokensUsed": stats["tokensUsed"],
+                    "avgProcessingTime": round(stats["totalProcessingTime"] / stats["calls"], 2),
+                    "fallbacks": stats["fallbacks"],
+                }
+                for route, stats in tokens_by_model.items()
             }
         }
 
@@ -177,3 +243,14 @@ async def get_agent_logs(
     except Exception as e:
         logger.error(f"Failed to get agent logs: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/ai/gateway")
+async def get_gateway_metrics():
+    """Get shared LLM gateway, model routing and request coalescing metrics"""
+    return {
+        "success": True,
+        "gateway": llm_gateway.metrics(),
+        "routing": model_router.metrics(),
+        "coalescing": single_flight_metrics(),
+    }
@@ -0,0 +1,59 @@
+"""
+Shared Service Dependencies
+
+Services are created once in the app lifespan (start_services) and handed to
+endpoints through FastAPI dependencies, so importing the api package creates
+no clients, caches or workers.
+"""
+from fastapi import FastAPI, Request
+
+from config.settings import settings
+from services.analysis_jobs import AnalysisJobQueue
+from services.http_clients import create_clients
+from services.llm_backend import create_llm_backend, set_llm_backend
+from services.multi_agent_orchestrator import MultiAgentOrchestrator
+from services.report_generator import ReportGenerator
+
+
+async def start_services(app: FastAPI):
+    """Create the pooled clients and the services that share them"""
+    clients = create_clients()
+    backend = create_llm_backend(client=clients.openai)
+    set_llm_backend(backend)
+
+    orchestrator = MultiAgentOrchestrator(backend=backend)
+    app.state.clients = clients
+    app.state.orchestrator = orchestrator
+    app.state.report_generator = ReportGenerator(backend=backend)
+    app.state.job_queue = AnalysisJobQueue(
+        orchestrator,
+        workers=settings.ANALYSIS_WORKERS,
+        max_queued=settings.ANALYSIS_QUEUE_SIZE,
+        lease_seconds=settings.ANALYSIS_JOB_LEASE_SECONDS,
+        heartbeat_seconds=settings.ANALYSIS_JOB_HEARTBEAT_SECONDS,
+    )
+
+    # Start background analysis workers (re-queues interrupted jobs)
+    await app.state.job_queue.start()
+
+
+async def stop_services(app: FastAPI):
+    """Stop the workers, then close the shared clients"""
+    await app.state.job_queue.stop()
+    set_llm_backend(None)
+    await app.state.clients.aclose()
+
+
+def get_orchestrator(request: Request) -> MultiAgentOrchestrator:
+    """Get the shared multi-agent orchestrator"""
+    return request.app.state.orchestrator
+
+
+def get_job_queue(request: Request) -> AnalysisJobQueue:
+    """Get the background analysis job queue"""
+    return request.app.state.job_queue
+
+
+def get_report_generator(request: Request) -> ReportGenerator:
+    """Get the shared report generator"""
+    return request.app.state.report_generator
@@ -0,0 +1,105 @@
+"""
+Findings API Endpoints - Query agent findings across documents
+"""
+from fastapi import APIRouter, HTTPException, Depends, Query
+from sqlalchemy.orm import Session
+from typing import Optional
+from datetime import datetime
+import logging
+
+from config.database import get_db
+from services.findings_store import SEVERITIES, FindingColumns, FindingFilter, query_findings
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter()
+
+# Largest page a single findings request may return
+MAX_PAGE_SIZE = 500
+
+
+def finding_filter(
+    organizationId: int = Query(default=1),
+    agentType: Optional[str] = Query(default=None),
+    severity: Optional[str] = Query(default=None, description="Comma-separated severities"),
+    findingType: Optional[str] = Query(default=None),
+    minConfidence: Optional[float] = Query(default=None, ge=0, le=1),
+    documentId: Optional[int] = Query(default=None),
+    since: Optional[datetime] = Query(default=None),
+    until: Optional[datetime] = Query(default=None),
+) -> FindingFilter:
+    """Findings filters from query parameters"""
+    severities = [s.strip().lower() for s in severity.split(",") if s.strip()] if severity else None
+    unknown = [s for s in severities or [] if s not in SEVERITIES]
+    if unknown:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unknown severity {', '.join(unknown)}; expected one of {', '.join(SEVERITIES)}",
+        )
+    return FindingFilter(
+        organization_id=organizationId,
+        agent_type=agentType,
+        severities=severities,
+        finding_type=findingType,
+        min_confidence=minConfidence,
+        document_id=documentId,
+        since=since,
+        until=until,
+    )
+
+
+@router.get("/findings")
+async def list_findings(
+    filters: FindingFilter = Depends(finding_filter),
+    cursor: Optional[int] = Query(default=None, description="nextCursor of the previous page"),
+    limit: int = Query(default=50, ge=1, le=MAX_PAGE_SIZE),
+    db: Session = Depends(get_db),
+):
+    """
+    List analysis findings across documents, newest first
+
+    Pages are keyset-paginated: pass the response's nextCursor as cursor to
+    get the next page; nextCursor is null on the last page.
+    """
+    try:
+        findings, next_cursor = query_findings(db, filters, after=cursor, limit=limit)
+
+        return {
+            "success": True,
+            "findings": [
+                {
+                    "id": f.id,
+                    "documentId": f.document_id,
+                    "fileName": f.file_name,
+                    "agentType": f.agent_type,
+                    "findingType": f.finding_type,
+                    "severity": f.severity,
+                    "confidence": f.confidence,
+                    "text": f.text,
+                    "createdAt": f.created_at.isoformat(),
+                }
+                for f in findings
+            ],
+            "nextCursor": next_cursor,
+        }
+
+    except Exception as e:
+        logger.error(f"Failed to list findings: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/findings/summary")
+async def findings_summary(
+    filters: FindingFilter = Depends(finding_filter),
+    db: Session = Depends(get_db),
+):
+    """Aggregate the filtered findings by agent and severity"""
+    try:
+        return {
+            "success": True,
+            "summary": FindingColumns.load(db, filters).summary(),
+        }
+
+    except Exception as e:
+        logger.error(f"Failed to summarize findings: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
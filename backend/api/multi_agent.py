@@ -2,25 +2,49 @@
 Multi-Agent Analysis API Endpoints
 """
 from fastapi import APIRouter, HTTPException, Depends
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 from sqlalchemy.orm import Session
 from typing import Optional
+import json
 import logging
 
 from services.multi_agent_orchestrator import MultiAgentOrchestrator
-from config.database import get_db
+from services.analysis_jobs import (
+    AnalysisJobQueue,
+    JobQueueFull,
+    build_analysis_logs,
+    record_financial_metrics,
+)
+from services.findings_store import record_findings
+from api.dependencies import get_job_queue, get_orchestrator
+from config.database import get_db, SessionLocal
 from models.ai_usage import AIAgentLog
+from models.document import Document, DocumentStatus
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter()
-orchestrator = MultiAgentOrchestrator()
 
 
 class AnalysisRequest(BaseModel):
     fileName: str
     fileContent: str
     organizationId: Optional[int] = 1
+    companyName: Optional[str] = None
+    chunked: Optional[bool] = None
+    timeoutSeconds: Optional[float] = None
+
+
+class ReanalysisRequest(BaseModel):
+    fileContent: str
+    companyName: Optional[str] = None
+    chunked: Optional[bool] = None
+    timeoutSeconds: Optional[float] = None
+
+
+class AnalysisJobRequest(AnalysisRequest):
+    userId: Optional[str] = "api"
 
 
 class AnalysisResponse(BaseModel):
@@ -29,10 +53,12 @@ class AnalysisResponse(BaseModel):
     message: str
 
 
+
 @router.post("/multi-agent-analysis", response_model=AnalysisResponse)
 async def analyze_document(
     request: AnalysisRequest,
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_db),
+    orchestrator: MultiAgentOrchestrator = Depends(get_orchestrator),
 ):
     """
     Analyze a financial document using multi-agent AI system
@@ -51,21 +77,28 @@ async def analyze_document(
         # Orchestrate multi-agent analysis
         result = await orchestrator.orchestrate(
             request.fileContent,
-            request.fileName
+            request.fileName,
+            chunked=request.chunked,
+            timeout=request.timeoutSeconds,
         )
 
-        # Log the operation
-        log_entry = AIAgentLog(
-            organization_id=request.organizationId,
-            agent_type="multi_agent_orchestrator",
-            operation="document_analysis",
-            input_data=request.fileName,
-            output_data=str(result.get("overallRisk", "")),
-            tokens_used=None,  # Can be calculated if needed
-            processing_time_ms=result.get("executionTime", 0),
-            status="success",
+        # Log the operation and each agent's token usage
+        db.add_all(build_analysis_logs(
+            request.organizationId,
+            request.fileName,
+            result,
+            result.get("agentResults", []),
+        ))
+        record_financial_metrics(
+            db, request.fileName, result.get("agentResults", []), request.companyName
+        )
+        record_findings(
+            db,
+            request.organizationId,
+            request.fileName,
+            result.get("agentResults", []),
+            content=request.fileContent,
         )
-        db.add(log_entry)
         db.commit()
 
         return AnalysisResponse(
@@ -90,3 +123,209 @@ async def analyze_document(
         db.commit()
 
         raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.post("/multi-agent-analysis/stream")
+async def analyze_document_stream(
+    request: AnalysisRequest,
+    orchestrator: MultiAgentOrchestrator = Depends(get_orchestrator),
+):
+    """
+    Analyze a financial document, streaming results as Server-Sent Events
+
+    Emits a "start" event, one "agent" event per agent as soon as that agent
+    finishes, and a final "complete" event carrying overallRisk, keyFindings
+    and recommendations. Failures are reported as an "error" event.
+    """
+    logger.info(f"Starting streaming multi-agent analysis for {request.fileName}")
+
+    async def event_stream():
+        summary = None
+        agent_results = []
+        try:
+            async for event in orchestrator.orchestrate_stream(
+                request.fileContent,
+                request.fileName,
+                chunked=request.chunked,
+                timeout=request.timeoutSeconds,
+            ):
+                if event["event"] == "agent":
+                    agent_results.append(event["data"])
+                elif event["event"] == "complete":
+                    summary = event["data"]
+                yield f"event: {event['event']}\ndata: {json.dumps(event['data'], default=str)}\n\n"
+        except Exception as e:
+            logger.error(f"Streaming multi-agent analysis failed: {str(e)}")
+            yield f"event: error\ndata: {json.dumps({'message': str(e)})}\n\n"
+            summary = {"error": str(e)}
+
+        if summary is None:
+            # Client disconnected before completion
+            return
+
+        # The request-scoped session is closed once streaming starts, so log
+        # the operation with a dedicated session
+        db = SessionLocal()
+        try:
+            if "error" in summary:
+                db.add(AIAgentLog(
+                    organization_id=request.organizationId,
+                    agent_type="multi_agent_orchestrator",
+                    operation="document_analysis",
+                    input_data=request.fileName,
+                    status="error",
+                    error_message=summary["error"],
+                ))
+            else:
+                db.add_all(build_analysis_logs(
+                    request.organizationId, request.fileName, summary, agent_results
+                ))
+                record_financial_metrics(
+                    db, request.fileName, agent_results, request.companyName
+                )
+                record_findings(
+                    db,
+                    request.organizationId,
+                    request.fileName,
+                    agent_results,
+                    content=request.fileContent,
+                )
+            db.commit()
+        except Exception as e:
+            logger.error(f"Failed to log streaming analysis: {str(e)}")
+        finally:
+            db.close()
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.post("/multi-agent-analysis/jobs", status_code=202)
+async def submit_analysis_job(
+    request: AnalysisJobRequest,
+    db: Session = Depends(get_db),
+    job_queue: AnalysisJobQueue = Depends(get_job_queue),
+):
+    """
+    Queue a multi-agent analysis and return immediately
+
+    The analysis runs on a bounded background worker pool and its status,
+    progress and result are stored on a Document. Poll
+    GET /multi-agent-analysis/jobs/{jobId} for the outcome.
+    """
+    try:
+        document = job_queue.submit(
+            db,
+            organization_id=request.organizationId,
+            user_id=request.userId,
+            file_name=request.fileName,
+            content=request.fileContent,
+            chunked=request.chunked,
+            timeout=request.timeoutSeconds,
+            company_name=request.companyName,
+        )
+    except JobQueueFull as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    except Exception as e:
+        logger.error(f"Failed to queue analysis job: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+    return {
+        "success": True,
+        "jobId": document.id,
+        "status": document.status.value,
+        "message": "Analysis job queued",
+    }
+
+
+@router.get("/multi-agent-analysis/jobs/{job_id}")
+async def get_analysis_job(
+    job_id: int,
+    db: Session = Depends(get_db),
+    job_queue: AnalysisJobQueue = Depends(get_job_queue),
+):
+    """Get an analysis job's status, progress, and result once completed"""
+    document = db.query(Document).filter(Document.id == job_id).first()
+    if not document:
+        raise HTTPException(status_code=404, detail="Analysis job not found")
+
+    return {
+        "success": True,
+        "job": job_queue.status(document),
+    }
+
+
+@router.post("/multi-agent-analysis/jobs/{job_id}/reanalyze", response_model=AnalysisResponse)
+async def reanalyze_document(
+    job_id: int,
+    request: ReanalysisRequest,
+    db: Session = Depends(get_db),
+    orchestrator: MultiAgentOrchestrator = Depends(get_orchestrator),
+):
+    """
+    Re-analyze a new version of a previously analyzed document
+
+    The new content is diffed section by section against the stored analysis;
+    only agents whose inputs changed are re-run and the rest are merged from
+    the stored result. The response's "incremental" entry lists the reused and
+    re-run agents and the section-level delta. The Document is updated with
+    the new content's analysis.
+    """
+    document = db.query(Document).filter(Document.id == job_id).first()
+    if not document:
+        raise HTTPException(status_code=404, detail="Analysis job not found")
+    if document.status != DocumentStatus.COMPLETED or not document.analysis_result:
+        raise HTTPException(
+            status_code=409, detail="Document has no completed analysis to re-analyze"
+        )
+
+    try:
+        previous = json.loads(document.analysis_result)
+        result = await orchestrator.orchestrate(
+            request.fileContent,
+            document.file_name,
+            chunked=request.chunked,
+            timeout=request.timeoutSeconds,
+            previous=previous,
+        )
+
+        document.analysis_result = json.dumps(result, default=str)
+        document.file_size = len(request.fileContent.encode("utf-8"))
+        fraud = next((r for r in result["agentResults"] if r["agentType"] == "fraud"), None)
+        risk_score = (fraud or {}).get("metadata", {}).get("riskScore")
+        if isinstance(risk_score, (int, float)):
+            document.risk_score = risk_score
+        db.add_all(build_analysis_logs(
+            document.organization_id,
+            document.file_name,
+            result,
+            result.get("agentResults", []),
+        ))
+        record_financial_metrics(
+            db, document.file_name, result.get("agentResults", []), request.companyName
+        )
+        record_findings(
+            db,
+            document.organization_id,
+            document.file_name,
+            result.get("agentResults", []),
+            document_id=document.id,
+        )
+        db.commit()
+
+        return AnalysisResponse(
+            success=True,
+            data=result,
+            message=(
+                f"Document re-analyzed: {len(result['incremental']['rerunAgents'])} agents re-run, "
+                f"{len(result['incremental']['reusedAgents'])} reused"
+            ),
+        )
+
+    except Exception as e:
+        logger.error(f"Incremental re-analysis failed: {str(e)}")
+        db.rollback()
+        raise HTTPException(status_code=500, detail=str(e))
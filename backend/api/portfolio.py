@@ -6,12 +6,12 @@ from pydantic import BaseModel
 from sqlalchemy.orm import Session
 from typing import List, Optional
 import logging
-import httpx
 from datetime import datetime
 
 from config.database import get_db
 from config.settings import settings
 from models.portfolio import Portfolio, PortfolioHolding
+from services.http_clients import get_http_client
 
 logger = logging.getLogger(__name__)
 
@@ -117,18 +117,17 @@ async def get_stock_price(symbol: str) -> Optional[float]:
         return None
 
     try:
-        async with httpx.AsyncClient() as client:
-            url = f"https://www.alphavantage.co/query"
-            params = {
-                "function": "GLOBAL_QUOTE",
-                "symbol": symbol,
-                "apikey": settings.ALPHA_VANTAGE_API_KEY
-            }
-            response = await client.get(url, params=params, timeout=10.0)
-            data = response.json()
-
-            if "Global Quote" in data and "05. price" in data["Global Quote"]:
-                return float(data["Global Quote"]["05. price"])
+        url = f"https://www.alphavantage.co/query"
+        params = {
+            "function": "GLOBAL_QUOTE",
+            "symbol": symbol,
+            "apikey": settings.ALPHA_VANTAGE_API_KEY
+        }
+        response = await get_http_client().get(url, params=params, timeout=10.0)
+        data = response.json()
+
+        if "Global Quote" in data and "05. price" in data["Global Quote"]:
+            return float(data["Global Quote"]["05. price"])
 
     except Exception as e:
         logger.error(f"Failed to fetch stock price for {symbol}: {str(e)}")
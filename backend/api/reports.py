@@ -1,17 +1,23 @@
 """
 Report Generation API Endpoints
 """
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Depends
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
-from typing import Dict, Any, Optional
+from sqlalchemy.orm import Session
+from typing import Dict, Any, List, Optional
+from datetime import datetime
+import json
 import logging
 
-from services.report_generator import ReportGenerator
+from services.report_generator import REPORT_TYPES, ReportGenerator
+from api.dependencies import get_report_generator
+from config.database import get_db, SessionLocal
+from models.ai_usage import AIAgentLog, UsageType
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter()
-report_generator = ReportGenerator()
 
 
 class ReportRequest(BaseModel):
@@ -20,6 +26,17 @@ class ReportRequest(BaseModel):
     organizationId: Optional[int] = 1
 
 
+class ReportBundleRequest(BaseModel):
+    reportTypes: Optional[List[str]] = None
+    data: Dict[str, Any]
+    organizationId: Optional[int] = 1
+
+
+class ReportCacheInvalidation(BaseModel):
+    organizationId: Optional[int] = None
+    reportType: Optional[str] = None
+
+
 class ReportResponse(BaseModel):
     success: bool
     report: dict
@@ -27,7 +44,11 @@ class ReportResponse(BaseModel):
 
 
 @router.post("/reports/generate", response_model=ReportResponse)
-async def generate_report(request: ReportRequest):
+async def generate_report(
+    request: ReportRequest,
+    db: Session = Depends(get_db),
+    report_generator: ReportGenerator = Depends(get_report_generator),
+):
     """
     Generate financial reports
 
@@ -39,15 +60,37 @@ async def generate_report(request: ReportRequest):
     - risk_report: Risk assessment with Monte Carlo simulations
     - tax_filing: IRS/government tax filing report
     - sec_filing: SEC filing (10-K/10-Q)
+
+    Reports are cached by organization, type, data, model and template
+    version; report.cacheHit tells whether this one was served from cache.
     """
     try:
         logger.info(f"Generating report: {request.reportType}")
+        start_time = datetime.now()
 
         report = await report_generator.generate_report(
             request.reportType,
-            request.data
+            request.data,
+            organization_id=request.organizationId,
         )
 
+        # Log the operation with the tokens it actually used
+        db.add(AIAgentLog(
+            organization_id=request.organizationId,
+            agent_type="report_generator",
+            operation=UsageType.REPORT_GENERATION.value,
+            input_data=request.reportType,
+            output_data=json.dumps({
+                "model": report.get("model"),
+                "modelFallback": report.get("modelFallback", False),
+                "cacheHit": report.get("cacheHit", False),
+            }),
+            tokens_used=0 if report.get("cacheHit") else report.get("tokenUsage", {}).get("totalTokens"),
+            processing_time_ms=int((datetime.now() - start_time).total_seconds() * 1000),
+            status="success",
+        ))
+        db.commit()
+
         return ReportResponse(
             success=True,
             report=report,
@@ -60,3 +103,157 @@ async def generate_report(request: ReportRequest):
     except Exception as e:
         logger.error(f"Report generation failed: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.post("/reports/generate/stream")
+async def generate_report_stream(
+    request: ReportRequest,
+    report_generator: ReportGenerator = Depends(get_report_generator),
+):
+    """
+    Generate a financial report, streaming its markdown as Server-Sent Events
+
+    Emits a "start" event, "chunk" events carrying markdown deltas as the
+    model produces them, and a final "complete" event with reportType,
+    generatedAt, tokenUsage and model (the same fields as /reports/generate,
+    without the content, plus cacheHit). A cached report is sent as a single
+    chunk. Failures are reported as an "error" event.
+    """
+    if request.reportType not in REPORT_TYPES:
+        raise HTTPException(status_code=400, detail=f"Unknown report type: {request.reportType}")
+
+    logger.info(f"Streaming report: {request.reportType}")
+
+    async def event_stream():
+        start_time = datetime.now()
+        report = None
+        yield f"event: start\ndata: {json.dumps({'reportType': request.reportType})}\n\n"
+        try:
+            async for event in report_generator.generate_report_stream(
+                request.reportType, request.data, organization_id=request.organizationId
+            ):
+                if event["event"] == "complete":
+                    report = event["data"]
+                yield f"event: {event['event']}\ndata: {json.dumps(event['data'], default=str)}\n\n"
+        except Exception as e:
+            logger.error(f"Streaming report generation failed: {str(e)}")
+            yield f"event: error\ndata: {json.dumps({'message': str(e)})}\n\n"
+
+        if report is None:
+            # Failed, or the client disconnected before completion
+            return
+
+        db = SessionLocal()
+        try:
+            db.add(AIAgentLog(
+                organization_id=request.organizationId,
+                agent_type="report_generator",
+                operation=UsageType.REPORT_GENERATION.value,
+                input_data=request.reportType,
+                output_data=json.dumps({
+                    "model": report.get("model"),
+                    "modelFallback": report.get("modelFallback", False),
+                    "cacheHit": report.get("cacheHit", False),
+                    "streamed": True,
+                }),
+                tokens_used=0 if report.get("cacheHit") else report.get("tokenUsage", {}).get("totalTokens"),
+                processing_time_ms=int((datetime.now() - start_time).total_seconds() * 1000),
+                status="success",
+            ))
+            db.commit()
+        except Exception as e:
+            logger.error(f"Failed to log streaming report: {str(e)}")
+        finally:
+            db.close()
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.post("/reports/bundle")
+async def generate_report_bundle(
+    request: ReportBundleRequest,
+    db: Session = Depends(get_db),
+    report_generator: ReportGenerator = Depends(get_report_generator),
+):
+    """
+    Generate several reports from the same data concurrently
+
+    reportTypes defaults to all seven report types. The data is serialized
+    once and shared by every report's prompt. Each entry of bundle.reports has
+    a status of "success" (with the report) or "failed" (with the error), so a
+    failed report does not fail the bundle.
+    """
+    report_types = request.reportTypes or list(REPORT_TYPES)
+    try:
+        logger.info(f"Generating report bundle: {', '.join(report_types)}")
+        bundle = await report_generator.generate_bundle(
+            report_types, request.data, organization_id=request.organizationId
+        )
+    except ValueError as e:
+        logger.error(f"Invalid report bundle: {str(e)}")
+        raise HTTPException(status_code=400, detail=str(e))
+
+    try:
+        for entry in bundle["reports"]:
+            report = entry.get("report") or {}
+            db.add(AIAgentLog(
+                organization_id=request.organizationId,
+                agent_type="report_generator",
+                operation=UsageType.REPORT_GENERATION.value,
+                input_data=entry["reportType"],
+                output_data=json.dumps({
+                    "model": report.get("model"),
+                    "modelFallback": report.get("modelFallback", False),
+                    "cacheHit": report.get("cacheHit", False),
+                    "bundle": True,
+                }),
+                tokens_used=0 if report.get("cacheHit") else report.get("tokenUsage", {}).get("totalTokens"),
+                processing_time_ms=int(bundle["elapsedMs"]),
+                status=entry["status"],
+                error_message=entry.get("error"),
+            ))
+        db.commit()
+    except Exception as e:
+        logger.error(f"Failed to log report bundle: {str(e)}")
+        db.rollback()
+
+    return {
+        "success": bundle["succeeded"] > 0,
+        "bundle": bundle,
+        "message": f"Generated {bundle['succeeded']} of {len(bundle['reports'])} reports",
+    }
+
+
+@router.post("/reports/cache/invalidate")
+async def invalidate_report_cache(
+    request: ReportCacheInvalidation,
+    report_generator: ReportGenerator = Depends(get_report_generator),
+):
+    """
+    Invalidate cached reports of an organization and/or report type
+
+    With neither organizationId nor reportType, all cached reports are invalidated.
+    """
+    if request.reportType is not None and request.reportType not in REPORT_TYPES:
+        raise HTTPException(status_code=400, detail=f"Unknown report type: {request.reportType}")
+
+    invalidated = await report_generator.invalidate_cache(
+        organization_id=request.organizationId, report_type=request.reportType
+    )
+    return {"success": True, **invalidated}
+
+
+@router.get("/reports/cache")
+async def get_report_cache_stats(
+    report_generator: ReportGenerator = Depends(get_report_generator),
+):
+    """Get report cache hit/miss counters"""
+    return {
+        "success": True,
+        "enabled": report_generator.cache is not None,
+        "cache": report_generator.cache_stats(),
+    }
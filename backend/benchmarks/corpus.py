@@ -0,0 +1,132 @@
+"""
+Benchmark Corpus - The sample filing plus deterministic synthetic filings
+"""
+import random
+from pathlib import Path
+from typing import List, Tuple
+
+from services.token_counter import count_tokens
+
+SAMPLE_PATH = Path(__file__).resolve().parents[2] / "public" / "sample-financial-report.txt"
+
+# Synthetic filing sizes (prompt tokens) used when none are given
+DEFAULT_SYNTHETIC_TOKENS = (8000, 32000)
+
+COMPANIES = ["Northwind Holdings", "Apex Industrial Corp", "Bluewater Logistics", "Helix Biosciences"]
+BALANCE_SHEET_ITEMS = [
+    "Cash and Cash Equivalents", "Accounts Receivable", "Inventory", "Prepaid Expenses",
+    "Property, Plant & Equipment", "Goodwill", "Intangible Assets", "Total Assets",
+    "Accounts Payable", "Accrued Liabilities", "Short-term Debt", "Long-term Debt",
+    "Total Liabilities", "Shareholders' Equity",
+]
+INCOME_STATEMENT_ITEMS = [
+    "Revenue", "Cost of Goods Sold", "Gross Profit", "Sales & Marketing",
+    "General & Administrative", "Research & Development", "Operating Income",
+    "Interest Expense", "Net Income Before Tax", "Income Tax", "Net Income",
+]
+CASH_FLOW_ITEMS = [
+    "Operating Activities", "Capital Expenditures", "Acquisitions", "Investing Activities",
+    "Debt Repayment", "Dividends Paid", "Financing Activities", "Net Cash Flow",
+]
+SEGMENTS = ["North America", "Europe", "Asia Pacific", "Latin America", "Services", "Licensing"]
+MDNA_SENTENCES = [
+    "Revenue in the {segment} segment grew {pct}% driven by new customer contracts.",
+    "Gross margin contracted {pct} basis points as freight and input costs rose.",
+    "Marketing spend in {segment} increased {pct}% ahead of a product launch.",
+    "Management expects working capital to normalize over the next two quarters.",
+    "The company refinanced ${amount} of term debt at a lower fixed rate.",
+    "Days sales outstanding increased to {days} days following extended payment terms.",
+    "Headcount in {segment} was reduced by {pct}% as part of the restructuring program.",
+]
+NOTE_SENTENCES = [
+    "Revenue is recognized when control of goods transfers to the customer.",
+    "Leases are recognized as right-of-use assets of ${amount} under IFRS 16.",
+    "Related party purchases of ${amount} were made on arm's length terms.",
+    "Contingent consideration of ${amount} remains payable on the {segment} acquisition.",
+    "Goodwill impairment testing indicated headroom of {pct}% in the {segment} unit.",
+    "Vendor payments of ${amount} were identified as potential duplicates and are under review.",
+    "Deferred tax assets of ${amount} are expected to be recovered within five years.",
+]
+RISK_SENTENCES = [
+    "Customer concentration: the top {count} customers account for {pct}% of revenue.",
+    "Foreign exchange movements in {segment} could reduce reported earnings.",
+    "Covenant headroom on the revolving facility fell to {pct}% at year end.",
+    "Cyber incidents could disrupt operations and expose customer data.",
+]
+
+
+def _amount(rng: random.Random, scale: float) -> str:
+    return f"{int(rng.uniform(0.2, 4.0) * scale):,}"
+
+
+def _fill(template: str, rng: random.Random, scale: float) -> str:
+    return template.format(
+        segment=rng.choice(SEGMENTS),
+        pct=rng.randint(2, 65),
+        amount=_amount(rng, scale / 10),
+        days=rng.randint(35, 95),
+        count=rng.randint(3, 10),
+    )
+
+
+def _statement(title: str, items: List[str], years: List[int], rng: random.Random, scale: float) -> List[str]:
+    lines = [title, "Line item | " + " | ".join(f"FY{year}" for year in years)]
+    for item in items:
+        values = [f"${_amount(rng, scale)}" for _ in years]
+        lines.append(f"{item} | " + " | ".join(values))
+    return lines + [""]
+
+
+def synthetic_filing(target_tokens: int, seed: int = 0) -> str:
+    """
+    A deterministic annual filing of about target_tokens tokens
+
+    The filing has the statement, MD&A, notes, risk factor and auditor
+    sections the sectionizer recognizes, with multi-year tables, segment
+    statements and enough notes to reach the target size.
+    """
+    rng = random.Random(seed)
+    company = rng.choice(COMPANIES)
+    scale = 10 ** rng.randint(6, 8)
+    year = 2024
+    years = [year, year - 1, year - 2]
+
+    lines = [f"ANNUAL REPORT - FISCAL YEAR {year}", company, "All amounts in USD", ""]
+    lines += _statement("CONSOLIDATED BALANCE SHEET", BALANCE_SHEET_ITEMS, years, rng, scale)
+    lines += _statement("CONSOLIDATED STATEMENT OF OPERATIONS", INCOME_STATEMENT_ITEMS, years, rng, scale)
+    lines += _statement("CONSOLIDATED STATEMENT OF CASH FLOWS", CASH_FLOW_ITEMS, years, rng, scale)
+
+    lines += ["MANAGEMENT'S DISCUSSION AND ANALYSIS"]
+    for segment in SEGMENTS:
+        lines += _statement(f"Segment results - {segment}", INCOME_STATEMENT_ITEMS[:7], years, rng, scale / 5)
+        lines.append(" ".join(_fill(rng.choice(MDNA_SENTENCES), rng, scale) for _ in range(4)))
+        lines.append("")
+
+    lines += ["RISK FACTORS"]
+    lines += [f"- {_fill(sentence, rng, scale)}" for sentence in RISK_SENTENCES] + [""]
+
+    lines += ["NOTES TO THE CONSOLIDATED FINANCIAL STATEMENTS"]
+    body = "\n".join(lines)
+    tail = [
+        "",
+        "INDEPENDENT AUDITOR'S REPORT",
+        f"In our opinion the financial statements present fairly the financial position of {company}.",
+    ]
+    note = 1
+    tokens = count_tokens(body + "\n".join(tail))
+    while tokens < target_tokens:
+        paragraph = f"Note {note}. " + " ".join(
+            _fill(rng.choice(NOTE_SENTENCES), rng, scale) for _ in range(rng.randint(3, 6))
+        )
+        body += "\n" + paragraph
+        tokens += count_tokens(paragraph) + 1
+        note += 1
+    return body + "\n".join(tail)
+
+
+def load_corpus(synthetic_tokens=DEFAULT_SYNTHETIC_TOKENS) -> List[Tuple[str, str]]:
+    """(name, content) pairs: the sample filing and one synthetic filing per size"""
+    corpus = [("sample", SAMPLE_PATH.read_text())]
+    for index, tokens in enumerate(synthetic_tokens):
+        corpus.append((f"synthetic-{tokens}", synthetic_filing(tokens, seed=index)))
+    return corpus
@@ -0,0 +1,85 @@
+"""
+Fake LLM Server - OpenAI-compatible chat completions endpoint for benchmarks
+
+Serves the StubBackend's schema-valid responses over HTTP with its log-normal
+latency, so benchmarks exercise the real OpenAI client, connection pool and
+network path without calling OpenAI. Point the app at it with
+LLM_BACKEND=openai and OPENAI_BASE_URL=http://<host>:<port>/v1.
+
+    python -m benchmarks.fake_llm_server --port 8900 --latency-ms 800
+"""
+import argparse
+
+import openai
+from fastapi import Body, FastAPI
+from fastapi.responses import JSONResponse, StreamingResponse
+
+from services.llm_backend import StubBackend
+
+
+def create_app(backend: StubBackend) -> FastAPI:
+    """FastAPI app answering /v1/chat/completions from backend"""
+    app = FastAPI(title="Fake LLM Server")
+
+    @app.get("/health")
+    async def health():
+        return {"status": "ok"}
+
+    def error_response(error: openai.APIStatusError) -> JSONResponse:
+        return JSONResponse(
+            status_code=error.status_code,
+            content={"error": {"message": error.message, "type": "server_error"}},
+        )
+
+    @app.post("/v1/chat/completions")
+    async def chat_completions(body: dict = Body(...)):
+        if body.pop("stream", False):
+            chunks = backend.stream_chat_completion(**body)
+            try:
+                # The stub fails (if at all) before its first chunk
+                first = await chunks.__anext__()
+            except openai.APIStatusError as e:
+                return error_response(e)
+
+            async def events():
+                yield f"data: {first.model_dump_json(exclude_none=True)}\n\n"
+                async for chunk in chunks:
+                    yield f"data: {chunk.model_dump_json(exclude_none=True)}\n\n"
+                yield "data: [DONE]\n\n"
+
+            return StreamingResponse(events(), media_type="text/event-stream")
+
+        try:
+            completion = await backend.create_chat_completion(**body)
+        except openai.APIStatusError as e:
+            return error_response(e)
+        return completion.model_dump(exclude_none=True)
+
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8900)
+    parser.add_argument("--latency-ms", type=float, default=800, help="Median response latency")
+    parser.add_argument("--latency-sigma", type=float, default=0.4, help="Log-normal latency spread")
+    parser.add_argument("--ms-per-token", type=float, default=0, help="Extra latency per completion token")
+    parser.add_argument("--error-rate", type=float, default=0, help="Fraction of calls failing with 429/500")
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    import uvicorn
+
+    backend = StubBackend(
+        latency_ms=args.latency_ms,
+        latency_sigma=args.latency_sigma,
+        ms_per_token=args.ms_per_token,
+        error_rate=args.error_rate,
+        seed=args.seed,
+    )
+    uvicorn.run(create_app(backend), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,383 @@
+"""
+Orchestrator Benchmark - Throughput, latency percentiles, tokens and event-loop lag
+
+Drives MultiAgentOrchestrator directly and/or the POST /api/multi-agent-analysis
+route (in-process over ASGI, including request validation and DB logging)
+against the fake LLM server, one scenario per corpus document. Every request
+gets unique content so the result cache and request coalescing do not hide
+LLM work (use --cache to measure cached runs). Results are written as JSON;
+pass a previous file as --compare to print the change per scenario.
+
+    python -m benchmarks.run --requests 40 --concurrency 8
+    python -m benchmarks.run --target api --compare benchmarks/results/abc1234.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import secrets
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+from contextlib import asynccontextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+RESULTS_DIR = BACKEND_DIR / "benchmarks" / "results"
+
+# Seconds to wait for the fake LLM server to accept requests
+SERVER_START_TIMEOUT = 20
+
+
+def summarize(samples: List[float]) -> Dict[str, float]:
+    """p50/p95/p99 (nearest rank), mean and max of samples, rounded to 0.01"""
+    if not samples:
+        return {"p50": 0.0, "p95": 0.0, "p99": 0.0, "mean": 0.0, "max": 0.0}
+    ordered = sorted(samples)
+
+    def percentile(p: float) -> float:
+        return round(ordered[min(len(ordered) - 1, int(p * len(ordered)))], 2)
+
+    return {
+        "p50": percentile(0.50),
+        "p95": percentile(0.95),
+        "p99": percentile(0.99),
+        "mean": round(sum(ordered) / len(ordered), 2),
+        "max": round(ordered[-1], 2),
+    }
+
+
+class LoopLagMonitor:
+    """Measures how late the event loop wakes a task sleeping for interval seconds"""
+
+    def __init__(self, interval: float = 0.01):
+        self.interval = interval
+        self.samples: List[float] = []
+        self._task: Optional[asyncio.Task] = None
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            start = loop.time()
+            await asyncio.sleep(self.interval)
+            self.samples.append(max(0.0, loop.time() - start - self.interval) * 1000)
+
+    def start(self):
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> Dict[str, float]:
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        return summarize(self.samples)
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_fake_server(args: argparse.Namespace, env: Dict[str, str]) -> Tuple[subprocess.Popen, str]:
+    """Start benchmarks.fake_llm_server in a subprocess and wait until it is up"""
+    import httpx
+
+    port = free_port()
+    command = [
+        sys.executable, "-m", "benchmarks.fake_llm_server",
+        "--port", str(port),
+        "--latency-ms", str(args.latency_ms),
+        "--latency-sigma", str(args.latency_sigma),
+        "--ms-per-token", str(args.ms_per_token),
+        "--error-rate", str(args.error_rate),
+        "--seed", str(args.seed),
+    ]
+    process = subprocess.Popen(command, cwd=BACKEND_DIR, env=env)
+    base_url = f"http://127.0.0.1:{port}"
+
+    deadline = time.monotonic() + SERVER_START_TIMEOUT
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"Fake LLM server exited with code {process.returncode}")
+        try:
+            if httpx.get(f"{base_url}/health", timeout=1).status_code == 200:
+                return process, f"{base_url}/v1"
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    process.terminate()
+    raise RuntimeError("Fake LLM server did not start in time")
+
+
+def configure_environment(args: argparse.Namespace, base_url: Optional[str]):
+    """Settings for the benchmarked app; must run before config.settings is imported"""
+    os.environ["DATABASE_URL"] = args.database_url
+    os.environ.setdefault("OPENAI_API_KEY", "benchmark")
+    os.environ.setdefault("SECRET_KEY", secrets.token_hex(32))
+    os.environ["RESULT_CACHE_USE_REDIS"] = "False"
+    os.environ["RESULT_CACHE_ENABLED"] = str(args.cache)
+    if base_url:
+        os.environ["LLM_BACKEND"] = "openai"
+        os.environ["OPENAI_BASE_URL"] = base_url
+    else:
+        os.environ["LLM_BACKEND"] = "stub"
+        os.environ["LLM_STUB_LATENCY_MS"] = str(args.latency_ms)
+        os.environ["LLM_STUB_LATENCY_SIGMA"] = str(args.latency_sigma)
+        os.environ["LLM_STUB_MS_PER_TOKEN"] = str(args.ms_per_token)
+        os.environ["LLM_STUB_ERROR_RATE"] = str(args.error_rate)
+        os.environ["LLM_STUB_SEED"] = str(args.seed)
+
+
+async def run_scenario(
+    target: str,
+    document: str,
+    content: str,
+    call: Callable[[str, str], Awaitable[Dict[str, Any]]],
+    requests: int,
+    concurrency: int,
+    unique: bool,
+) -> Dict[str, Any]:
+    """
+    Send requests analyses of content, at most concurrency at a time
+
+    Args:
+        target: "orchestrator" or "api"
+        document: Corpus document name
+        content: Document text
+        call: Runs one analysis of (content, file name) and returns its summary
+        requests: Number of analyses
+        concurrency: Analyses in flight at once
+        unique: Append a per-request marker so no two requests share a cache key
+    """
+    from services.token_counter import count_tokens
+
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies: List[float] = []
+    tokens: List[int] = []
+    calls: List[int] = []
+    errors: List[str] = []
+
+    async def one(index: int):
+        text = f"{content}\n\nBenchmark request {uuid.uuid4().hex}" if unique else content
+        async with semaphore:
+            start = time.perf_counter()
+            try:
+                summary = await call(text, f"{document}-{index}.txt")
+            except Exception as e:
+                errors.append(f"{type(e).__name__}: {e}")
+                return
+            latencies.append((time.perf_counter() - start) * 1000)
+            usage = summary.get("tokenUsage") or {}
+            tokens.append(usage.get("totalTokens", 0))
+            calls.append(usage.get("calls", 0))
+
+    monitor = LoopLagMonitor()
+    monitor.start()
+    start = time.perf_counter()
+    await asyncio.gather(*(one(index) for index in range(requests)))
+    wall = time.perf_counter() - start
+    lag = await monitor.stop()
+
+    completed = len(latencies)
+    return {
+        "target": target,
+        "document": document,
+        "documentTokens": count_tokens(content),
+        "requests": requests,
+        "concurrency": concurrency,
+        "completed": completed,
+        "errors": len(errors),
+        "errorSamples": sorted(set(errors))[:5],
+        "wallSeconds": round(wall, 3),
+        "requestsPerSecond": round(completed / wall, 3) if wall else 0,
+        "latencyMs": summarize(latencies),
+        "tokensPerRequest": round(sum(tokens) / completed, 1) if completed else 0,
+        "llmCallsPerRequest": round(sum(calls) / completed, 2) if completed else 0,
+        "eventLoopLagMs": lag,
+    }
+
+
+async def benchmark(args: argparse.Namespace, corpus: List[Tuple[str, str]]) -> Dict[str, Any]:
+    """Run every target against every corpus document in one app lifespan"""
+    import httpx
+    from fastapi import FastAPI
+
+    import models  # noqa: F401 - registers every table for create_all
+    from api import multi_agent
+    from api.dependencies import start_services, stop_services
+    from config.database import Base, engine
+    from services.llm_gateway import llm_gateway
+
+    @asynccontextmanager
+    async def lifespan(app: FastAPI):
+        Base.metadata.create_all(bind=engine)
+        await start_services(app)
+        yield
+        await stop_services(app)
+
+    app = FastAPI(lifespan=lifespan)
+    app.include_router(multi_agent.router, prefix="/api")
+
+    async with app.router.lifespan_context(app):
+        orchestrator = app.state.orchestrator
+        client = httpx.AsyncClient(
+            transport=httpx.ASGITransport(app=app), base_url="http://benchmark", timeout=None
+        )
+
+        async def via_orchestrator(content: str, file_name: str) -> Dict[str, Any]:
+            return await orchestrator.orchestrate(content, file_name)
+
+        async def via_api(content: str, file_name: str) -> Dict[str, Any]:
+            response = await client.post(
+                "/api/multi-agent-analysis", json={"fileName": file_name, "fileContent": content}
+            )
+            response.raise_for_status()
+            return response.json()["data"]
+
+        targets = {"orchestrator": via_orchestrator, "api": via_api}
+        selected = list(targets) if args.target == "both" else [args.target]
+
+        scenarios = []
+        try:
+            for target in selected:
+                for document, content in corpus:
+                    for _ in range(args.warmup):
+                        await targets[target](content, f"{document}-warmup.txt")
+                    scenario = await run_scenario(
+                        target, document, content, targets[target],
+                        args.requests, args.concurrency, unique=not args.cache,
+                    )
+                    scenarios.append(scenario)
+                    print(
+                        f"{target:>12} {document:>16}: {scenario['requestsPerSecond']:.2f} req/s, "
+                        f"p50 {scenario['latencyMs']['p50']:.0f} ms, p95 {scenario['latencyMs']['p95']:.0f} ms, "
+                        f"p99 {scenario['latencyMs']['p99']:.0f} ms, {scenario['tokensPerRequest']:.0f} tokens, "
+                        f"loop lag p99 {scenario['eventLoopLagMs']['p99']:.1f} ms, {scenario['errors']} errors"
+                    )
+        finally:
+            await client.aclose()
+
+        return {"scenarios": scenarios, "gateway": llm_gateway.metrics()}
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=BACKEND_DIR, capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any]):
+    """Print throughput and latency changes against a previous results file"""
+    previous = {(s["target"], s["document"]): s for s in baseline.get("scenarios", [])}
+    print(f"\nChange vs {baseline.get('commit') or 'baseline'}:")
+    for scenario in current["scenarios"]:
+        before = previous.get((scenario["target"], scenario["document"]))
+        if not before:
+            continue
+
+        def change(new: float, old: float) -> str:
+            return f"{(new - old) / old * 100:+.1f}%" if old else "n/a"
+
+        print(
+            f"{scenario['target']:>12} {scenario['document']:>16}: "
+            f"req/s {change(scenario['requestsPerSecond'], before['requestsPerSecond'])}, "
+            f"p50 {change(scenario['latencyMs']['p50'], before['latencyMs']['p50'])}, "
+            f"p95 {change(scenario['latencyMs']['p95'], before['latencyMs']['p95'])}, "
+            f"p99 {change(scenario['latencyMs']['p99'], before['latencyMs']['p99'])}, "
+            f"tokens {change(scenario['tokensPerRequest'], before['tokensPerRequest'])}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--target", choices=["orchestrator", "api", "both"], default="both")
+    parser.add_argument("--llm", choices=["server", "stub"], default="server",
+                        help="Fake LLM server over HTTP, or the in-process stub backend")
+    parser.add_argument("--requests", type=int, default=20, help="Analyses per scenario")
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--warmup", type=int, default=1, help="Unmeasured analyses per scenario")
+    parser.add_argument("--sizes", default="8000,32000",
+                        help="Comma-separated token sizes of the synthetic filings")
+    parser.add_argument("--latency-ms", type=float, default=800)
+    parser.add_argument("--latency-sigma", type=float, default=0.4)
+    parser.add_argument("--ms-per-token", type=float, default=0)
+    parser.add_argument("--error-rate", type=float, default=0)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--cache", action="store_true", help="Repeat identical content so caches apply")
+    parser.add_argument("--database-url", default=None,
+                        help="Database for analysis logs (default: a temporary SQLite file)")
+    parser.add_argument("--output", default=None, help="Results file (default: benchmarks/results/<commit>.json)")
+    parser.add_argument("--compare", default=None, help="Previous results file to compare against")
+    args = parser.parse_args()
+
+    workdir = tempfile.TemporaryDirectory(prefix="finsight-bench-")
+    args.database_url = args.database_url or f"sqlite:///{workdir.name}/benchmark.db"
+
+    server = None
+    try:
+        configure_environment(args, None)
+        if args.llm == "server":
+            server, base_url = start_fake_server(args, dict(os.environ))
+            configure_environment(args, base_url)
+
+        from benchmarks.corpus import load_corpus
+
+        sizes = [int(size) for size in args.sizes.split(",") if size.strip()]
+        corpus = load_corpus(sizes)
+        results = asyncio.run(benchmark(args, corpus))
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait(timeout=10)
+        workdir.cleanup()
+
+    from config.settings import settings
+
+    commit = git_commit()
+    output = {
+        "commit": commit,
+        "timestamp": datetime.utcnow().isoformat(),
+        "python": platform.python_version(),
+        "config": {
+            "target": args.target,
+            "llm": args.llm,
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+            "syntheticSizes": sizes,
+            "latencyMs": args.latency_ms,
+            "latencySigma": args.latency_sigma,
+            "msPerToken": args.ms_per_token,
+            "errorRate": args.error_rate,
+            "cache": args.cache,
+            "gateway": {
+                "maxInFlight": settings.LLM_MAX_IN_FLIGHT,
+                "requestsPerMinute": settings.LLM_REQUESTS_PER_MINUTE,
+                "tokensPerMinute": settings.LLM_TOKENS_PER_MINUTE,
+            },
+        },
+        **results,
+    }
+
+    path = Path(args.output) if args.output else RESULTS_DIR / f"{commit or 'local'}.json"
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(output, indent=2))
+    print(f"\nResults written to {path}")
+
+    if args.compare:
+        compare(output, json.loads(Path(args.compare).read_text()))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,9 @@
 """
 Database Configuration
 """
-from sqlalchemy import create_engine
+from typing import List
+
+from sqlalchemy import create_engine, inspect, text
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from config.settings import settings
@@ -28,3 +30,43 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+def add_missing_columns(bind=None) -> List[str]:
+    """
+    Add model columns missing from existing tables, with their indexes
+
+    create_all() creates missing tables but never alters existing ones, so
+    nullable columns added to a model later (e.g. documents.job_owner) are
+    added here. Non-nullable columns need a manual migration and are skipped.
+
+    Returns:
+        "table.column" of each column added
+    """
+    bind = bind or engine
+    inspector = inspect(bind)
+    quote = bind.dialect.identifier_preparer.quote
+    tables = set(inspector.get_table_names())
+    added = []
+    with bind.begin() as connection:
+        for table in Base.metadata.sorted_tables:
+            if table.name not in tables:
+                continue
+            present = {column["name"] for column in inspector.get_columns(table.name)}
+            missing = [
+                column for column in table.columns
+                if column.name not in present and column.nullable
+            ]
+            for column in missing:
+                column_type = column.type.compile(dialect=bind.dialect)
+                connection.execute(text(
+                    f"ALTER TABLE {quote(table.name)} ADD COLUMN {quote(column.name)} {column_type}"
+                ))
+                added.append(f"{table.name}.{column.name}")
+
+            indexes = {index["name"] for index in inspector.get_indexes(table.name)}
+            missing_names = {column.name for column in missing}
+            for index in table.indexes:
+                if index.name not in indexes and missing_names & {column.name for column in index.columns}:
+                    index.create(connection)
+    return added
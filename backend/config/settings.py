@@ -2,7 +2,7 @@
 Application Settings
 """
 from pydantic_settings import BaseSettings
-from typing import Optional
+from typing import Dict, List, Optional, Tuple
 
 
 class Settings(BaseSettings):
@@ -24,6 +24,74 @@ class Settings(BaseSettings):
     # OpenAI
     OPENAI_API_KEY: str
     OPENAI_MODEL: str = "gpt-4o-mini"
+    # OpenAI-compatible endpoint (e.g. the benchmark's fake LLM server); None = api.openai.com
+    OPENAI_BASE_URL: Optional[str] = None
+
+    # LLM Backend ("openai" or "stub" for offline load testing)
+    LLM_BACKEND: str = "openai"
+    LLM_STUB_LATENCY_MS: float = 800
+    LLM_STUB_LATENCY_SIGMA: float = 0.4
+    LLM_STUB_MS_PER_TOKEN: float = 0
+    LLM_STUB_ERROR_RATE: float = 0
+    LLM_STUB_COMPLETION_TOKENS: int = 0
+    LLM_STUB_SEED: Optional[int] = None
+
+    # LLM Gateway (shared limits for every LLM call in the process, 0 = unlimited)
+    LLM_MAX_IN_FLIGHT: int = 8
+    LLM_REQUESTS_PER_MINUTE: int = 500
+    LLM_TOKENS_PER_MINUTE: int = 200000
+    LLM_COMPLETION_TOKENS_ESTIMATE: int = 800
+
+    # Shared, pooled HTTP clients created at startup (HTTP/2 needs the h2 package)
+    HTTP_MAX_CONNECTIONS: int = 50
+    HTTP_MAX_KEEPALIVE_CONNECTIONS: int = 20
+    HTTP_KEEPALIVE_EXPIRY_SECONDS: float = 60
+    HTTP_CONNECT_TIMEOUT_SECONDS: float = 5
+    HTTP2_ENABLED: bool = True
+    LLM_HTTP_MAX_CONNECTIONS: int = 32
+
+    # Per-call prompt token ceiling (0 = unlimited) and what to do when exceeded ("trim" or "reject")
+    LLM_MAX_PROMPT_TOKENS: int = 0
+    LLM_BUDGET_POLICY: str = "trim"
+
+    # Model routing: each route (agent type, "report" or "report:<type>") lists
+    # [max input tokens or null, tier or model name] steps; under load (this many
+    # gateway calls queued, 0 = never) calls fall back to MODEL_FALLBACK_TIER.
+    # Tiers left empty use OPENAI_MODEL, so other models are opt-in
+    MODEL_ROUTING_ENABLED: bool = True
+    MODEL_TIERS: Dict[str, str] = {"small": "", "large": ""}
+    MODEL_ROUTES: Dict[str, List[Tuple[Optional[int], str]]] = {
+        "parser": [(None, "small")],
+        "alert": [(None, "small")],
+        "insight": [(None, "small")],
+        "analyzer": [(6000, "small"), (None, "large")],
+        "compliance": [(1000, "small"), (None, "large")],
+        "fraud": [(1000, "small"), (None, "large")],
+        "report": [(None, "large")],
+    }
+    MODEL_FALLBACK_TIER: str = "small"
+    MODEL_FALLBACK_QUEUE_DEPTH: int = 16
+
+    # LLM Timeouts, Retries and Hedging (the call timeout starts at gateway admission)
+    LLM_CALL_TIMEOUT_SECONDS: float = 60
+    LLM_MAX_RETRIES: int = 2
+    LLM_RETRY_BASE_DELAY_SECONDS: float = 0.5
+    LLM_RETRY_MAX_DELAY_SECONDS: float = 8
+    LLM_HEDGING_ENABLED: bool = False
+    LLM_HEDGE_MIN_DELAY_SECONDS: float = 1
+    LLM_HEDGE_MIN_SAMPLES: int = 20
+    AGENT_TIMEOUT_SECONDS: float = 90
+    ANALYSIS_TIMEOUT_SECONDS: float = 120
+
+    # Share one in-flight run between concurrent identical analyses/reports
+    COALESCING_ENABLED: bool = True
+
+    # Background analysis jobs; a worker's leases are renewed every heartbeat, and
+    # jobs whose lease has expired are taken over by another worker
+    ANALYSIS_WORKERS: int = 2
+    ANALYSIS_QUEUE_SIZE: int = 100
+    ANALYSIS_JOB_LEASE_SECONDS: float = 300
+    ANALYSIS_JOB_HEARTBEAT_SECONDS: float = 60
 
     # Alpha Vantage (Stock Data)
     ALPHA_VANTAGE_API_KEY: Optional[str] = None
@@ -44,6 +112,58 @@ class Settings(BaseSettings):
     # Redis
     REDIS_URL: Optional[str] = "redis://localhost:6379"
 
+    # AI Result Cache
+    RESULT_CACHE_ENABLED: bool = True
+    RESULT_CACHE_MAX_ENTRIES: int = 256
+    RESULT_CACHE_TTL_SECONDS: int = 86400
+    RESULT_CACHE_USE_REDIS: bool = True
+
+    # Report Cache (keyed by organization, report type, data, model and template
+    # version; with Redis, cached reports and invalidations are shared by all workers)
+    REPORT_CACHE_ENABLED: bool = True
+    REPORT_CACHE_MAX_ENTRIES: int = 512
+    REPORT_CACHE_TTL_SECONDS: int = 3600
+    REPORT_CACHE_USE_REDIS: bool = False
+
+    # Chunked (map-reduce) Analysis
+    CHUNKED_ANALYSIS_ENABLED: bool = False
+    CHUNK_MAX_TOKENS: int = 1000
+    CHUNK_OVERLAP_TOKENS: int = 100
+    CHUNK_CONCURRENCY: int = 4
+
+    # Route only relevant document sections to each agent
+    SECTION_ROUTING_ENABLED: bool = True
+
+    # Compact document text (boilerplate, tables, whitespace) before prompting
+    PROMPT_COMPACTION_ENABLED: bool = True
+
+    # Run agents as a dependency graph (parser feeds analyzer/compliance, fraud
+    # and compliance feed alert) and skip downstream agents upstream makes moot
+    AGENT_DAG_ENABLED: bool = True
+    AGENT_SHORT_CIRCUIT_ENABLED: bool = True
+
+    # Local forensic pre-screen for the fraud agent (skip the LLM below this score, 0 = never;
+    # documents with too few amounts to screen are never skipped)
+    FORENSIC_PRESCREEN_ENABLED: bool = True
+    FORENSIC_SKIP_THRESHOLD: float = 0
+
+    # Extract statement line items and compute ratios locally for the analyzer
+    FINANCIAL_EXTRACTION_ENABLED: bool = True
+
+    # Re-queries for agent output that fails schema validation after local repair
+    AGENT_OUTPUT_MAX_REQUERIES: int = 1
+
+    # Monte Carlo risk simulation run by risk_report when no results are supplied
+    # (paths and years are capped at MONTE_CARLO_MAX_PATHS and
+    # MONTE_CARLO_MAX_HORIZON_YEARS; paths are simulated in chunks)
+    MONTE_CARLO_ENABLED: bool = True
+    MONTE_CARLO_PATHS: int = 100000
+    MONTE_CARLO_MAX_PATHS: int = 2000000
+    MONTE_CARLO_CHUNK_PATHS: int = 50000
+    MONTE_CARLO_HORIZON_YEARS: int = 3
+    MONTE_CARLO_MAX_HORIZON_YEARS: int = 10
+    MONTE_CARLO_SEED: int = 42
+
     # Email
     RESEND_API_KEY: Optional[str] = None
 
@@ -21,8 +21,10 @@ from api import (
     alerts,
     ai_usage,
     demo_setup,
+    findings,
 )
-from config.database import engine, Base
+from api.dependencies import start_services, stop_services
+from config.database import add_missing_columns, engine, Base
 from utils.logger import setup_logging
 
 # Load environment variables
@@ -50,12 +52,19 @@ async def lifespan(app: FastAPI):
 
     # Create database tables
     Base.metadata.create_all(bind=engine)
+    added = add_missing_columns()
+    if added:
+        logger.info(f"Added database columns: {', '.join(added)}")
     logger.info("Database tables created/verified")
 
+    # Pooled HTTP/LLM clients, shared services and background analysis workers
+    await start_services(app)
+
     yield
 
     # Shutdown
     logger.info("Shutting down FinSight AI Backend...")
+    await stop_services(app)
 
 
 # Initialize FastAPI app
@@ -127,6 +136,7 @@ app.include_router(webhooks.router, prefix="/api", tags=["Webhooks"])
 app.include_router(feature_flags.router, prefix="/api", tags=["Feature Flags"])
 app.include_router(alerts.router, prefix="/api", tags=["Alerts"])
 app.include_router(ai_usage.router, prefix="/api", tags=["AI Usage"])
+app.include_router(findings.router, prefix="/api", tags=["Findings"])
 app.include_router(demo_setup.router, prefix="/api", tags=["Demo Setup"])
 
 
@@ -11,6 +11,7 @@ from models.api_key import APIKey
 from models.support_ticket import SupportTicket, TicketMessage
 from models.financial_metrics import FinancialMetrics
 from models.portfolio import Portfolio, PortfolioHolding
+from models.finding import AnalysisFinding
 
 __all__ = [
     "Organization",
@@ -27,4 +28,5 @@ __all__ = [
     "FinancialMetrics",
     "Portfolio",
     "PortfolioHolding",
+    "AnalysisFinding",
 ]
@@ -15,6 +15,10 @@ class UsageType(str, enum.Enum):
     REPORT_GENERATION = "report_generation"
 
 
+# Operation recorded for the per-agent rows logged alongside each analysis
+AGENT_CALL_OPERATION = "agent_call"
+
+
 class AIUsage(Base):
     __tablename__ = "usage_tracking"
 
@@ -28,6 +28,11 @@ class Document(Base):
     status = Column(Enum(DocumentStatus), default=DocumentStatus.PENDING)
     analysis_result = Column(Text, nullable=True)  # JSON stored as text
     risk_score = Column(Float, nullable=True)
+    # Background analysis jobs: the worker holding the job until its lease
+    # expires, and progress kept apart from the stored request
+    job_owner = Column(String(64), nullable=True)
+    job_lease_expires_at = Column(DateTime, nullable=True, index=True)
+    job_progress = Column(Text, nullable=True)  # JSON stored as text
     created_at = Column(DateTime, default=datetime.utcnow, index=True)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
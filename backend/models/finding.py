@@ -0,0 +1,35 @@
+"""
+Analysis Finding Models
+"""
+from sqlalchemy import Column, Integer, String, DateTime, Text, ForeignKey, Float, Index
+from datetime import datetime
+from config.database import Base
+
+
+class AnalysisFinding(Base):
+    """One agent finding from a completed analysis, normalized for cross-document queries"""
+
+    __tablename__ = "analysis_findings"
+
+    id = Column(Integer, primary_key=True, index=True)
+    organization_id = Column(Integer, nullable=False)
+    document_id = Column(Integer, ForeignKey("documents.id"), nullable=True, index=True)
+    file_name = Column(String(500), nullable=False)
+    # Identifies analyses without a Document row (file name and content hash)
+    analysis_key = Column(String(64), nullable=True)
+    agent_type = Column(String(50), nullable=False)
+    finding_type = Column(String(255), nullable=True)
+    severity = Column(String(20), nullable=True)
+    confidence = Column(Float, nullable=True)
+    text = Column(Text, nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+    # Keyset pagination walks id descending within an organization, optionally
+    # narrowed by agent and severity or by time window; re-analysis replaces
+    # rows by document or analysis key
+    __table_args__ = (
+        Index("ix_analysis_findings_org_agent_severity", "organization_id", "agent_type", "severity", "id"),
+        Index("ix_analysis_findings_org_created", "organization_id", "created_at", "id"),
+        Index("ix_analysis_findings_org_id", "organization_id", "id"),
+        Index("ix_analysis_findings_org_analysis_key", "organization_id", "analysis_key"),
+    )
@@ -0,0 +1,406 @@
+"""
+Agent Schemas - Typed agent outputs with a tolerant local repair pass
+"""
+import json
+import re
+from typing import Any, ClassVar, Dict, List, Literal, Optional, Tuple, Type
+
+from pydantic import BaseModel, ConfigDict, Field, ValidationError, field_validator, model_validator
+
+# Confidence given to a finding that has none (and no output-level confidence)
+DEFAULT_CONFIDENCE = 0.5
+
+SEVERITY_ALIASES = {
+    "informational": "info",
+    "none": "info",
+    "minor": "low",
+    "moderate": "medium",
+    "med": "medium",
+    "major": "high",
+    "severe": "high",
+    "significant": "high",
+    "urgent": "critical",
+}
+COMPLIANCE_STATUS_ALIASES = {
+    "pass": "compliant",
+    "passed": "compliant",
+    "yes": "compliant",
+    "fail": "non-compliant",
+    "failed": "non-compliant",
+    "noncompliant": "non-compliant",
+    "non compliant": "non-compliant",
+    "violation": "non-compliant",
+    "unknown": "unclear",
+    "partial": "unclear",
+    "partially compliant": "unclear",
+}
+TREND_ALIASES = {"increasing": "up", "rising": "up", "decreasing": "down", "falling": "down", "flat": "stable"}
+
+CODE_FENCE = re.compile(r"^\s*```(?:json)?\s*|\s*```\s*$", re.IGNORECASE)
+TRAILING_COMMA = re.compile(r",\s*([}\]])")
+NUMBER = re.compile(r"[-+]?\d[\d,]*(?:\.\d+)?|[-+]?\.\d+")
+
+
+class AgentOutputError(ValueError):
+    """Raised when an agent's output cannot be parsed or repaired into its schema"""
+
+
+def _to_text(value: Any) -> str:
+    if value is None:
+        return ""
+    if isinstance(value, (list, tuple)):
+        return "; ".join(_to_text(item) for item in value if item is not None)
+    if isinstance(value, dict):
+        return json.dumps(value, separators=(",", ":"))
+    return str(value).strip()
+
+
+def _to_number(value: Any) -> Optional[float]:
+    if value is None or isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    text = str(value).strip()
+    match = NUMBER.search(text)
+    if not match:
+        return None
+    number = float(match.group().replace(",", ""))
+    return -number if text.startswith("(") and text.endswith(")") else number
+
+
+def _to_confidence(value: Any) -> Optional[float]:
+    number = _to_number(value)
+    if number is None:
+        return None
+    if number > 1 and (number <= 100 or "%" in str(value)):
+        number /= 100
+    return min(1.0, max(0.0, number))
+
+
+def _choice(value: Any, aliases: Dict[str, str]) -> Optional[str]:
+    if value is None:
+        return None
+    text = re.sub(r"[_\s]+", " ", str(value).strip().lower())
+    return aliases.get(text, text)
+
+
+class AgentFinding(BaseModel):
+    """Fields common to every agent finding"""
+
+    model_config = ConfigDict(extra="ignore")
+
+    # Field holding the finding's human-readable text, and the one naming its kind
+    text_field: ClassVar[str] = "content"
+    label_field: ClassVar[str] = "type"
+
+    confidence: float = DEFAULT_CONFIDENCE
+
+    @field_validator("confidence", mode="before")
+    @classmethod
+    def _confidence(cls, value):
+        confidence = _to_confidence(value)
+        return DEFAULT_CONFIDENCE if confidence is None else confidence
+
+
+Severity = Literal["low", "medium", "high", "critical"]
+AlertSeverity = Literal["info", "low", "medium", "high", "critical"]
+
+
+def _severity_validator(default: str, allowed: Tuple[str, ...]):
+    def validate(cls, value):
+        severity = _choice(value, SEVERITY_ALIASES)
+        return severity if severity in allowed else default
+    return field_validator("severity", mode="before")(classmethod(validate))
+
+
+def _text_validator(*fields: str):
+    return field_validator(*fields, mode="before")(classmethod(lambda cls, value: _to_text(value)))
+
+
+class ParserFinding(AgentFinding):
+    type: str = "item"
+    content: str
+
+    _text = _text_validator("type", "content")
+
+
+class AnalyzerFinding(AgentFinding):
+    text_field: ClassVar[str] = "insight"
+    label_field: ClassVar[str] = "metric"
+
+    metric: str
+    value: Optional[float] = None
+    trend: Optional[Literal["up", "down", "stable"]] = None
+    insight: str = ""
+
+    _text = _text_validator("metric", "insight")
+
+    @field_validator("value", mode="before")
+    @classmethod
+    def _value(cls, value):
+        return _to_number(value)
+
+    @field_validator("trend", mode="before")
+    @classmethod
+    def _trend(cls, value):
+        trend = _choice(value, TREND_ALIASES)
+        return trend if trend in ("up", "down", "stable") else None
+
+
+class ComplianceFinding(AgentFinding):
+    text_field: ClassVar[str] = "details"
+    label_field: ClassVar[str] = "regulation"
+
+    regulation: str
+    status: Literal["compliant", "non-compliant", "unclear"] = "unclear"
+    details: str = ""
+    severity: Severity = "low"
+
+    _text = _text_validator("regulation", "details")
+    _severity = _severity_validator("low", ("low", "medium", "high", "critical"))
+
+    @field_validator("status", mode="before")
+    @classmethod
+    def _status(cls, value):
+        status = _choice(value, COMPLIANCE_STATUS_ALIASES)
+        return status if status in ("compliant", "non-compliant", "unclear") else "unclear"
+
+
+class FraudFinding(AgentFinding):
+    text_field: ClassVar[str] = "description"
+
+    type: str = "irregularity"
+    description: str
+    severity: Severity = "medium"
+    evidence: str = ""
+
+    _text = _text_validator("type", "description", "evidence")
+    _severity = _severity_validator("medium", ("low", "medium", "high", "critical"))
+
+
+class AlertFinding(AgentFinding):
+    text_field: ClassVar[str] = "message"
+    label_field: ClassVar[str] = "title"
+
+    title: str
+    message: str = ""
+    severity: AlertSeverity = "info"
+    actionRequired: Optional[str] = None
+    deadline: Optional[str] = None
+
+    _text = _text_validator("title", "message")
+    _severity = _severity_validator("info", ("info", "low", "medium", "high", "critical"))
+
+    @field_validator("actionRequired", "deadline", mode="before")
+    @classmethod
+    def _optional_text(cls, value):
+        return _to_text(value) or None
+
+    @model_validator(mode="after")
+    def _message(self):
+        if not self.message:
+            self.message = self.title
+        return self
+
+
+class InsightFinding(AgentFinding):
+    type: Literal["summary", "insight", "recommendation", "risk", "opportunity"] = "insight"
+    content: str
+    priority: Literal["low", "medium", "high"] = "medium"
+
+    _text = _text_validator("content")
+
+    @field_validator("type", mode="before")
+    @classmethod
+    def _type(cls, value):
+        kind = _choice(value, {"recommendations": "recommendation", "risks": "risk"})
+        return kind if kind in ("summary", "insight", "recommendation", "risk", "opportunity") else "insight"
+
+    @field_validator("priority", mode="before")
+    @classmethod
+    def _priority(cls, value):
+        priority = _choice(value, SEVERITY_ALIASES)
+        return {"critical": "high", "info": "low"}.get(priority, priority) if priority in (
+            "low", "medium", "high", "critical", "info"
+        ) else "medium"
+
+
+class AgentMetadata(BaseModel):
+    """Counters an agent reports about its own run; unknown keys are dropped"""
+
+    model_config = ConfigDict(extra="ignore")
+
+    @field_validator("*", mode="before")
+    @classmethod
+    def _count(cls, value):
+        number = _to_number(value)
+        return 0 if number is None else number
+
+
+class ParserMetadata(AgentMetadata):
+    tablesFound: int = 0
+    entitiesFound: int = 0
+
+
+class AnalyzerMetadata(AgentMetadata):
+    metricsCalculated: int = 0
+    trendsIdentified: int = 0
+
+
+class ComplianceMetadata(AgentMetadata):
+    regulationsChecked: int = 0
+    violationsFound: int = 0
+
+
+class FraudMetadata(AgentMetadata):
+    redFlagsFound: int = 0
+    riskScore: float = Field(default=0, ge=0, le=100)
+
+    @field_validator("riskScore", mode="before")
+    @classmethod
+    def _risk_score(cls, value):
+        number = _to_number(value)
+        if number is None:
+            return 0
+        if 0 < number <= 1 and "." in str(value):
+            number *= 100
+        return min(100.0, max(0.0, number))
+
+
+class AlertMetadata(AgentMetadata):
+    alertsGenerated: int = 0
+    criticalAlerts: int = 0
+
+
+class InsightMetadata(AgentMetadata):
+    insightsGenerated: int = 0
+    recommendationsCount: int = 0
+
+
+AGENT_SCHEMAS: Dict[str, Tuple[Type[AgentFinding], Type[AgentMetadata]]] = {
+    "parser": (ParserFinding, ParserMetadata),
+    "analyzer": (AnalyzerFinding, AnalyzerMetadata),
+    "compliance": (ComplianceFinding, ComplianceMetadata),
+    "fraud": (FraudFinding, FraudMetadata),
+    "alert": (AlertFinding, AlertMetadata),
+    "insight": (InsightFinding, InsightMetadata),
+}
+
+
+def finding_text(agent_type: str, finding: Dict[str, Any]) -> str:
+    """The human-readable text of a finding produced by agent_type"""
+    finding_cls = AGENT_SCHEMAS.get(agent_type, (AgentFinding, None))[0]
+    return str(finding.get(finding_cls.text_field) or "")
+
+
+def finding_label(agent_type: str, finding: Dict[str, Any]) -> str:
+    """What kind of finding it is (type, metric, regulation or alert title)"""
+    finding_cls = AGENT_SCHEMAS.get(agent_type, (AgentFinding, None))[0]
+    return str(finding.get(finding_cls.label_field) or "")
+
+
+def _load_json(raw: str, repairs: List[str]) -> Any:
+    """Parse JSON, stripping code fences and trailing text and fixing trailing commas"""
+    text = (raw or "").strip()
+    try:
+        return json.loads(text)
+    except ValueError:
+        pass
+
+    stripped = CODE_FENCE.sub("", text)
+    starts = [i for i in (stripped.find("{"), stripped.find("[")) if i >= 0]
+    if not starts:
+        raise AgentOutputError("Output contains no JSON object")
+    body = stripped[min(starts):]
+
+    decoder = json.JSONDecoder()
+    for candidate in (body, TRAILING_COMMA.sub(r"\1", body)):
+        try:
+            data, _ = decoder.raw_decode(candidate)
+        except ValueError:
+            continue
+        repairs.append("extracted JSON from surrounding text")
+        if candidate is not body:
+            repairs.append("removed trailing commas")
+        return data
+    raise AgentOutputError("Output is not valid JSON")
+
+
+def parse_agent_output(agent_type: str, raw: str) -> Tuple[Dict[str, Any], List[str]]:
+    """
+    Parse and validate an agent's raw output against its schema
+
+    Repairs locally rather than failing: surrounding text and code fences,
+    trailing commas, a bare findings list, a single finding object, plain
+    string findings, numbers and percentages given as strings, unknown
+    severities/statuses and missing confidence (inherited from the output's
+    overall confidence). Findings that still do not validate are dropped.
+
+    Args:
+        agent_type: Agent whose schema applies
+        raw: Completion text
+
+    Returns:
+        (output dict with typed, compact findings, list of repairs applied)
+
+    Raises:
+        AgentOutputError: if the output is not JSON, or it had findings and
+            none of them could be repaired
+    """
+    finding_cls, metadata_cls = AGENT_SCHEMAS[agent_type]
+    repairs: List[str] = []
+    data = _load_json(raw, repairs)
+
+    if isinstance(data, list):
+        data = {"findings": data}
+        repairs.append("wrapped bare findings list")
+    if not isinstance(data, dict):
+        raise AgentOutputError(f"Expected a JSON object, got {type(data).__name__}")
+
+    findings = data.get("findings", [])
+    if isinstance(findings, dict):
+        findings = [findings]
+        repairs.append("wrapped single finding")
+    elif not isinstance(findings, list):
+        findings = [] if findings is None else [findings]
+
+    overall = _to_confidence(data.get("confidence"))
+    valid = []
+    defaulted = dropped = 0
+    for finding in findings:
+        if isinstance(finding, str):
+            finding = {finding_cls.text_field: finding}
+            repairs.append("converted text finding")
+        if not isinstance(finding, dict):
+            dropped += 1
+            continue
+        if _to_confidence(finding.get("confidence")) is None:
+            finding = {**finding, "confidence": overall if overall is not None else DEFAULT_CONFIDENCE}
+            defaulted += 1
+        try:
+            valid.append(finding_cls.model_validate(finding).model_dump(exclude_none=True))
+        except ValidationError:
+            dropped += 1
+
+    if findings and not valid:
+        raise AgentOutputError(f"None of {len(findings)} {agent_type} findings match the schema")
+    if defaulted:
+        repairs.append(f"defaulted confidence on {defaulted} findings")
+    if dropped:
+        repairs.append(f"dropped {dropped} invalid findings")
+
+    metadata = data.get("metadata")
+    if not isinstance(metadata, dict):
+        metadata = {}
+    try:
+        metadata = metadata_cls.model_validate(metadata).model_dump()
+    except ValidationError:
+        metadata = metadata_cls().model_dump()
+        repairs.append("reset invalid metadata")
+
+    output = {
+        "findings": valid,
+        "confidence": overall if overall is not None else DEFAULT_CONFIDENCE,
+        "metadata": metadata,
+    }
+    return output, repairs
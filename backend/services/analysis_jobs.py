@@ -0,0 +1,462 @@
+"""
+Analysis Jobs - Background multi-agent analysis persisted on the Document model
+"""
+import asyncio
+import json
+import logging
+import os
+import socket
+import uuid
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Set
+
+from sqlalchemy import or_
+
+from config.database import SessionLocal
+from models.ai_usage import AIAgentLog, AGENT_CALL_OPERATION
+from models.document import Document, DocumentStatus
+from services.financial_extractor import upsert_financial_metrics
+from services.findings_store import record_findings
+from services.multi_agent_orchestrator import MultiAgentOrchestrator
+
+logger = logging.getLogger(__name__)
+
+ACTIVE_STATUSES = (DocumentStatus.PENDING, DocumentStatus.PROCESSING)
+
+
+class JobQueueFull(Exception):
+    """Raised when the analysis job queue is at capacity"""
+
+
+def build_analysis_logs(
+    organization_id: int,
+    file_name: str,
+    summary: Dict[str, Any],
+    agent_results: List[Dict[str, Any]],
+) -> List[AIAgentLog]:
+    """
+    Build AIAgentLog rows for a completed analysis
+
+    One row per agent carries that agent's actual token usage, latency and
+    the model that served it (in output_data);
+    the orchestrator row carries the run's total and is what plan usage counts.
+    Agents (or whole analyses) served from cache or reused from a previous
+    analysis are logged with zero tokens.
+    """
+    cache_hit = summary.get("cacheHit", False)
+    total_usage = summary.get("tokenUsage") or {}
+
+    entries = [
+        AIAgentLog(
+            organization_id=organization_id,
+            agent_type="multi_agent_orchestrator",
+            operation="document_analysis",
+            input_data=file_name,
+            output_data=str(summary.get("overallRisk", "")),
+            tokens_used=0 if cache_hit else total_usage.get("totalTokens"),
+            processing_time_ms=summary.get("executionTime", 0),
+            status="success",
+        )
+    ]
+
+    for agent_result in agent_results:
+        metadata = agent_result.get("metadata", {})
+        usage = metadata.get("tokenUsage") or {}
+        cached = cache_hit or metadata.get("cacheHit", False) or metadata.get("reused", False)
+        if "error" in metadata:
+            status = "timeout" if metadata.get("timedOut") else "error"
+        elif metadata.get("reused"):
+            status = "reused"
+        else:
+            status = "cached" if cached else "success"
+
+        entries.append(AIAgentLog(
+            organization_id=organization_id,
+            agent_type=agent_result.get("agentType", "unknown"),
+            operation=AGENT_CALL_OPERATION,
+            input_data=file_name,
+            output_data=json.dumps({
+                "findings": len(agent_result.get("findings", [])),
+                "promptTokens": 0 if cached else usage.get("promptTokens", 0),
+                "completionTokens": 0 if cached else usage.get("completionTokens", 0),
+                "calls": 0 if cached else usage.get("calls", 0),
+                "model": metadata.get("model"),
+                "modelFallback": metadata.get("modelFallback", False),
+            }),
+            tokens_used=0 if cached else usage.get("totalTokens", 0),
+            processing_time_ms=agent_result.get("processingTime", 0),
+            status=status,
+            error_message=metadata.get("error"),
+        ))
+
+    return entries
+
+
+def record_financial_metrics(
+    db,
+    file_name: str,
+    agent_results: List[Dict[str, Any]],
+    company_name: Optional[str] = None,
+) -> int:
+    """
+    Upsert FinancialMetrics rows from the analyzer's locally computed financials
+
+    The company defaults to the name detected in the document, then to the
+    file name without its extension. The caller commits.
+
+    Returns:
+        Number of fiscal years written
+    """
+    analyzer = next((r for r in agent_results if r.get("agentType") == "analyzer"), None)
+    financials = (analyzer or {}).get("metadata", {}).get("financials")
+    if not financials or not financials.get("periods"):
+        return 0
+
+    company = company_name or financials.get("companyName") or os.path.splitext(file_name)[0]
+    return len(upsert_financial_metrics(db, company, financials))
+
+
+class AnalysisJobQueue:
+    """
+    Bounded pool of workers running multi-agent analyses in the background
+
+    A job is a Document row. While the job is pending or processing, its
+    analysis_result holds {"job": request}, written once so that the request
+    survives a restart, and job_progress holds {"agentsCompleted": [...]}; on
+    completion analysis_result is replaced by the orchestrate() payload, and
+    on failure by {"error": message}.
+
+    A queue claims a job by setting job_owner to its worker_id and
+    job_lease_expires_at, in one conditional UPDATE, and renews the leases of
+    its jobs every heartbeat. Unfinished jobs with a stored request and no
+    owner or an expired lease are claimed and re-queued by start() and on
+    every heartbeat.
+    """
+
+    def __init__(
+        self,
+        orchestrator: MultiAgentOrchestrator,
+        workers: int = 2,
+        max_queued: int = 100,
+        lease_seconds: float = 300,
+        heartbeat_seconds: float = 60,
+    ):
+        self.orchestrator = orchestrator
+        self.workers = workers
+        self.max_queued = max_queued
+        self.lease_seconds = lease_seconds
+        self.heartbeat_seconds = heartbeat_seconds
+        self.worker_id = f"{socket.gethostname()[:40]}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks: List[asyncio.Task] = []
+        self._heartbeat_task: Optional[asyncio.Task] = None
+        # Jobs queued or running here, so recovery does not queue them twice
+        self._active: Set[int] = set()
+
+    @property
+    def running(self) -> bool:
+        return bool(self._tasks)
+
+    async def start(self):
+        """Start the workers and re-queue jobs interrupted by a restart"""
+        if self.running:
+            return
+        self._queue = asyncio.Queue()
+        self._tasks = [
+            asyncio.create_task(self._worker(i)) for i in range(self.workers)
+        ]
+
+        recovered = self._recover()
+        self._enqueue(recovered)
+        self._heartbeat_task = asyncio.create_task(self._heartbeat())
+        logger.info(
+            f"Analysis job queue {self.worker_id} started with {self.workers} workers, "
+            f"{len(recovered)} jobs re-queued"
+        )
+
+    async def stop(self):
+        """
+        Cancel the workers and release their leases; in-flight jobs stay
+        PROCESSING and are re-queued by the next queue to start
+        """
+        tasks = self._tasks + ([self._heartbeat_task] if self._heartbeat_task else [])
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._tasks = []
+        self._heartbeat_task = None
+        self._queue = None
+        self._active.clear()
+        self._update_leases({Document.job_owner: None, Document.job_lease_expires_at: None})
+
+    def _lease_expiry(self) -> datetime:
+        return datetime.utcnow() + timedelta(seconds=self.lease_seconds)
+
+    def _enqueue(self, document_ids: List[int]):
+        for document_id in document_ids:
+            self._active.add(document_id)
+            self._queue.put_nowait(document_id)
+
+    def _claim(self, db, document_id: int) -> bool:
+        """
+        Atomically take (or keep) an unfinished job unless another worker
+        holds an unexpired lease on it
+
+        Returns:
+            True if this queue now owns the job
+        """
+        claimed = db.query(Document).filter(
+            Document.id == document_id,
+            Document.status.in_(ACTIVE_STATUSES),
+            or_(
+                Document.job_owner.is_(None),
+                Document.job_owner == self.worker_id,
+                Document.job_lease_expires_at.is_(None),
+                Document.job_lease_expires_at < datetime.utcnow(),
+            ),
+        ).update(
+            {Document.job_owner: self.worker_id, Document.job_lease_expires_at: self._lease_expiry()},
+            synchronize_session=False,
+        )
+        db.commit()
+        return claimed == 1
+
+    def _update_leases(self, values: Dict[Any, Any]):
+        """Update the lease columns of the unfinished jobs this queue owns"""
+        db = SessionLocal()
+        try:
+            db.query(Document).filter(
+                Document.job_owner == self.worker_id,
+                Document.status.in_(ACTIVE_STATUSES),
+            ).update(values, synchronize_session=False)
+            db.commit()
+        finally:
+            db.close()
+
+    async def _heartbeat(self):
+        """Renew this queue's leases, then take over jobs whose lease has expired"""
+        while True:
+            await asyncio.sleep(self.heartbeat_seconds)
+            try:
+                self._update_leases({Document.job_lease_expires_at: self._lease_expiry()})
+                recovered = self._recover()
+                self._enqueue(recovered)
+                if recovered:
+                    logger.info(f"Analysis job queue {self.worker_id} took over {len(recovered)} jobs")
+            except Exception as e:
+                logger.error(f"Analysis job heartbeat failed: {str(e)}")
+
+    def submit(
+        self,
+        db,
+        organization_id: int,
+        user_id: str,
+        file_name: str,
+        content: str,
+        chunked: Optional[bool] = None,
+        timeout: Optional[float] = None,
+        company_name: Optional[str] = None,
+    ) -> Document:
+        """
+        Persist a PENDING Document for an analysis and queue it
+
+        Raises:
+            JobQueueFull: if max_queued jobs are already waiting
+            RuntimeError: if the queue has not been started
+        """
+        if self._queue is None:
+            raise RuntimeError("Analysis job queue is not running")
+        if self._queue.qsize() >= self.max_queued:
+            raise JobQueueFull(f"Analysis queue is full ({self.max_queued} jobs waiting)")
+
+        document = Document(
+            organization_id=organization_id,
+            user_id=user_id,
+            file_name=file_name,
+            file_type="text/plain",
+            file_size=len(content.encode("utf-8")),
+            status=DocumentStatus.PENDING,
+            analysis_result=json.dumps({
+                "job": {
+                    "content": content,
+                    "chunked": chunked,
+                    "timeout": timeout,
+                    "companyName": company_name,
+                },
+            }),
+            job_owner=self.worker_id,
+            job_lease_expires_at=self._lease_expiry(),
+            job_progress=json.dumps({"agentsCompleted": []}),
+        )
+        db.add(document)
+        db.commit()
+        db.refresh(document)
+
+        self._enqueue([document.id])
+        logger.info(f"Queued analysis job {document.id} for {file_name}")
+        return document
+
+    def status(self, document: Document) -> Dict[str, Any]:
+        """Public view of a job: status, progress, and result or error when finished"""
+        view: Dict[str, Any] = {
+            "jobId": document.id,
+            "fileName": document.file_name,
+            "status": document.status.value if document.status else None,
+            "riskScore": document.risk_score,
+            "createdAt": document.created_at.isoformat() if document.created_at else None,
+            "updatedAt": document.updated_at.isoformat() if document.updated_at else None,
+        }
+        if document.status in (DocumentStatus.COMPLETED, DocumentStatus.FAILED):
+            stored = json.loads(document.analysis_result) if document.analysis_result else {}
+            if document.status == DocumentStatus.COMPLETED:
+                view["result"] = stored
+            else:
+                view["error"] = stored.get("error")
+        else:
+            view["progress"] = json.loads(document.job_progress) if document.job_progress else {}
+            if self._queue is not None and document.status == DocumentStatus.PENDING:
+                view["queueDepth"] = self._queue.qsize()
+        return view
+
+    def _recover(self) -> List[int]:
+        """Claim unowned or lease-expired jobs; their ids, oldest first"""
+        db = SessionLocal()
+        try:
+            candidates = db.query(Document.id, Document.analysis_result).filter(
+                Document.status.in_(ACTIVE_STATUSES),
+                or_(
+                    Document.job_owner.is_(None),
+                    Document.job_lease_expires_at.is_(None),
+                    Document.job_lease_expires_at < datetime.utcnow(),
+                ),
+            ).order_by(Document.created_at).all()
+
+            recovered = []
+            for document_id, analysis_result in candidates:
+                if document_id in self._active:
+                    continue
+                try:
+                    stored = json.loads(analysis_result or "{}")
+                except ValueError:
+                    continue
+                if isinstance(stored, dict) and "job" in stored and self._claim(db, document_id):
+                    recovered.append(document_id)
+            return recovered
+        finally:
+            db.close()
+
+    async def _worker(self, worker_id: int):
+        while True:
+            document_id = await self._queue.get()
+            try:
+                await self._run(document_id)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Analysis worker {worker_id} failed on job {document_id}: {str(e)}")
+            finally:
+                self._active.discard(document_id)
+                self._queue.task_done()
+
+    async def _run(self, document_id: int):
+        db = SessionLocal()
+        try:
+            document = db.query(Document).filter(Document.id == document_id).first()
+            if document is None or document.status not in ACTIVE_STATUSES:
+                return
+            if not self._claim(db, document_id):
+                logger.info(f"Analysis job {document_id} is leased by another worker")
+                return
+
+            job = json.loads(document.analysis_result or "{}")["job"]
+            file_name = document.file_name
+            progress = {"agentsCompleted": []}
+            document.status = DocumentStatus.PROCESSING
+            document.job_progress = json.dumps(progress)
+            db.commit()
+
+            agent_results: List[Dict[str, Any]] = []
+            summary: Dict[str, Any] = {}
+            try:
+                async for event in self.orchestrator.orchestrate_stream(
+                    job["content"],
+                    file_name,
+                    chunked=job.get("chunked"),
+                    timeout=job.get("timeout"),
+                ):
+                    if event["event"] == "agent":
+                        agent_results.append(event["data"])
+                        progress["agentsCompleted"].append(event["data"]["agentType"])
+                        # Only the progress column is written; the request stays as stored
+                        db.query(Document).filter(Document.id == document_id).update(
+                            {Document.job_progress: json.dumps(progress)}, synchronize_session=False
+                        )
+                        db.commit()
+                    elif event["event"] == "complete":
+                        summary = event["data"]
+            except Exception as e:
+                logger.error(f"Analysis job {document_id} failed: {str(e)}")
+                if not self._still_owned(db, document):
+                    return
+                document.status = DocumentStatus.FAILED
+                document.analysis_result = json.dumps({"error": str(e)})
+                self._release(document)
+                db.add(AIAgentLog(
+                    organization_id=document.organization_id,
+                    agent_type="multi_agent_orchestrator",
+                    operation="document_analysis",
+                    input_data=document.file_name,
+                    status="error",
+                    error_message=str(e),
+                ))
+                db.commit()
+                return
+
+            order = list(self.orchestrator.agents)
+            agent_results.sort(
+                key=lambda r: order.index(r["agentType"]) if r["agentType"] in order else len(order)
+            )
+            result = {**summary, "agentResults": agent_results}
+
+            fraud = next((r for r in agent_results if r["agentType"] == "fraud"), None)
+            risk_score = (fraud or {}).get("metadata", {}).get("riskScore")
+
+            if not self._still_owned(db, document):
+                return
+            document.status = DocumentStatus.COMPLETED
+            document.analysis_result = json.dumps(result, default=str)
+            document.risk_score = risk_score if isinstance(risk_score, (int, float)) else None
+            self._release(document)
+            db.add_all(build_analysis_logs(
+                document.organization_id, document.file_name, summary, agent_results
+            ))
+            record_financial_metrics(
+                db, document.file_name, agent_results, job.get("companyName")
+            )
+            record_findings(
+                db,
+                document.organization_id,
+                document.file_name,
+                agent_results,
+                document_id=document.id,
+            )
+            db.commit()
+            logger.info(f"Analysis job {document_id} completed")
+        finally:
+            db.close()
+
+    def _still_owned(self, db, document: Document) -> bool:
+        """False (and logged) if the job's lease was taken over while it ran"""
+        db.refresh(document)
+        if document.job_owner == self.worker_id:
+            return True
+        logger.warning(
+            f"Analysis job {document.id} was taken over by {document.job_owner}; discarding this run"
+        )
+        return False
+
+    @staticmethod
+    def _release(document: Document):
+        document.job_owner = None
+        document.job_lease_expires_at = None
+        document.job_progress = None
@@ -0,0 +1,99 @@
+"""
+Document Chunker - Splits large financial documents into token-bounded chunks
+"""
+import re
+from dataclasses import dataclass
+from typing import List, Optional
+
+from services.token_counter import count_tokens, split_by_tokens
+
+PARAGRAPH_SPLIT = re.compile(r"\n\s*\n")
+
+
+@dataclass
+class DocumentChunk:
+    """A contiguous piece of a document sized for a single agent prompt"""
+
+    index: int
+    text: str
+    tokens: int
+
+
+def chunk_document(
+    content: str,
+    max_tokens: int = 1000,
+    overlap_tokens: int = 100,
+    model: Optional[str] = None,
+) -> List[DocumentChunk]:
+    """
+    Split a document into chunks of at most max_tokens tokens
+
+    Paragraph boundaries are preserved where possible; paragraphs larger than
+    the budget are split by line and then hard-split by token count. Trailing
+    paragraphs of each chunk are repeated at the start of the next chunk (up to
+    overlap_tokens) so findings spanning a boundary are not lost.
+
+    Args:
+        content: Full document text
+        max_tokens: Token budget per chunk
+        overlap_tokens: Tokens of context carried over between chunks
+        model: Model whose tokenizer should be used for counting
+
+    Returns:
+        Ordered list of chunks
+    """
+    pieces = []
+    for paragraph in PARAGRAPH_SPLIT.split(content):
+        paragraph = paragraph.strip()
+        if not paragraph:
+            continue
+        tokens = count_tokens(paragraph, model)
+        if tokens <= max_tokens:
+            pieces.append((paragraph, tokens))
+            continue
+        for line in paragraph.splitlines():
+            line = line.strip()
+            if not line:
+                continue
+            line_tokens = count_tokens(line, model)
+            if line_tokens <= max_tokens:
+                pieces.append((line, line_tokens))
+            else:
+                for part in split_by_tokens(line, max_tokens, model):
+                    pieces.append((part, count_tokens(part, model)))
+
+    chunks: List[DocumentChunk] = []
+    current: List[tuple] = []
+    current_tokens = 0
+
+    def flush():
+        chunks.append(
+            DocumentChunk(
+                index=len(chunks),
+                text="\n\n".join(text for text, _ in current),
+                tokens=current_tokens,
+            )
+        )
+
+    for text, tokens in pieces:
+        if current and current_tokens + tokens > max_tokens:
+            flush()
+            # Carry trailing paragraphs over as overlap
+            carried: List[tuple] = []
+            carried_tokens = 0
+            for prev_text, prev_tokens in reversed(current):
+                if carried_tokens + prev_tokens > overlap_tokens:
+                    break
+                carried.insert(0, (prev_text, prev_tokens))
+                carried_tokens += prev_tokens
+            if carried_tokens + tokens > max_tokens:
+                carried, carried_tokens = [], 0
+            current, current_tokens = carried, carried_tokens
+
+        current.append((text, tokens))
+        current_tokens += tokens
+
+    if current:
+        flush()
+
+    return chunks
@@ -0,0 +1,184 @@
+"""
+Document Sectionizer - Splits financial filings into headed sections
+"""
+import hashlib
+import re
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, List, Optional
+
+PREAMBLE = "preamble"
+OTHER = "other"
+
+# Canonical section name -> heading pattern (matched against the whole heading line)
+SECTION_PATTERNS = [
+    ("balance_sheet", r"(?:consolidated )?(?:balance sheets?|statements? of financial (?:position|condition))"),
+    ("income_statement", r"(?:consolidated )?(?:income statements?|statements? of (?:comprehensive )?(?:income|operations|earnings)|profit (?:and|&) loss(?: statement| account)?)"),
+    ("cash_flow", r"(?:consolidated )?(?:cash ?flows? statements?|statements? of cash ?flows?)"),
+    ("equity", r"(?:consolidated )?statements? of (?:changes in )?(?:shareholders'?|stockholders'?) equity"),
+    ("notes", r"notes(?: to (?:the )?(?:consolidated )?financial statements)?"),
+    ("mdna", r"md&a|management'?s discussion (?:and|&) analysis.*"),
+    ("risk_factors", r"risk factors|(?:potential |key )?(?:concerns|risks)"),
+    ("auditor_report", r"(?:independent )?auditor'?s'? report|report of independent registered public accounting firm"),
+]
+
+_COMPILED_PATTERNS = [
+    (name, re.compile(pattern, re.IGNORECASE)) for name, pattern in SECTION_PATTERNS
+]
+# "Item 7.", "7)", "Part II -" style prefixes and trailing qualifiers
+_HEADING_PREFIX = re.compile(r"^(?:part\s+[ivx]+\s*[-:.]?\s*)?(?:item\s+\d+[a-z]?\s*[-:.]?\s*|\d+[.)]\s*)?", re.IGNORECASE)
+_HEADING_SUFFIX = re.compile(r"\s*(?:\([^)]*\)|-\s*continued)?\s*:?\s*$", re.IGNORECASE)
+
+MAX_HEADING_LENGTH = 120
+MAX_GENERIC_HEADING_WORDS = 8
+
+
+@dataclass
+class DocumentSection:
+    """A headed span of a document"""
+
+    name: str
+    heading: str
+    text: str
+
+
+def classify_heading(line: str) -> Optional[str]:
+    """
+    Classify a line as a section heading
+
+    Args:
+        line: A single line of the document
+
+    Returns:
+        Canonical section name, OTHER for unrecognised all-caps headings,
+        or None if the line is not a heading
+    """
+    stripped = line.strip().lstrip("#").strip()
+    if not stripped or len(stripped) > MAX_HEADING_LENGTH:
+        return None
+
+    core = _HEADING_SUFFIX.sub("", _HEADING_PREFIX.sub("", stripped)).strip()
+    if not core:
+        return None
+
+    for name, pattern in _COMPILED_PATTERNS:
+        if pattern.fullmatch(core):
+            return name
+
+    letters = [c for c in core if c.isalpha()]
+    if (
+        len(letters) >= 3
+        and core.upper() == core
+        and len(core.split()) <= MAX_GENERIC_HEADING_WORDS
+        and not core.startswith("-")
+    ):
+        return OTHER
+
+    return None
+
+
+def sectionize(content: str) -> List[DocumentSection]:
+    """
+    Split a document into sections using heading detection
+
+    Text before the first recognised section (cover page, title, company name)
+    is returned as the PREAMBLE section. Unrecognised all-caps headings are
+    treated as subheadings and stay in the open section, e.g. "ASSETS" and
+    "LIABILITIES AND EQUITY" within a balance sheet.
+
+    Args:
+        content: Full document text
+
+    Returns:
+        Sections in document order
+    """
+    sections: List[DocumentSection] = []
+    name, heading, lines = PREAMBLE, "", []
+
+    for line in content.splitlines():
+        section_name = classify_heading(line)
+        if section_name is None or section_name == OTHER:
+            lines.append(line)
+            continue
+
+        if lines or heading:
+            sections.append(DocumentSection(name, heading, "\n".join(lines).strip()))
+        name, heading, lines = section_name, line.strip(), []
+
+    if lines or heading:
+        sections.append(DocumentSection(name, heading, "\n".join(lines).strip()))
+
+    return sections
+
+
+def select_sections(
+    sections: List[DocumentSection], names: Iterable[str]
+) -> str:
+    """
+    Join the text of the requested sections, keeping their headings
+
+    Args:
+        sections: Output of sectionize()
+        names: Canonical section names to keep
+
+    Returns:
+        Selected text in document order (empty if nothing matched)
+    """
+    wanted = set(names)
+    parts = []
+    for section in sections:
+        if section.name not in wanted:
+            continue
+        parts.append(f"{section.heading}\n{section.text}" if section.heading else section.text)
+    return "\n\n".join(part for part in parts if part.strip())
+
+
+def fingerprint(content: str) -> Dict[str, Any]:
+    """
+    Per-section content hashes used to diff document versions
+
+    Sections are keyed by canonical name, and repeated sections are combined
+    in document order.
+
+    Returns:
+        {"chars": int, "sections": {key: {"hash": str, "chars": int}}}
+    """
+    texts: Dict[str, List[str]] = {}
+    for section in sectionize(content):
+        texts.setdefault(section.name, []).append(section.text)
+
+    sections = {}
+    for key, parts in texts.items():
+        text = "\n\n".join(parts)
+        sections[key] = {
+            "hash": hashlib.sha256(text.encode("utf-8", errors="replace")).hexdigest()[:16],
+            "chars": len(text),
+        }
+    return {"chars": len(content), "sections": sections}
+
+
+def diff_fingerprints(
+    previous: Optional[Dict[str, Any]], current: Dict[str, Any]
+) -> Dict[str, Any]:
+    """
+    Section-level delta between two fingerprint() results
+
+    Returns:
+        Added, removed, changed and unchanged section keys, with the character
+        change per changed section. A missing previous fingerprint reports
+        every section as added.
+    """
+    old = (previous or {}).get("sections", {})
+    new = current.get("sections", {})
+    changed = {
+        key: new[key]["chars"] - old[key]["chars"]
+        for key in new
+        if key in old and old[key]["hash"] != new[key]["hash"]
+    }
+    return {
+        "sectionsAdded": [key for key in new if key not in old],
+        "sectionsRemoved": [key for key in old if key not in new],
+        "sectionsChanged": changed,
+        "sectionsUnchanged": [key for key in new if key in old and key not in changed],
+        "charsBefore": (previous or {}).get("chars"),
+        "charsAfter": current.get("chars"),
+    }
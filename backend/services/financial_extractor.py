@@ -0,0 +1,475 @@
+"""
+Financial Extractor - Local statement line-item extraction and KPI computation
+"""
+import re
+from datetime import datetime
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from models.financial_metrics import FinancialMetrics
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+# "Label: value", "Label ..... value" or column-aligned "Label    value    value"
+LINE_ITEM_PATTERN = re.compile(
+    r"^[\s\-•*·]*(?P<label>[A-Za-z][A-Za-z&'’/,()\-. ]*?)\s*(?::|\.{2,}|\s{2,}|\t|\|)\s*(?P<values>.+?)\s*\|?$"
+)
+
+# One amount: $1,234.56  (450,000)  -2.5M  ₹ 1,23,45,678  Rs. 12 crore  3.1 bn
+VALUE_PATTERN = re.compile(
+    r"(?P<open>\()?\s*(?P<sign>[-−])?\s*"
+    r"(?:(?P<symbol>[$€£₹¥])|(?P<code>USD|EUR|GBP|INR|Rs\.?)\s?)?"
+    r"\s?(?P<number>\d{1,3}(?:,\d{2,3})+(?:\.\d+)?|\d+(?:\.\d+)?)"
+    r"(?:\s?(?P<unit>thousand|million|billion|lakhs?|lacs?|crores?|cr\.?|mn|bn|[KMB])(?![A-Za-z]))?"
+    r"\s*(?P<close>\))?",
+    re.IGNORECASE,
+)
+
+# Document-level scale, e.g. "(in millions)" or "(₹ in crores)"
+SCALE_PATTERN = re.compile(
+    r"\bin\s+(?:[$€£₹¥]\s*|(?:usd|eur|gbp|inr|rs\.?)\s+)?"
+    r"(?P<unit>thousands|millions|billions|lakhs|lacs|crores)\b",
+    re.IGNORECASE,
+)
+
+# A column header made only of years: "2024    2023" or "FY2024 | FY2023"
+PERIOD_HEADER = re.compile(r"^[\s|]*(?:(?:FY\s?)?(?:19|20)\d{2}[\s|]*){1,6}$", re.IGNORECASE)
+YEAR_PATTERN = re.compile(r"(?<!\d)(?:19|20)\d{2}(?!\d)")
+
+# Reporting period markers, checked against the document heading in order
+PERIOD_MARKERS = (
+    ("annual", re.compile(
+        r"\b(?:annual report|10-K|(?:fiscal )?year ended|twelve months ended)\b", re.IGNORECASE
+    )),
+    ("nine_months", re.compile(r"\b(?:nine|9) months ended\b", re.IGNORECASE)),
+    ("half_year", re.compile(r"\b(?:H[12]|half[- ]year(?:ly)?|(?:six|6) months ended)\b", re.IGNORECASE)),
+    ("quarter", re.compile(
+        r"\b(?:Q[1-4]|quarter(?:ly)?|10-Q|(?:three|3) months ended)\b", re.IGNORECASE
+    )),
+)
+# The fiscal period named in a marker line: "Q4", "fourth quarter", "H1"
+FISCAL_PERIOD_PATTERNS = {
+    "quarter": re.compile(r"\bQ(?P<number>[1-4])\b|\b(?P<ordinal>first|second|third|fourth) quarter\b", re.IGNORECASE),
+    "half_year": re.compile(r"\bH(?P<number>[12])\b", re.IGNORECASE),
+}
+QUARTER_ORDINALS = {"first": 1, "second": 2, "third": 3, "fourth": 4}
+# Non-empty lines at the top of a document searched for a period marker
+HEADING_LINES = 10
+# Periods per year; income-based ratios of shorter periods are annualized
+PERIODS_PER_YEAR = {"annual": 1.0, "half_year": 2.0, "nine_months": 4 / 3, "quarter": 4.0}
+
+COMPANY_PATTERN = re.compile(
+    r"^[A-Z][\w&.,' -]{1,80}?\b(?:Corporation|Corp\.?|Inc\.?|Incorporated|Ltd\.?|Limited|LLC|PLC|plc|Company|Co\.)$"
+)
+
+UNIT_MULTIPLIERS = {
+    "k": 1e3,
+    "thousand": 1e3,
+    "thousands": 1e3,
+    "m": 1e6,
+    "mn": 1e6,
+    "million": 1e6,
+    "millions": 1e6,
+    "b": 1e9,
+    "bn": 1e9,
+    "billion": 1e9,
+    "billions": 1e9,
+    "lakh": 1e5,
+    "lakhs": 1e5,
+    "lac": 1e5,
+    "lacs": 1e5,
+    "crore": 1e7,
+    "crores": 1e7,
+    "cr": 1e7,
+    "cr.": 1e7,
+}
+
+CURRENCY_CODES = {
+    "$": "USD",
+    "€": "EUR",
+    "£": "GBP",
+    "₹": "INR",
+    "¥": "JPY",
+    "usd": "USD",
+    "eur": "EUR",
+    "gbp": "GBP",
+    "inr": "INR",
+    "rs": "INR",
+    "rs.": "INR",
+}
+
+# Canonical line items and the (normalized) labels they appear under
+LINE_ITEMS = {
+    "revenue": (
+        "revenue", "revenues", "total revenue", "total revenues", "net revenue",
+        "net revenues", "net sales", "sales", "turnover", "revenue from operations",
+    ),
+    "costOfRevenue": ("cost of goods sold", "cost of sales", "cost of revenue", "cogs"),
+    "grossProfit": ("gross profit",),
+    "operatingIncome": ("operating income", "operating profit", "income from operations", "ebit"),
+    "interestExpense": ("interest expense", "finance costs", "finance cost"),
+    "netIncome": (
+        "net income", "net profit", "net earnings", "profit after tax", "pat",
+        "profit for the year", "profit for the period",
+    ),
+    "cash": ("cash", "cash and cash equivalents", "cash and equivalents"),
+    "receivables": ("accounts receivable", "trade receivables", "receivables"),
+    "inventory": ("inventory", "inventories"),
+    "currentAssets": ("current assets", "total current assets"),
+    "totalAssets": ("total assets",),
+    "accountsPayable": ("accounts payable", "trade payables"),
+    "shortTermDebt": ("short term debt", "short term borrowings", "current portion of long term debt"),
+    "longTermDebt": ("long term debt", "long term borrowings"),
+    "currentLiabilities": ("current liabilities", "total current liabilities"),
+    "totalLiabilities": ("total liabilities",),
+    "equity": (
+        "equity", "total equity", "shareholders equity", "stockholders equity",
+        "total shareholders equity", "total stockholders equity", "net worth",
+    ),
+    "operatingCashFlow": (
+        "operating activities", "net cash from operating activities",
+        "net cash provided by operating activities", "cash flow from operations",
+        "cash from operations",
+    ),
+    "netCashFlow": ("net cash flow", "net change in cash", "net increase in cash"),
+}
+LABEL_TO_ITEM = {label: item for item, labels in LINE_ITEMS.items() for label in labels}
+
+# Ratio name -> (label, format) for prompts
+RATIO_LABELS = {
+    "roe": ("ROE", "percent"),
+    "roi": ("ROI (net income / total assets)", "percent"),
+    "debtToEquity": ("Debt-to-equity (total liabilities / equity)", "ratio"),
+    "currentRatio": ("Current ratio", "ratio"),
+    "grossMargin": ("Gross margin", "percent"),
+    "operatingMargin": ("Operating margin", "percent"),
+    "netMargin": ("Net margin", "percent"),
+    "interestCoverage": ("Interest coverage", "ratio"),
+    "revenueGrowth": ("Revenue growth vs prior period", "percent"),
+}
+# Ratios of period income to balances, annualized for non-annual periods
+ANNUALIZED_RATIOS = ("roe", "roi")
+
+MAX_PERIODS = 6
+
+
+def _normalize_label(label: str) -> str:
+    label = re.sub(r"\(.*?\)", " ", label.lower().replace("&", " and "))
+    label = label.replace("'", "").replace("’", "")
+    return re.sub(r"[^a-z0-9]+", " ", label).strip()
+
+
+def parse_values(text: str, scale: float = 1.0) -> Optional[List[float]]:
+    """
+    Parse the value cells of a line item
+
+    Parentheses and leading minus signs are negatives; K/M/B, thousand/
+    million/billion and lakh/crore units are expanded, and values without a
+    unit are multiplied by the document-level scale.
+
+    Returns:
+        Amounts in column order, or None if text is not purely amounts
+        (prose, percentages, dates)
+    """
+    if "%" in text or VALUE_PATTERN.sub("", text).strip(" \t|-—–"):
+        return None
+
+    values = []
+    for match in VALUE_PATTERN.finditer(text):
+        value = float(match.group("number").replace(",", ""))
+        unit = (match.group("unit") or "").lower()
+        value *= UNIT_MULTIPLIERS[unit] if unit else scale
+        if match.group("sign") or (match.group("open") and match.group("close")):
+            value = -value
+        values.append(value)
+    return values or None
+
+
+def _currency(content: str) -> Optional[str]:
+    for match in VALUE_PATTERN.finditer(content):
+        marker = match.group("symbol") or match.group("code")
+        if marker:
+            return CURRENCY_CODES.get(marker.lower(), CURRENCY_CODES.get(marker))
+    return None
+
+
+def _company_name(lines: List[str]) -> Optional[str]:
+    for line in lines[:20]:
+        stripped = line.strip()
+        if COMPANY_PATTERN.match(stripped):
+            return stripped
+    return None
+
+
+def detect_period(lines: List[str]) -> Tuple[str, Optional[str]]:
+    """
+    The reporting period of a document from the markers in its heading
+
+    Returns:
+        (period type, a PERIODS_PER_YEAR key; fiscal period such as "Q4" or
+        "H1", or None), ("annual", None) without a marker
+    """
+    heading = [line for line in lines if line.strip()][:HEADING_LINES]
+    for line in heading:
+        for period_type, pattern in PERIOD_MARKERS:
+            if not pattern.search(line):
+                continue
+            label = None
+            named = FISCAL_PERIOD_PATTERNS.get(period_type)
+            match = named.search(line) if named else None
+            if match:
+                number = match.group("number") or QUARTER_ORDINALS[match.group("ordinal").lower()]
+                label = f"{period_type[0].upper()}{number}"
+            return period_type, label
+    return "annual", None
+
+
+def extract_line_items(content: str) -> Dict[str, Any]:
+    """
+    Extract statement line items from document text
+
+    The first occurrence of each canonical line item wins. A header made only
+    of years labels the value columns that follow it; otherwise the first
+    column is the document's fiscal year and later columns are prior years.
+    Non-annual documents (see detect_period) without such a header keep only
+    the first column, since their other columns may be earlier quarters.
+
+    Returns:
+        {"periods": [fiscal year of each column], "items": {item: [values]},
+         "periodType", "fiscalPeriod", "currency", "unitScale", "companyName"}
+    """
+    lines = content.splitlines()
+    scale_match = SCALE_PATTERN.search(content)
+    scale_unit = scale_match.group("unit").lower() if scale_match else None
+    scale = UNIT_MULTIPLIERS[scale_unit] if scale_unit else 1.0
+
+    year_match = YEAR_PATTERN.search(content)
+    document_year = int(year_match.group()) if year_match else datetime.utcnow().year
+    period_type, fiscal_period = detect_period(lines)
+    periods: List[int] = [document_year - i for i in range(MAX_PERIODS if period_type == "annual" else 1)]
+
+    items: Dict[str, List[float]] = {}
+    for line in lines:
+        if PERIOD_HEADER.match(line):
+            header_years = [int(year) for year in YEAR_PATTERN.findall(line)]
+            if header_years and len(set(header_years)) == len(header_years):
+                periods = header_years
+            continue
+
+        match = LINE_ITEM_PATTERN.match(line)
+        if not match:
+            continue
+        item = LABEL_TO_ITEM.get(_normalize_label(match.group("label")))
+        if item is None or item in items:
+            continue
+        values = parse_values(match.group("values"), scale)
+        if values:
+            items[item] = values[:len(periods)]
+
+    return {
+        "periods": periods,
+        "items": items,
+        "periodType": period_type,
+        "fiscalPeriod": fiscal_period,
+        "currency": _currency(content),
+        "unitScale": scale_unit,
+        "companyName": _company_name(lines),
+    }
+
+
+def _ratio(numerator: "pd.Series", denominator: "pd.Series") -> "pd.Series":
+    return (numerator / denominator).replace([np.inf, -np.inf], np.nan)
+
+
+def compute_ratios(
+    statements: "pd.DataFrame", periods_per_year: float = 1.0
+) -> Tuple["pd.DataFrame", "pd.DataFrame", List[str]]:
+    """
+    Fill derivable line items and compute standard ratios for every period
+
+    Args:
+        statements: One row per fiscal year (newest first), one column per
+            LINE_ITEMS key; missing items are NaN
+        periods_per_year: Annualizes ANNUALIZED_RATIOS of shorter periods
+
+    Returns:
+        (statements with derived items filled, ratios frame, names of derived items)
+    """
+    df = statements.reindex(columns=list(LINE_ITEMS)).astype(np.float64)
+    derived = []
+
+    def fill(item: str, values: "pd.Series"):
+        missing = df[item].isna() & values.notna()
+        if missing.any():
+            df.loc[missing, item] = values[missing]
+            derived.append(item)
+
+    fill("grossProfit", df["revenue"] - df["costOfRevenue"])
+    fill("currentAssets", df[["cash", "receivables", "inventory"]].sum(axis=1, min_count=2))
+    fill("currentLiabilities", df[["accountsPayable", "shortTermDebt"]].sum(axis=1, min_count=1))
+    fill("equity", df["totalAssets"] - df["totalLiabilities"])
+    fill("totalLiabilities", df["totalAssets"] - df["equity"])
+
+    ratios = df[[]].copy()
+    ratios["roe"] = _ratio(df["netIncome"], df["equity"])
+    ratios["roi"] = _ratio(df["netIncome"], df["totalAssets"])
+    ratios["debtToEquity"] = _ratio(df["totalLiabilities"], df["equity"])
+    ratios["currentRatio"] = _ratio(df["currentAssets"], df["currentLiabilities"])
+    ratios["grossMargin"] = _ratio(df["grossProfit"], df["revenue"])
+    ratios["operatingMargin"] = _ratio(df["operatingIncome"], df["revenue"])
+    ratios["netMargin"] = _ratio(df["netIncome"], df["revenue"])
+    ratios["interestCoverage"] = _ratio(df["operatingIncome"], df["interestExpense"])
+    # Periods are newest first, so growth compares each row with the next one
+    ratios["revenueGrowth"] = _ratio(df["revenue"] - df["revenue"].shift(-1), df["revenue"].shift(-1).abs())
+    ratios[list(ANNUALIZED_RATIOS)] *= periods_per_year
+    return df, ratios, derived
+
+
+def _clean(values: Dict[str, Any], digits: int) -> Dict[str, float]:
+    return {key: round(float(value), digits) for key, value in values.items() if not np.isnan(value)}
+
+
+def extract_financials(content: str) -> Dict[str, Any]:
+    """
+    Extract line items and compute KPIs from a financial document
+
+    Args:
+        content: Full document text
+
+    Returns:
+        JSON-serializable summary with one entry per fiscal year (newest
+        first) carrying its lineItems and ratios, and the periodType and
+        fiscalPeriod the figures cover
+    """
+    extracted = extract_line_items(content)
+    items = extracted["items"]
+    summary: Dict[str, Any] = {
+        "companyName": extracted["companyName"],
+        "periodType": extracted["periodType"],
+        "fiscalPeriod": extracted["fiscalPeriod"],
+        "currency": extracted["currency"],
+        "unitScale": extracted["unitScale"],
+        "itemsFound": len(items),
+        "derivedItems": [],
+        "periods": [],
+    }
+    if not items:
+        return summary
+
+    width = max(len(values) for values in items.values())
+    years = extracted["periods"][:width]
+    # Imported here so that pandas is not loaded at application startup
+    import pandas as pd
+
+    statements = pd.DataFrame(
+        {item: values + [np.nan] * (width - len(values)) for item, values in items.items()},
+        index=years,
+    ).sort_index(ascending=False)
+    years = list(statements.index)
+    statements, ratios, derived = compute_ratios(statements, PERIODS_PER_YEAR[extracted["periodType"]])
+
+    summary["derivedItems"] = derived
+    summary["periods"] = [
+        {
+            "fiscalYear": int(year),
+            "lineItems": _clean(statements.loc[year].to_dict(), 2),
+            "ratios": _clean(ratios.loc[year].to_dict(), 4),
+        }
+        for year in years
+    ]
+    return summary
+
+
+def _format_amount(value: float) -> str:
+    return f"({abs(value):,.0f})" if value < 0 else f"{value:,.0f}"
+
+
+def _period_label(summary: Dict[str, Any], fiscal_year: int) -> str:
+    period_type = summary.get("periodType", "annual")
+    if period_type == "annual":
+        return f"FY{fiscal_year}"
+    return f"{summary.get('fiscalPeriod') or period_type.replace('_', ' ')} {fiscal_year}"
+
+
+def format_summary(summary: Dict[str, Any]) -> str:
+    """Render a compact, prompt-ready text version of an extract_financials() summary"""
+    lines = []
+    if summary.get("periodType", "annual") != "annual":
+        lines.append(
+            f"- Reporting period: {summary['periodType'].replace('_', ' ')} "
+            f"(ROE and ROI annualized)"
+        )
+    if summary.get("currency"):
+        lines.append(f"- Currency: {summary['currency']} (amounts in units)")
+    if summary.get("derivedItems"):
+        lines.append(f"- Derived from other line items: {', '.join(summary['derivedItems'])}")
+
+    for period in summary.get("periods", []):
+        items = "; ".join(
+            f"{item} {_format_amount(value)}" for item, value in period["lineItems"].items()
+        )
+        ratios = []
+        for name, value in period["ratios"].items():
+            label, kind = RATIO_LABELS[name]
+            ratios.append(f"{label} {value:.1%}" if kind == "percent" else f"{label} {value:.2f}")
+        label = _period_label(summary, period["fiscalYear"])
+        lines.append(f"- {label} line items: {items}")
+        if ratios:
+            lines.append(f"- {label} ratios: {'; '.join(ratios)}")
+    return "\n".join(lines)
+
+
+# FinancialMetrics column -> (summary section, key), first available wins
+METRIC_COLUMNS = {
+    "revenue": (("lineItems", "revenue"),),
+    "profit": (("lineItems", "netIncome"),),
+    "assets": (("lineItems", "totalAssets"),),
+    "liabilities": (("lineItems", "totalLiabilities"),),
+    "equity": (("lineItems", "equity"),),
+    "cash_flow": (("lineItems", "netCashFlow"), ("lineItems", "operatingCashFlow")),
+    "roe": (("ratios", "roe"),),
+    "roi": (("ratios", "roi"),),
+    "debt_to_equity": (("ratios", "debtToEquity"),),
+    "current_ratio": (("ratios", "currentRatio"),),
+}
+
+
+def upsert_financial_metrics(
+    db, company_name: str, summary: Dict[str, Any]
+) -> List[FinancialMetrics]:
+    """
+    Insert or update one FinancialMetrics row per fiscal year in a summary
+
+    FinancialMetrics holds annual figures, so summaries of shorter periods
+    (quarters, half years) are not stored. Existing values are only
+    overwritten by values found in this summary; the caller commits.
+
+    Returns:
+        The inserted or updated rows
+    """
+    rows = []
+    if summary.get("periodType", "annual") != "annual":
+        return rows
+    for period in summary.get("periods", []):
+        values = {}
+        for column, sources in METRIC_COLUMNS.items():
+            for section, key in sources:
+                if key in period[section]:
+                    values[column] = period[section][key]
+                    break
+        if not values:
+            continue
+
+        row = db.query(FinancialMetrics).filter(
+            FinancialMetrics.company_name == company_name,
+            FinancialMetrics.fiscal_year == period["fiscalYear"],
+        ).first()
+        if row is None:
+            row = FinancialMetrics(company_name=company_name, fiscal_year=period["fiscalYear"])
+            db.add(row)
+        for column, value in values.items():
+            setattr(row, column, value)
+        rows.append(row)
+    return rows
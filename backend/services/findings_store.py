@@ -0,0 +1,269 @@
+"""
+Findings Store - Normalized agent findings for cross-document queries
+"""
+import math
+from array import array
+from collections import defaultdict
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy.orm import Query, Session
+
+from models.finding import AnalysisFinding
+from services.agent_schemas import finding_label, finding_text
+from services.result_cache import content_hash, make_cache_key
+
+# Severities in ascending order; the index is the compact severity code
+SEVERITIES = ("info", "low", "medium", "high", "critical")
+SEVERITY_CODES = {severity: code for code, severity in enumerate(SEVERITIES)}
+
+# Rows fetched per round trip when streaming findings into memory
+AGGREGATE_BATCH_SIZE = 5000
+# Documents listed in a summary's topDocuments
+TOP_DOCUMENTS = 10
+
+
+@dataclass
+class FindingFilter:
+    """Filters shared by the findings list and summary queries"""
+
+    organization_id: int
+    agent_type: Optional[str] = None
+    severities: Optional[List[str]] = None
+    finding_type: Optional[str] = None
+    min_confidence: Optional[float] = None
+    document_id: Optional[int] = None
+    since: Optional[datetime] = None
+    until: Optional[datetime] = None
+
+    def apply(self, query: Query) -> Query:
+        query = query.filter(AnalysisFinding.organization_id == self.organization_id)
+        if self.agent_type:
+            query = query.filter(AnalysisFinding.agent_type == self.agent_type)
+        if self.severities:
+            query = query.filter(AnalysisFinding.severity.in_(self.severities))
+        if self.finding_type:
+            query = query.filter(AnalysisFinding.finding_type == self.finding_type)
+        if self.min_confidence is not None:
+            query = query.filter(AnalysisFinding.confidence >= self.min_confidence)
+        if self.document_id is not None:
+            query = query.filter(AnalysisFinding.document_id == self.document_id)
+        if self.since:
+            query = query.filter(AnalysisFinding.created_at >= self.since)
+        if self.until:
+            query = query.filter(AnalysisFinding.created_at < self.until)
+        return query
+
+
+def analysis_key(file_name: str, content: str) -> str:
+    """Stable identity of an analysis without a Document row: file name and content hash"""
+    return make_cache_key(file_name, content_hash(content))
+
+
+def build_findings(
+    organization_id: int,
+    file_name: str,
+    agent_results: List[Dict[str, Any]],
+    document_id: Optional[int] = None,
+    analysis_key: Optional[str] = None,
+) -> List[AnalysisFinding]:
+    """
+    Build AnalysisFinding rows from an analysis' agent results
+
+    Failed agents and findings without text are skipped. Severity is kept
+    only when it is one of SEVERITIES.
+    """
+    rows = []
+    for agent_result in agent_results:
+        agent_type = agent_result.get("agentType", "unknown")
+        if "error" in agent_result.get("metadata", {}):
+            continue
+        for finding in agent_result.get("findings") or []:
+            text = finding_text(agent_type, finding)
+            if not text:
+                continue
+            severity = str(finding.get("severity") or "").lower()
+            confidence = finding.get("confidence")
+            rows.append(AnalysisFinding(
+                organization_id=organization_id,
+                document_id=document_id,
+                file_name=file_name,
+                analysis_key=analysis_key,
+                agent_type=agent_type,
+                finding_type=finding_label(agent_type, finding)[:255] or None,
+                severity=severity if severity in SEVERITY_CODES else None,
+                confidence=float(confidence) if isinstance(confidence, (int, float)) else None,
+                text=text,
+            ))
+    return rows
+
+
+def record_findings(
+    db: Session,
+    organization_id: int,
+    file_name: str,
+    agent_results: List[Dict[str, Any]],
+    document_id: Optional[int] = None,
+    content: Optional[str] = None,
+) -> int:
+    """
+    Replace the stored findings of a document with those of its latest analysis
+
+    Analyses without a Document row (synchronous and streaming requests) are
+    identified by their analysis_key() and need the analyzed content, so
+    different uploads under the same file name keep their own findings. The
+    caller commits.
+
+    Returns:
+        Number of findings written
+    """
+    if document_id is None and content is None:
+        raise ValueError("Findings without a document need the analyzed content")
+
+    key = analysis_key(file_name, content) if document_id is None else None
+    existing = db.query(AnalysisFinding).filter(AnalysisFinding.organization_id == organization_id)
+    if document_id is not None:
+        existing = existing.filter(AnalysisFinding.document_id == document_id)
+    else:
+        existing = existing.filter(
+            AnalysisFinding.document_id.is_(None), AnalysisFinding.analysis_key == key
+        )
+    existing.delete(synchronize_session=False)
+
+    rows = build_findings(organization_id, file_name, agent_results, document_id, key)
+    db.add_all(rows)
+    return len(rows)
+
+
+def query_findings(
+    db: Session,
+    filters: FindingFilter,
+    after: Optional[int] = None,
+    limit: int = 50,
+) -> Tuple[List[AnalysisFinding], Optional[int]]:
+    """
+    One page of findings, newest first, with keyset pagination
+
+    Args:
+        db: Database session
+        filters: Finding filters
+        after: Cursor returned by the previous page (the last id seen)
+        limit: Page size
+
+    Returns:
+        (findings, cursor for the next page or None on the last page)
+    """
+    query = filters.apply(db.query(AnalysisFinding))
+    if after is not None:
+        query = query.filter(AnalysisFinding.id < after)
+    rows = query.order_by(AnalysisFinding.id.desc()).limit(limit + 1).all()
+    if len(rows) > limit:
+        return rows[:limit], rows[limit - 1].id
+    return rows, None
+
+
+class FindingColumns:
+    """
+    Column-wise, array-backed findings for in-memory aggregation
+
+    Each finding costs about 22 bytes (id, document id, agent code, severity
+    code, confidence) instead of an ORM object or dict; the text is not kept.
+    Missing document ids are -1, missing severities -1 and missing
+    confidences NaN.
+    """
+
+    __slots__ = ("ids", "document_ids", "agents", "severities", "confidences", "agent_names", "_agent_codes")
+
+    def __init__(self):
+        self.ids = array("q")
+        self.document_ids = array("q")
+        self.agents = array("B")
+        self.severities = array("b")
+        self.confidences = array("f")
+        self.agent_names: List[str] = []
+        self._agent_codes: Dict[str, int] = {}
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def append(
+        self,
+        finding_id: int,
+        document_id: Optional[int],
+        agent_type: str,
+        severity: Optional[str],
+        confidence: Optional[float],
+    ):
+        code = self._agent_codes.get(agent_type)
+        if code is None:
+            code = self._agent_codes[agent_type] = len(self.agent_names)
+            self.agent_names.append(agent_type)
+        self.ids.append(finding_id)
+        self.document_ids.append(-1 if document_id is None else document_id)
+        self.agents.append(code)
+        self.severities.append(SEVERITY_CODES.get(severity, -1))
+        self.confidences.append(math.nan if confidence is None else confidence)
+
+    @classmethod
+    def from_rows(cls, rows: Iterable[Tuple]) -> "FindingColumns":
+        """Build from (id, document_id, agent_type, severity, confidence) tuples"""
+        columns = cls()
+        for row in rows:
+            columns.append(*row)
+        return columns
+
+    @classmethod
+    def load(cls, db: Session, filters: FindingFilter) -> "FindingColumns":
+        """Stream the filtered findings from the database in batches"""
+        query = filters.apply(db.query(
+            AnalysisFinding.id,
+            AnalysisFinding.document_id,
+            AnalysisFinding.agent_type,
+            AnalysisFinding.severity,
+            AnalysisFinding.confidence,
+        ))
+        return cls.from_rows(query.yield_per(AGGREGATE_BATCH_SIZE))
+
+    def summary(self) -> Dict[str, Any]:
+        """Counts by agent and severity, mean confidence and the most flagged documents"""
+        by_agent = [[0] * (len(SEVERITIES) + 1) for _ in self.agent_names]
+        confidence_sum = [0.0] * len(self.agent_names)
+        confidence_count = [0] * len(self.agent_names)
+        flagged: Dict[int, int] = defaultdict(int)
+        high = SEVERITY_CODES["high"]
+
+        for agent, severity, confidence, document_id in zip(
+            self.agents, self.severities, self.confidences, self.document_ids
+        ):
+            # Index -1 (no severity) lands in the last slot
+            by_agent[agent][severity] += 1
+            if confidence == confidence:
+                confidence_sum[agent] += confidence
+                confidence_count[agent] += 1
+            if severity >= high and document_id >= 0:
+                flagged[document_id] += 1
+
+        def severity_counts(counts: List[int]) -> Dict[str, int]:
+            return {severity: counts[code] for code, severity in enumerate(SEVERITIES) if counts[code]}
+
+        totals = [sum(column) for column in zip(*by_agent)] or [0] * (len(SEVERITIES) + 1)
+        return {
+            "total": len(self),
+            "bySeverity": severity_counts(totals),
+            "byAgent": {
+                name: {
+                    "count": sum(by_agent[code]),
+                    "bySeverity": severity_counts(by_agent[code]),
+                    "meanConfidence": (
+                        round(confidence_sum[code] / confidence_count[code], 4)
+                        if confidence_count[code] else None
+                    ),
+                }
+                for code, name in enumerate(self.agent_names)
+            },
+            "topDocuments": [
+                {"documentId": document_id, "highSeverityFindings": count}
+                for document_id, count in sorted(flagged.items(), key=lambda item: (-item[1], item[0]))[:TOP_DOCUMENTS]
+            ],
+        }
@@ -0,0 +1,253 @@
+"""
+Forensic Pre-screen - Local numeric forensics on monetary amounts in a document
+"""
+import re
+from typing import Any, Dict, List
+
+import numpy as np
+
+# Currency-marked amounts: $1,234.56  ($450,000)  USD 2.5M  -€300  ₹ 12,000
+AMOUNT_PATTERN = re.compile(
+    r"(?P<open>\()?\s*(?P<sign>-)?\s*"
+    r"(?:(?P<symbol>[$€£₹¥])|(?P<code>USD|EUR|GBP|INR|Rs\.?)\s?)"
+    r"\s?(?P<number>\d{1,3}(?:,\d{2,3})+(?:\.\d+)?|\d+(?:\.\d+)?)"
+    r"(?:\s?(?P<suffix>thousand|million|billion|[KMB])\b)?"
+    r"\s*(?P<close>\))?",
+    re.IGNORECASE,
+)
+
+SUFFIX_MULTIPLIERS = {
+    "k": 1e3,
+    "thousand": 1e3,
+    "m": 1e6,
+    "million": 1e6,
+    "b": 1e9,
+    "billion": 1e9,
+}
+
+# Benford expected frequencies for first digits 1-9 and second digits 0-9
+BENFORD_FIRST = np.log10(1 + 1 / np.arange(1, 10))
+BENFORD_SECOND = np.array([
+    np.sum(np.log10(1 + 1 / (10 * np.arange(1, 10) + d))) for d in range(10)
+])
+
+# Nigrini mean-absolute-deviation conformity thresholds
+BENFORD_FIRST_MAD = [(0.006, "close"), (0.012, "acceptable"), (0.015, "marginal")]
+BENFORD_SECOND_MAD = [(0.008, "close"), (0.010, "acceptable"), (0.012, "marginal")]
+
+# Minimum sample sizes for the statistics to be meaningful
+BENFORD_MIN_SAMPLES = 30
+MIN_SAMPLES = 5
+
+NEAR_DUPLICATE_TOLERANCE = 0.001
+# Only amounts at or above this size are tested for round-number bias
+ROUND_NUMBER_MIN = 1000
+# Smaller amounts repeat naturally and are ignored by the duplicate tests
+DUPLICATE_MIN = 100
+OUTLIER_Z = 3.5
+MAX_LISTED = 5
+
+
+def extract_amounts(content: str) -> np.ndarray:
+    """
+    Extract every currency-marked amount from a document
+
+    Parentheses and leading minus signs are treated as negatives, and K/M/B or
+    thousand/million/billion suffixes are expanded.
+
+    Returns:
+        1-D float array of amounts in document order
+    """
+    amounts: List[float] = []
+    for match in AMOUNT_PATTERN.finditer(content):
+        value = float(match.group("number").replace(",", ""))
+        suffix = (match.group("suffix") or "").lower()
+        value *= SUFFIX_MULTIPLIERS.get(suffix, 1)
+        if match.group("sign") or (match.group("open") and match.group("close")):
+            value = -value
+        amounts.append(value)
+    return np.asarray(amounts, dtype=np.float64)
+
+
+def _conformity(mad: float, thresholds) -> str:
+    for limit, label in thresholds:
+        if mad <= limit:
+            return label
+    return "nonconformity"
+
+
+def _leading_digits(values: np.ndarray) -> tuple:
+    """First and second significant digits of positive values"""
+    exponents = np.floor(np.log10(values))
+    scaled = values / np.power(10.0, exponents - 1)  # 10.0 <= scaled < 100.0
+    two_digits = np.floor(scaled + 1e-9).astype(np.int64)
+    two_digits = np.clip(two_digits, 10, 99)
+    return two_digits // 10, two_digits % 10
+
+
+def _benford(values: np.ndarray) -> Dict[str, Any]:
+    if values.size < BENFORD_MIN_SAMPLES:
+        return {"applicable": False, "samples": int(values.size)}
+
+    first, second = _leading_digits(values)
+    first_observed = np.bincount(first, minlength=10)[1:10] / first.size
+    second_observed = np.bincount(second, minlength=10)[:10] / second.size
+
+    first_mad = float(np.mean(np.abs(first_observed - BENFORD_FIRST)))
+    second_mad = float(np.mean(np.abs(second_observed - BENFORD_SECOND)))
+
+    return {
+        "applicable": True,
+        "samples": int(values.size),
+        "firstDigitMAD": round(first_mad, 4),
+        "firstDigitConformity": _conformity(first_mad, BENFORD_FIRST_MAD),
+        "secondDigitMAD": round(second_mad, 4),
+        "secondDigitConformity": _conformity(second_mad, BENFORD_SECOND_MAD),
+        "mostOverrepresentedFirstDigit": int(np.argmax(first_observed - BENFORD_FIRST) + 1),
+    }
+
+
+def screen_amounts(content: str) -> Dict[str, Any]:
+    """
+    Run the forensic pre-screen over a document
+
+    Computes Benford first/second-digit deviation, round-number frequency,
+    exact and near-duplicate amounts, and log-scale outliers, and combines them
+    into a 0-100 risk score.
+
+    Args:
+        content: Full document text
+
+    Returns:
+        JSON-serializable summary (see keys below)
+    """
+    amounts = extract_amounts(content)
+    magnitudes = np.abs(amounts)
+    magnitudes = magnitudes[magnitudes >= 10]
+
+    summary: Dict[str, Any] = {
+        "amountsAnalyzed": int(magnitudes.size),
+        "benford": _benford(magnitudes),
+        "roundNumberShare": 0.0,
+        "duplicateAmounts": [],
+        "duplicateRatio": 0.0,
+        "nearDuplicatePairs": [],
+        "outlierRatio": 0.0,
+        "outliers": [],
+        "riskScore": 0.0,
+        "flags": [],
+    }
+    if magnitudes.size < MIN_SAMPLES:
+        summary["flags"].append("Too few amounts for a forensic pre-screen")
+        return summary
+
+    # Round numbers: at most two significant digits (e.g. 450,000 or 1,200,000)
+    integral = np.round(magnitudes)
+    large = integral[integral >= ROUND_NUMBER_MIN]
+    if large.size:
+        exponents = np.floor(np.log10(large))
+        round_mask = np.isclose(np.mod(large, np.power(10.0, exponents - 1)), 0)
+        round_share = float(np.mean(round_mask))
+    else:
+        round_share = 0.0
+
+    # Exact duplicates (to the cent) among non-trivial amounts
+    candidates = np.round(magnitudes[magnitudes >= DUPLICATE_MIN], 2)
+    values, counts = np.unique(candidates, return_counts=True)
+    repeated = counts > 1
+    duplicate_ratio = float(np.sum(counts[repeated] - 1) / max(1, candidates.size))
+    top = np.argsort(-counts[repeated])[:MAX_LISTED]
+    duplicate_amounts = [
+        {"amount": float(v), "count": int(c)}
+        for v, c in zip(values[repeated][top], counts[repeated][top])
+    ]
+
+    # Near duplicates: neighbouring distinct values within a relative tolerance,
+    # scored by the excess over what evenly spread (log-uniform) amounts produce
+    relative_gap = np.diff(values) / values[1:]
+    near = np.nonzero(relative_gap <= NEAR_DUPLICATE_TOLERANCE)[0]
+    near_pairs = [[float(values[i]), float(values[i + 1])] for i in near[:MAX_LISTED]]
+    near_excess = 0.0
+    if values.size > 1:
+        log_range = max(float(np.log(values[-1] / values[0])), 1e-9)
+        expected_near = 1 - np.exp(-values.size * NEAR_DUPLICATE_TOLERANCE / log_range)
+        near_excess = max(0.0, near.size / (values.size - 1) - expected_near)
+
+    # Outliers on a log scale using a robust (median/MAD) z-score
+    logs = np.log10(magnitudes)
+    median = np.median(logs)
+    mad = np.median(np.abs(logs - median))
+    if mad > 0:
+        robust_z = 0.6745 * (logs - median) / mad
+        outlier_mask = np.abs(robust_z) > OUTLIER_Z
+    else:
+        outlier_mask = np.zeros(logs.shape, dtype=bool)
+    outlier_ratio = float(np.mean(outlier_mask))
+
+    # Combine into a 0-100 score, dropping Benford when the sample is too small
+    components = {
+        "round": (max(0.0, (round_share - 0.5) / 0.5), 0.2),
+        "duplicates": (min(1.0, duplicate_ratio / 0.2), 0.25),
+        "nearDuplicates": (min(1.0, near_excess / 0.1), 0.1),
+        "outliers": (min(1.0, outlier_ratio / 0.1), 0.15),
+    }
+    benford = summary["benford"]
+    if benford["applicable"]:
+        components["benford"] = (
+            min(1.0, benford["firstDigitMAD"] / 0.03) * 0.7
+            + min(1.0, benford["secondDigitMAD"] / 0.024) * 0.3,
+            0.3,
+        )
+    total_weight = sum(weight for _, weight in components.values())
+    score = 100 * sum(value * weight for value, weight in components.values()) / total_weight
+
+    flags = []
+    if benford["applicable"] and benford["firstDigitConformity"] == "nonconformity":
+        flags.append(f"First-digit distribution deviates from Benford's law (MAD {benford['firstDigitMAD']})")
+    if round_share > 0.7:
+        flags.append(f"{round_share:.0%} of amounts are round numbers")
+    if duplicate_amounts and duplicate_ratio > 0.1:
+        flags.append(f"{len(duplicate_amounts)} amounts appear more than once")
+    if near_excess > 0.05:
+        flags.append(f"{near.size} near-duplicate amount pairs")
+    if outlier_ratio > 0:
+        flags.append(f"{int(np.sum(outlier_mask))} outlier amounts")
+
+    summary.update({
+        "roundNumberShare": round(round_share, 4),
+        "duplicateAmounts": duplicate_amounts,
+        "duplicateRatio": round(duplicate_ratio, 4),
+        "nearDuplicatePairs": near_pairs,
+        "outlierRatio": round(outlier_ratio, 4),
+        "outliers": [float(v) for v in magnitudes[outlier_mask][:MAX_LISTED]],
+        "riskScore": round(float(score), 1),
+        "flags": flags,
+    })
+    return summary
+
+
+def format_summary(summary: Dict[str, Any]) -> str:
+    """Render a compact, prompt-ready text version of a screen_amounts() summary"""
+    lines = [f"- Amounts analyzed: {summary['amountsAnalyzed']}"]
+
+    benford = summary["benford"]
+    if benford.get("applicable"):
+        lines.append(
+            f"- Benford first-digit MAD {benford['firstDigitMAD']} ({benford['firstDigitConformity']}), "
+            f"second-digit MAD {benford['secondDigitMAD']} ({benford['secondDigitConformity']})"
+        )
+    else:
+        lines.append("- Benford test: not applicable (sample too small)")
+
+    lines.append(f"- Round-number share: {summary['roundNumberShare']:.0%}")
+    if summary["duplicateAmounts"]:
+        duplicates = ", ".join(
+            f"{d['amount']:,.0f} x{d['count']}" for d in summary["duplicateAmounts"]
+        )
+        lines.append(f"- Duplicate amounts: {duplicates}")
+    if summary["nearDuplicatePairs"]:
+        pairs = ", ".join(f"{a:,.0f}~{b:,.0f}" for a, b in summary["nearDuplicatePairs"])
+        lines.append(f"- Near-duplicate amounts: {pairs}")
+    lines.append(f"- Outlier ratio: {summary['outlierRatio']:.1%}")
+    lines.append(f"- Local forensic risk score: {summary['riskScore']}/100")
+    return "\n".join(lines)
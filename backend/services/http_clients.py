@@ -0,0 +1,116 @@
+"""
+HTTP Clients - Shared, pooled HTTP and OpenAI clients owned by the app lifespan
+"""
+import logging
+from dataclasses import dataclass
+from typing import Optional
+
+import httpx
+import openai
+
+from config.settings import settings
+
+logger = logging.getLogger(__name__)
+
+try:
+    import h2  # noqa: F401 - required by httpx for HTTP/2
+    HTTP2_AVAILABLE = True
+except ImportError:  # pragma: no cover - h2 is optional at runtime
+    HTTP2_AVAILABLE = False
+
+# Client used by outbound calls (webhooks, market data), set by create_clients()
+_shared_http_client: Optional[httpx.AsyncClient] = None
+
+
+def create_http_client(
+    max_connections: int,
+    timeout: float,
+    user_agent: Optional[str] = None,
+) -> httpx.AsyncClient:
+    """
+    Build a pooled async HTTP client
+
+    Connections are kept alive for settings.HTTP_KEEPALIVE_EXPIRY_SECONDS and
+    HTTP/2 is negotiated when settings.HTTP2_ENABLED and the h2 package is
+    installed.
+
+    Args:
+        max_connections: Maximum concurrent connections in the pool
+        timeout: Default read/write/pool timeout in seconds
+        user_agent: Optional User-Agent header
+    """
+    return httpx.AsyncClient(
+        http2=settings.HTTP2_ENABLED and HTTP2_AVAILABLE,
+        limits=httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=min(settings.HTTP_MAX_KEEPALIVE_CONNECTIONS, max_connections),
+            keepalive_expiry=settings.HTTP_KEEPALIVE_EXPIRY_SECONDS,
+        ),
+        timeout=httpx.Timeout(timeout, connect=settings.HTTP_CONNECT_TIMEOUT_SECONDS),
+        headers={"User-Agent": user_agent} if user_agent else None,
+    )
+
+
+@dataclass
+class Clients:
+    """Process-wide clients created at startup and closed at shutdown"""
+
+    http: httpx.AsyncClient
+    llm_http: httpx.AsyncClient
+    openai: Optional[openai.AsyncOpenAI]
+
+    async def aclose(self):
+        global _shared_http_client
+        if self.openai is not None:
+            await self.openai.close()
+        await self.llm_http.aclose()
+        await self.http.aclose()
+        if _shared_http_client is self.http:
+            _shared_http_client = None
+
+
+def create_clients() -> Clients:
+    """
+    Create the shared HTTP clients and the OpenAI client on top of them
+
+    The OpenAI client has its own retries disabled: LLM calls are retried
+    (and hedged) by services.llm_resilience, so client-level retries would
+    multiply attempts.
+    """
+    global _shared_http_client
+
+    if settings.HTTP2_ENABLED and not HTTP2_AVAILABLE:
+        logger.warning("HTTP/2 requested but the h2 package is not installed; using HTTP/1.1")
+    http = create_http_client(
+        settings.HTTP_MAX_CONNECTIONS, 30.0, f"{settings.APP_NAME}/{settings.APP_VERSION}"
+    )
+    llm_http = create_http_client(settings.LLM_HTTP_MAX_CONNECTIONS, settings.LLM_CALL_TIMEOUT_SECONDS)
+
+    client = None
+    if settings.LLM_BACKEND.lower() == "openai":
+        client = openai.AsyncOpenAI(
+            api_key=settings.OPENAI_API_KEY,
+            base_url=settings.OPENAI_BASE_URL,
+            http_client=llm_http,
+            max_retries=0,
+        )
+
+    _shared_http_client = http
+    logger.info(
+        f"HTTP clients ready (HTTP/2: {settings.HTTP2_ENABLED and HTTP2_AVAILABLE}, "
+        f"LLM pool: {settings.LLM_HTTP_MAX_CONNECTIONS} connections)"
+    )
+    return Clients(http=http, llm_http=llm_http, openai=client)
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """
+    Shared outbound HTTP client
+
+    Outside the app lifespan (scripts, workers) a pooled client is created on
+    first use.
+    """
+    global _shared_http_client
+    if _shared_http_client is None:
+        _shared_http_client = create_http_client(settings.HTTP_MAX_CONNECTIONS, 30.0)
+    return _shared_http_client
@@ -0,0 +1,407 @@
+"""
+LLM Backends - OpenAI implementation and an offline deterministic stub
+"""
+import asyncio
+import hashlib
+import json
+import logging
+import random
+import re
+import time
+import uuid
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+import httpx
+import openai
+from openai.types import CompletionUsage
+from openai.types.chat import ChatCompletion, ChatCompletionChunk, ChatCompletionMessage
+from openai.types.chat.chat_completion import Choice
+from openai.types.chat.chat_completion_chunk import Choice as ChunkChoice, ChoiceDelta
+
+from config.settings import settings
+from services.token_counter import count_tokens
+
+logger = logging.getLogger(__name__)
+
+
+class LLMBackend:
+    """Interface for chat-completion providers used by the AI services"""
+
+    name = "base"
+
+    async def create_chat_completion(self, **kwargs) -> ChatCompletion:
+        """
+        Create a chat completion
+
+        Args:
+            kwargs: OpenAI chat.completions.create arguments (model, messages,
+                temperature, response_format, ...)
+
+        Returns:
+            ChatCompletion with choices and usage populated
+        """
+        raise NotImplementedError
+
+    async def stream_chat_completion(self, **kwargs) -> AsyncIterator[ChatCompletionChunk]:
+        """
+        Stream a chat completion as content deltas
+
+        Yields ChatCompletionChunk objects; the last one carries usage. The
+        default implementation yields the whole completion as one chunk, for
+        backends that cannot stream.
+        """
+        completion = await self.create_chat_completion(**kwargs)
+        yield _chunk(
+            completion.id,
+            completion.model,
+            completion.choices[0].message.content or "",
+            usage=completion.usage,
+        )
+
+
+def _chunk(
+    chunk_id: str,
+    model: str,
+    content: Optional[str],
+    usage: Optional[CompletionUsage] = None,
+    finish_reason: Optional[str] = None,
+) -> ChatCompletionChunk:
+    """Build a streaming chunk with one content delta (none for a usage-only chunk)"""
+    choices = []
+    if content is not None or finish_reason is not None:
+        choices.append(
+            ChunkChoice(index=0, delta=ChoiceDelta(content=content), finish_reason=finish_reason)
+        )
+    return ChatCompletionChunk(
+        id=chunk_id,
+        object="chat.completion.chunk",
+        created=int(time.time()),
+        model=model,
+        choices=choices,
+        usage=usage,
+    )
+
+
+class OpenAIBackend(LLMBackend):
+    """
+    Backend that calls the OpenAI API
+
+    The app passes the shared, pooled client created in its lifespan (see
+    services.http_clients); without one, a client is created on first use.
+    Retries are left to services.llm_resilience.
+    """
+
+    name = "openai"
+
+    def __init__(self, client: Optional[openai.AsyncOpenAI] = None):
+        self._client = client
+
+    @property
+    def client(self) -> openai.AsyncOpenAI:
+        if self._client is None:
+            self._client = openai.AsyncOpenAI(
+                api_key=settings.OPENAI_API_KEY, base_url=settings.OPENAI_BASE_URL, max_retries=0
+            )
+        return self._client
+
+    async def create_chat_completion(self, **kwargs) -> ChatCompletion:
+        return await self.client.chat.completions.create(**kwargs)
+
+    async def stream_chat_completion(self, **kwargs) -> AsyncIterator[ChatCompletionChunk]:
+        stream = await self.client.chat.completions.create(
+            stream=True, stream_options={"include_usage": True}, **kwargs
+        )
+        async for chunk in stream:
+            yield chunk
+
+
+# Agent prompt marker -> agent type, matching the MultiAgentOrchestrator prompts
+STUB_AGENT_MARKERS = [
+    ("Document Parser Agent", "parser"),
+    ("Financial Analyzer Agent", "analyzer"),
+    ("Compliance Agent", "compliance"),
+    ("Fraud Detection Agent", "fraud"),
+    ("Alert Agent", "alert"),
+    ("Insight Agent", "insight"),
+]
+
+# Streamed stub responses are split into words (with their trailing whitespace)
+STREAM_PIECE = re.compile(r"\S+\s*|\s+")
+STREAM_WORDS_PER_CHUNK = 4
+
+STUB_SENTENCES = [
+    "Revenue growth remained ahead of operating expense growth for the period.",
+    "Liquidity is adequate, with operating cash flow covering short-term obligations.",
+    "Leverage is moderate relative to equity and within typical covenant ranges.",
+    "Marketing spend increased faster than revenue and warrants closer review.",
+    "Revenue recognition timing should be validated against contract terms.",
+    "Controls over vendor payments should be tested for duplicate disbursements.",
+    "Disclosures are broadly consistent with applicable reporting standards.",
+    "Management should document the rationale for significant estimates.",
+]
+SEVERITIES = ["low", "medium", "high", "critical"]
+AMOUNT_PATTERN = re.compile(r"\$\s?[\d,]+(?:\.\d+)?")
+NUMBERED_ITEM = re.compile(r"^\s*\d+\.\s+(.+?)\s*$", re.MULTILINE)
+
+
+class StubBackend(LLMBackend):
+    """
+    Offline backend returning deterministic, schema-valid responses
+
+    JSON-mode requests get findings shaped like the matching agent's schema;
+    other requests get markdown with one heading per numbered item requested in
+    the prompt. Output is seeded from the prompt so identical requests return
+    identical content. Latency is drawn from a log-normal distribution around
+    latency_ms plus ms_per_token per completion token, and error_rate of calls
+    fail with a retryable rate-limit or server error.
+    """
+
+    name = "stub"
+
+    def __init__(
+        self,
+        latency_ms: float = 800,
+        latency_sigma: float = 0.4,
+        ms_per_token: float = 0,
+        error_rate: float = 0,
+        completion_tokens: int = 0,
+        seed: Optional[int] = None,
+    ):
+        self.latency_ms = latency_ms
+        self.latency_sigma = latency_sigma
+        self.ms_per_token = ms_per_token
+        self.error_rate = error_rate
+        self.completion_tokens = completion_tokens
+        self._timing = random.Random(seed)
+
+    def _respond(self, kwargs: Dict[str, Any]) -> Tuple[str, str, CompletionUsage]:
+        """Model, content and usage of the response to a request"""
+        messages = kwargs.get("messages", [])
+        model = kwargs.get("model", settings.OPENAI_MODEL)
+        prompt = "\n".join(str(m.get("content") or "") for m in messages)
+
+        content_rng = random.Random(hashlib.sha256(prompt.encode()).hexdigest())
+        if (kwargs.get("response_format") or {}).get("type") == "json_object":
+            content = json.dumps(self._agent_response(prompt, content_rng))
+        else:
+            content = self._markdown_response(messages, content_rng)
+
+        prompt_tokens = count_tokens(prompt, model)
+        completion_tokens = self.completion_tokens or count_tokens(content, model)
+        usage = CompletionUsage(
+            prompt_tokens=prompt_tokens,
+            completion_tokens=completion_tokens,
+            total_tokens=prompt_tokens + completion_tokens,
+        )
+        return model, content, usage
+
+    async def create_chat_completion(self, **kwargs) -> ChatCompletion:
+        model, content, usage = self._respond(kwargs)
+
+        await asyncio.sleep(self._latency(usage.completion_tokens))
+        if self.error_rate and self._timing.random() < self.error_rate:
+            raise self._error()
+
+        return ChatCompletion(
+            id=f"stub-{uuid.uuid4().hex}",
+            object="chat.completion",
+            created=int(time.time()),
+            model=model,
+            choices=[
+                Choice(
+                    index=0,
+                    finish_reason="stop",
+                    message=ChatCompletionMessage(role="assistant", content=content),
+                )
+            ],
+            usage=usage,
+        )
+
+    async def stream_chat_completion(self, **kwargs) -> AsyncIterator[ChatCompletionChunk]:
+        """
+        Stream the same response as create_chat_completion
+
+        The log-normal latency is spent before the first chunk and
+        ms_per_token is spent per chunk, so time to first token and total
+        time match the non-streaming call.
+        """
+        model, content, usage = self._respond(kwargs)
+        chunk_id = f"stub-{uuid.uuid4().hex}"
+
+        await asyncio.sleep(self._latency(0))
+        if self.error_rate and self._timing.random() < self.error_rate:
+            raise self._error()
+
+        pieces = STREAM_PIECE.findall(content)
+        for i in range(0, len(pieces), STREAM_WORDS_PER_CHUNK):
+            delta = "".join(pieces[i:i + STREAM_WORDS_PER_CHUNK])
+            if self.ms_per_token:
+                await asyncio.sleep(self.ms_per_token * count_tokens(delta, model) / 1000)
+            else:
+                await asyncio.sleep(0)
+            yield _chunk(chunk_id, model, delta)
+        yield _chunk(chunk_id, model, None, finish_reason="stop")
+        yield _chunk(chunk_id, model, None, usage=usage)
+
+    def _latency(self, completion_tokens: int) -> float:
+        """Seconds to wait before responding"""
+        base = self.latency_ms * self._timing.lognormvariate(0, self.latency_sigma)
+        return (base + self.ms_per_token * completion_tokens) / 1000
+
+    def _error(self) -> Exception:
+        if self._timing.random() < 0.5:
+            status, error_cls = 429, openai.RateLimitError
+        else:
+            status, error_cls = 500, openai.InternalServerError
+        response = httpx.Response(
+            status, request=httpx.Request("POST", "http://stub/v1/chat/completions")
+        )
+        return error_cls(f"Stub backend injected {status}", response=response, body=None)
+
+    def _agent_response(self, prompt: str, rng: random.Random) -> Dict[str, Any]:
+        # The role line comes first; later mentions are upstream agents' output
+        positions = [
+            (prompt.find(marker), agent) for marker, agent in STUB_AGENT_MARKERS if marker in prompt
+        ]
+        agent_type = min(positions)[1] if positions else "insight"
+        amounts = AMOUNT_PATTERN.findall(prompt) or ["$1,000,000"]
+        count = rng.randint(2, 5)
+
+        def confidence() -> float:
+            return round(rng.uniform(0.55, 0.98), 2)
+
+        def sentence() -> str:
+            return rng.choice(STUB_SENTENCES)
+
+        findings: List[Dict[str, Any]] = []
+        for i in range(count):
+            amount = rng.choice(amounts)
+            severity = rng.choice(SEVERITIES)
+            if agent_type == "parser":
+                findings.append({
+                    "type": rng.choice(["metadata", "table", "entity", "section"]),
+                    "content": f"Extracted line item {i + 1}: {amount}",
+                    "confidence": confidence(),
+                })
+            elif agent_type == "analyzer":
+                findings.append({
+                    "metric": rng.choice(["ROE", "Debt to Equity", "Current Ratio", "Operating Margin"]),
+                    "value": round(rng.uniform(0.1, 3.0), 2),
+                    "trend": rng.choice(["up", "down", "stable"]),
+                    "insight": sentence(),
+                    "confidence": confidence(),
+                })
+            elif agent_type == "compliance":
+                status = rng.choice(["compliant", "non-compliant", "unclear"])
+                findings.append({
+                    "regulation": rng.choice(["IFRS", "GAAP", "SOX", "SEBI", "ESG"]),
+                    "status": status,
+                    "details": sentence(),
+                    "severity": "low" if status == "compliant" else severity,
+                    "confidence": confidence(),
+                })
+            elif agent_type == "fraud":
+                findings.append({
+                    "type": rng.choice(["round number bias", "duplicate entries", "expense misclassification"]),
+                    "description": sentence(),
+                    "severity": severity,
+                    "evidence": f"Amount {amount} referenced in document",
+                    "confidence": confidence(),
+                })
+            elif agent_type == "alert":
+                findings.append({
+                    "title": f"Review item {i + 1}",
+                    "message": sentence(),
+                    "severity": rng.choice(["info"] + SEVERITIES),
+                    "actionRequired": "Assign an owner and review before period close",
+                    "deadline": None,
+                    "confidence": confidence(),
+                })
+            else:
+                findings.append({
+                    "type": rng.choice(["summary", "insight", "recommendation", "risk", "opportunity"]),
+                    "content": sentence(),
+                    "priority": rng.choice(["low", "medium", "high"]),
+                    "confidence": confidence(),
+                })
+
+        metadata_fields = {
+            "parser": {"tablesFound": rng.randint(1, 6), "entitiesFound": rng.randint(3, 20)},
+            "analyzer": {"metricsCalculated": count, "trendsIdentified": rng.randint(0, count)},
+            "compliance": {
+                "regulationsChecked": count,
+                "violationsFound": sum(1 for f in findings if f.get("status") == "non-compliant"),
+            },
+            "fraud": {"redFlagsFound": count, "riskScore": rng.randint(5, 95)},
+            "alert": {
+                "alertsGenerated": count,
+                "criticalAlerts": sum(1 for f in findings if f.get("severity") == "critical"),
+            },
+            "insight": {
+                "insightsGenerated": count,
+                "recommendationsCount": sum(1 for f in findings if f.get("type") == "recommendation"),
+            },
+        }
+
+        return {
+            "findings": findings,
+            "confidence": confidence(),
+            "metadata": metadata_fields[agent_type],
+        }
+
+    def _markdown_response(self, messages: List[Dict[str, Any]], rng: random.Random) -> str:
+        user_prompt = str(messages[-1].get("content") or "") if messages else ""
+        title = user_prompt.strip().splitlines()[0].rstrip(".") if user_prompt.strip() else "Report"
+        title = re.sub(r"^Generate (?:an? )?", "", title).strip() or "Report"
+
+        sections = NUMBERED_ITEM.findall(user_prompt) or ["Summary"]
+        lines = [f"# {title[0].upper()}{title[1:]}", ""]
+        for i, heading in enumerate(sections, start=1):
+            lines.append(f"## {i}. {heading}")
+            lines.append("")
+            lines.append(" ".join(rng.sample(STUB_SENTENCES, 3)))
+            lines.append("")
+        return "\n".join(lines)
+
+
+_default_backend: Optional[LLMBackend] = None
+
+
+def create_llm_backend(
+    name: Optional[str] = None, client: Optional[openai.AsyncOpenAI] = None
+) -> LLMBackend:
+    """
+    Build a backend from settings
+
+    Args:
+        name: "openai" or "stub" (defaults to settings.LLM_BACKEND)
+        client: OpenAI client for the openai backend (e.g. the shared pooled one)
+    """
+    name = (name or settings.LLM_BACKEND).lower()
+    if name == "openai":
+        return OpenAIBackend(client)
+    if name == "stub":
+        return StubBackend(
+            latency_ms=settings.LLM_STUB_LATENCY_MS,
+            latency_sigma=settings.LLM_STUB_LATENCY_SIGMA,
+            ms_per_token=settings.LLM_STUB_MS_PER_TOKEN,
+            error_rate=settings.LLM_STUB_ERROR_RATE,
+            completion_tokens=settings.LLM_STUB_COMPLETION_TOKENS,
+            seed=settings.LLM_STUB_SEED,
+        )
+    raise ValueError(f"Unknown LLM backend: {name}")
+
+
+def set_llm_backend(backend: Optional[LLMBackend]):
+    """Install the process-wide default backend (None resets it)"""
+    global _default_backend
+    _default_backend = backend
+
+
+def get_llm_backend() -> LLMBackend:
+    """Return the process-wide default backend, creating it on first use"""
+    global _default_backend
+    if _default_backend is None:
+        _default_backend = create_llm_backend()
+        logger.info(f"Using LLM backend: {_default_backend.name}")
+    return _default_backend
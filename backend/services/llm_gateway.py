@@ -0,0 +1,292 @@
+"""
+LLM Gateway - Process-wide concurrency and rate limiting for LLM calls
+"""
+import asyncio
+import logging
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+from config.settings import settings
+from services.llm_resilience import current_attempt
+from services.token_counter import count_tokens, fit_to_budget
+
+logger = logging.getLogger(__name__)
+
+# Number of recent wait times kept for percentile metrics
+WAIT_SAMPLE_SIZE = 1000
+
+
+class TokenBucket:
+    """Continuously refilling token bucket sized for a per-minute budget"""
+
+    def __init__(self, per_minute: int):
+        self.capacity = float(per_minute)
+        self.rate = per_minute / 60.0
+        self.available = float(per_minute)
+        self.updated = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.available = min(self.capacity, self.available + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def time_until(self, amount: float) -> float:
+        """Seconds until amount can be consumed (0 if available now)"""
+        self._refill()
+        amount = min(amount, self.capacity)
+        if amount <= self.available:
+            return 0.0
+        return (amount - self.available) / self.rate
+
+    def consume(self, amount: float):
+        self._refill()
+        self.available -= min(amount, self.capacity)
+
+    def adjust(self, delta: float):
+        """Return (positive) or charge (negative) tokens after the fact"""
+        self._refill()
+        self.available = min(self.capacity, self.available + delta)
+
+
+class GatewaySlot:
+    """Admission ticket for one LLM call"""
+
+    def __init__(self, gateway: "LLMGateway", estimated_tokens: int, wait_time: float):
+        self.gateway = gateway
+        self.estimated_tokens = estimated_tokens
+        self.wait_time = wait_time
+
+    def record_usage(self, total_tokens: Optional[int]):
+        """Reconcile the token bucket with the tokens the call actually used"""
+        if total_tokens is None:
+            return
+        self.gateway.total_tokens += total_tokens
+        if self.gateway._tokens is not None:
+            self.gateway._tokens.adjust(self.estimated_tokens - total_tokens)
+
+
+class LLMGateway:
+    """
+    Shared gate in front of every LLM call in the process
+
+    Enforces a maximum number of in-flight calls plus requests-per-minute and
+    tokens-per-minute budgets. Callers are admitted strictly in arrival order:
+    only the head of the queue may wait for capacity, so a large request is
+    never starved by a stream of small ones.
+    """
+
+    def __init__(
+        self,
+        max_in_flight: int = 8,
+        requests_per_minute: int = 0,
+        tokens_per_minute: int = 0,
+        completion_tokens_estimate: int = 800,
+    ):
+        self.max_in_flight = max_in_flight
+        self.completion_tokens_estimate = completion_tokens_estimate
+        self._requests = TokenBucket(requests_per_minute) if requests_per_minute > 0 else None
+        self._tokens = TokenBucket(tokens_per_minute) if tokens_per_minute > 0 else None
+
+        self._loop = None
+        self._admission: Optional[asyncio.Lock] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+
+        self.queue_depth = 0
+        self.in_flight = 0
+        self.total_requests = 0
+        self.total_tokens = 0
+        self.total_wait_time = 0.0
+        self.total_trimmed_tokens = 0
+        self._wait_samples: deque = deque(maxlen=WAIT_SAMPLE_SIZE)
+
+    def _primitives(self):
+        """Create asyncio primitives bound to the running event loop"""
+        loop = asyncio.get_running_loop()
+        if loop is not self._loop:
+            self._loop = loop
+            self._admission = asyncio.Lock()
+            self._slots = asyncio.Semaphore(self.max_in_flight)
+        return self._admission, self._slots
+
+    def estimate_tokens(self, messages: List[Dict[str, Any]], model: Optional[str] = None) -> int:
+        """Estimate prompt plus completion tokens for a chat request"""
+        prompt_tokens = sum(count_tokens(str(m.get("content") or ""), model) for m in messages)
+        return prompt_tokens + self.completion_tokens_estimate
+
+    @asynccontextmanager
+    async def slot(self, estimated_tokens: int = 0):
+        """
+        Wait for admission, then hold an in-flight slot for the duration
+
+        Args:
+            estimated_tokens: Tokens to reserve from the per-minute budget
+
+        Yields:
+            GatewaySlot used to reconcile actual token usage
+        """
+        admission, slots = self._primitives()
+        enqueued_at = time.monotonic()
+        self.queue_depth += 1
+        acquired = False
+
+        try:
+            async with admission:
+                await slots.acquire()
+                acquired = True
+                while True:
+                    delay = max(
+                        self._requests.time_until(1) if self._requests else 0.0,
+                        self._tokens.time_until(estimated_tokens) if self._tokens else 0.0,
+                    )
+                    if delay <= 0:
+                        break
+                    await asyncio.sleep(delay)
+                if self._requests:
+                    self._requests.consume(1)
+                if self._tokens:
+                    self._tokens.consume(estimated_tokens)
+        except BaseException:
+            if acquired:
+                slots.release()
+            raise
+        finally:
+            self.queue_depth -= 1
+
+        wait_time = time.monotonic() - enqueued_at
+        self.total_requests += 1
+        self.total_wait_time += wait_time
+        self._wait_samples.append(wait_time)
+        if wait_time > 1:
+            logger.info(f"LLM call waited {wait_time:.2f}s for gateway admission")
+
+        self.in_flight += 1
+        try:
+            yield GatewaySlot(self, estimated_tokens, wait_time)
+        finally:
+            self.in_flight -= 1
+            slots.release()
+
+    def _start_attempt(self) -> Optional[float]:
+        """
+        Start the calling resilient_call attempt's clock on admission
+
+        Returns:
+            The attempt's timeout in seconds, or None outside resilient_call
+        """
+        clock = current_attempt()
+        return clock.start() if clock is not None else None
+
+    def _fit_budget(self, kwargs: Dict[str, Any]) -> Dict[str, Any]:
+        """Apply the prompt token budget to chat.completions.create arguments"""
+        max_prompt_tokens = kwargs.pop("max_prompt_tokens", settings.LLM_MAX_PROMPT_TOKENS)
+        messages, trimmed = fit_to_budget(
+            kwargs.get("messages", []),
+            max_prompt_tokens,
+            kwargs.get("model"),
+            settings.LLM_BUDGET_POLICY,
+        )
+        if trimmed:
+            logger.warning(f"Trimmed {trimmed} prompt tokens to fit budget of {max_prompt_tokens}")
+            self.total_trimmed_tokens += trimmed
+            kwargs["messages"] = messages
+        return kwargs
+
+    async def chat_completion(self, backend, **kwargs):
+        """
+        Run a chat completion on an LLM backend through the gateway
+
+        Prompts over the token budget (max_prompt_tokens, defaulting to
+        settings.LLM_MAX_PROMPT_TOKENS) are trimmed or rejected before they are
+        sent, according to settings.LLM_BUDGET_POLICY.
+
+        Args:
+            backend: LLMBackend to call
+            kwargs: Arguments for chat.completions.create, plus an optional
+                max_prompt_tokens ceiling for this call
+
+        Within resilient_call the attempt's timeout starts once the call is
+        admitted.
+
+        Returns:
+            The completion object
+
+        Raises:
+            TokenBudgetExceeded: if the prompt is over budget and cannot be trimmed
+            asyncio.TimeoutError: if the admitted call exceeds its attempt timeout
+        """
+        kwargs = self._fit_budget(kwargs)
+        estimated = self.estimate_tokens(kwargs.get("messages", []), kwargs.get("model"))
+        async with self.slot(estimated) as slot:
+            timeout = self._start_attempt()
+            completion = await asyncio.wait_for(backend.create_chat_completion(**kwargs), timeout)
+            usage = getattr(completion, "usage", None)
+            slot.record_usage(getattr(usage, "total_tokens", None))
+            return completion
+
+    async def chat_completion_stream(self, backend, **kwargs) -> AsyncIterator[Any]:
+        """
+        Stream a chat completion through the gateway
+
+        Same budget, admission and attempt timeout as chat_completion(); the
+        timeout covers the whole stream and the in-flight slot is held until
+        the stream is exhausted or closed.
+
+        Yields:
+            The backend's completion chunks (the last one carries usage)
+        """
+        kwargs = self._fit_budget(kwargs)
+        estimated = self.estimate_tokens(kwargs.get("messages", []), kwargs.get("model"))
+        async with self.slot(estimated) as slot:
+            timeout = self._start_attempt()
+            deadline = time.monotonic() + timeout if timeout is not None else None
+            chunks = backend.stream_chat_completion(**kwargs)
+            total_tokens = None
+            try:
+                while True:
+                    remaining = deadline - time.monotonic() if deadline is not None else None
+                    try:
+                        chunk = await asyncio.wait_for(chunks.__anext__(), remaining)
+                    except StopAsyncIteration:
+                        break
+                    usage = getattr(chunk, "usage", None)
+                    if usage is not None:
+                        total_tokens = usage.total_tokens
+                    yield chunk
+            finally:
+                await chunks.aclose()
+            slot.record_usage(total_tokens)
+
+    def metrics(self) -> Dict[str, Any]:
+        """Queue depth, concurrency and wait-time metrics"""
+        waits = sorted(self._wait_samples)
+
+        def percentile(p: float) -> float:
+            if not waits:
+                return 0.0
+            return round(waits[min(len(waits) - 1, int(p * len(waits)))] * 1000, 2)
+
+        return {
+            "queueDepth": self.queue_depth,
+            "inFlight": self.in_flight,
+            "maxInFlight": self.max_in_flight,
+            "totalRequests": self.total_requests,
+            "totalTokens": self.total_tokens,
+            "trimmedTokens": self.total_trimmed_tokens,
+            "avgWaitMs": round(self.total_wait_time / self.total_requests * 1000, 2) if self.total_requests else 0,
+            "p50WaitMs": percentile(0.50),
+            "p95WaitMs": percentile(0.95),
+            "maxWaitMs": round(waits[-1] * 1000, 2) if waits else 0,
+            "requestsAvailable": int(self._requests.available) if self._requests else None,
+            "tokensAvailable": int(self._tokens.available) if self._tokens else None,
+        }
+
+
+# Shared gateway used by every LLM caller in the process
+llm_gateway = LLMGateway(
+    max_in_flight=settings.LLM_MAX_IN_FLIGHT,
+    requests_per_minute=settings.LLM_REQUESTS_PER_MINUTE,
+    tokens_per_minute=settings.LLM_TOKENS_PER_MINUTE,
+    completion_tokens_estimate=settings.LLM_COMPLETION_TOKENS_ESTIMATE,
+)
@@ -0,0 +1,216 @@
+"""
+LLM Resilience - Timeouts, classified retries with jittered backoff, and hedging
+"""
+import asyncio
+import logging
+import random
+import time
+from collections import defaultdict, deque
+from contextvars import ContextVar
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+import openai
+
+from config.settings import settings
+
+logger = logging.getLogger(__name__)
+
+# Errors that are worth retrying: throttling, transient server/network issues,
+# and per-attempt timeouts (malformed agent output is repaired or re-queried
+# by the orchestrator, see services.agent_schemas)
+RETRYABLE_ERRORS = (
+    openai.RateLimitError,
+    openai.APITimeoutError,
+    openai.APIConnectionError,
+    openai.InternalServerError,
+    asyncio.TimeoutError,
+)
+RETRYABLE_STATUS_CODES = {408, 409, 429}
+
+# Number of recent latencies kept per key for percentile estimates
+LATENCY_SAMPLE_SIZE = 200
+
+
+def is_retryable(error: BaseException) -> bool:
+    """Classify an error as transient (retry) or permanent (fail fast)"""
+    if isinstance(error, RETRYABLE_ERRORS):
+        return True
+    if isinstance(error, openai.APIStatusError):
+        return error.status_code in RETRYABLE_STATUS_CODES or error.status_code >= 500
+    return False
+
+
+def backoff_delay(attempt: int, error: Optional[BaseException] = None) -> float:
+    """
+    Exponential backoff with full jitter, honouring Retry-After on throttling
+
+    Args:
+        attempt: Zero-based retry attempt number
+        error: The error that triggered the retry
+
+    Returns:
+        Seconds to sleep before the next attempt
+    """
+    ceiling = min(
+        settings.LLM_RETRY_MAX_DELAY_SECONDS,
+        settings.LLM_RETRY_BASE_DELAY_SECONDS * (2 ** attempt),
+    )
+    delay = random.uniform(0, ceiling)
+
+    response = getattr(error, "response", None)
+    retry_after = response.headers.get("retry-after") if response is not None else None
+    if retry_after:
+        try:
+            delay = max(delay, min(float(retry_after), settings.LLM_RETRY_MAX_DELAY_SECONDS))
+        except ValueError:
+            pass
+
+    return delay
+
+
+class LatencyTracker:
+    """Rolling per-key latency samples used to derive hedging delays"""
+
+    def __init__(self, sample_size: int = LATENCY_SAMPLE_SIZE):
+        self._samples: Dict[str, deque] = defaultdict(lambda: deque(maxlen=sample_size))
+
+    def record(self, key: str, seconds: float):
+        self._samples[key].append(seconds)
+
+    def percentile(self, key: str, p: float) -> Optional[float]:
+        """Return the p-th percentile (0-1) latency, or None without enough samples"""
+        samples = self._samples.get(key)
+        if not samples or len(samples) < settings.LLM_HEDGE_MIN_SAMPLES:
+            return None
+        ordered = sorted(samples)
+        return ordered[min(len(ordered) - 1, int(p * len(ordered)))]
+
+
+latency_tracker = LatencyTracker()
+
+
+class AttemptClock:
+    """
+    Timing of one resilient_call attempt
+
+    The gateway starts the clock when it admits the call (see
+    llm_gateway.LLMGateway), so the per-attempt timeout, latency samples and
+    hedging delay exclude time spent queued for admission.
+    """
+
+    def __init__(self, timeout: Optional[float] = None):
+        self.timeout = timeout
+        self.admitted_at: Optional[float] = None
+        self.admitted = asyncio.Event()
+
+    def start(self) -> Optional[float]:
+        """Mark the attempt as admitted and return its timeout"""
+        self.admitted_at = time.monotonic()
+        self.admitted.set()
+        return self.timeout
+
+
+# Clock of the attempt running in the current task
+_attempt_clock: ContextVar[Optional[AttemptClock]] = ContextVar("attempt_clock", default=None)
+
+
+def current_attempt() -> Optional[AttemptClock]:
+    """Clock of the resilient_call attempt making the current LLM call, if any"""
+    return _attempt_clock.get()
+
+
+async def hedged_call(
+    call: Callable[[AttemptClock], Awaitable[Any]], hedge_delay: float
+) -> Any:
+    """
+    Run call, firing a duplicate if it has not finished hedge_delay after admission
+
+    call receives the AttemptClock of its attempt. The hedge delay starts when
+    the primary call is admitted by the gateway, so queueing under load does
+    not trigger hedges. The first successful response wins and the other call
+    is cancelled. If one call fails the other is still awaited; the error is
+    raised only if both fail.
+    """
+    clock = AttemptClock(settings.LLM_CALL_TIMEOUT_SECONDS)
+    primary = asyncio.ensure_future(call(clock))
+    admitted = asyncio.ensure_future(clock.admitted.wait())
+    try:
+        await asyncio.wait({primary, admitted}, return_when=asyncio.FIRST_COMPLETED)
+    finally:
+        admitted.cancel()
+
+    done, _ = await asyncio.wait({primary}, timeout=hedge_delay)
+    if done:
+        return primary.result()
+
+    logger.info(f"Hedging LLM call after {hedge_delay:.2f}s")
+    hedge = asyncio.ensure_future(call(AttemptClock(settings.LLM_CALL_TIMEOUT_SECONDS)))
+    pending = {primary, hedge}
+    error: Optional[BaseException] = None
+
+    try:
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.exception() is None:
+                    return task.result()
+                error = task.exception()
+        raise error
+    finally:
+        for task in pending:
+            task.cancel()
+
+
+async def resilient_call(
+    call: Callable[[], Awaitable[Any]],
+    key: str,
+    hedge: Optional[bool] = None,
+) -> Any:
+    """
+    Run an LLM call with a per-attempt timeout, retries and optional hedging
+
+    The timeout (settings.LLM_CALL_TIMEOUT_SECONDS) and latency samples start
+    when the gateway admits the call: waiting in the gateway's queue is
+    backpressure, not a failure, so it never causes a timeout or retry.
+
+    Args:
+        call: Zero-argument callable returning a fresh awaitable per attempt
+        key: Latency bucket for hedging (e.g. "agent:fraud")
+        hedge: Enable hedging (defaults to settings.LLM_HEDGING_ENABLED)
+
+    Returns:
+        The result of the first successful attempt
+    """
+    if hedge is None:
+        hedge = settings.LLM_HEDGING_ENABLED
+
+    async def timed_attempt(clock: Optional[AttemptClock] = None):
+        clock = clock or AttemptClock(settings.LLM_CALL_TIMEOUT_SECONDS)
+        token = _attempt_clock.set(clock)
+        try:
+            result = await call()
+        finally:
+            _attempt_clock.reset(token)
+        if clock.admitted_at is not None:
+            latency_tracker.record(key, time.monotonic() - clock.admitted_at)
+        return result
+
+    attempt = 0
+    while True:
+        try:
+            hedge_delay = latency_tracker.percentile(key, 0.95) if hedge else None
+            if hedge_delay is not None:
+                return await hedged_call(
+                    timed_attempt, max(hedge_delay, settings.LLM_HEDGE_MIN_DELAY_SECONDS)
+                )
+            return await timed_attempt()
+        except Exception as e:
+            if attempt >= settings.LLM_MAX_RETRIES or not is_retryable(e):
+                raise
+            delay = backoff_delay(attempt, e)
+            logger.warning(
+                f"LLM call {key} failed ({type(e).__name__}: {str(e)}), "
+                f"retry {attempt + 1}/{settings.LLM_MAX_RETRIES} in {delay:.2f}s"
+            )
+            attempt += 1
+            await asyncio.sleep(delay)
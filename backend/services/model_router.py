@@ -0,0 +1,143 @@
+"""
+Model Router - Picks the model for each LLM call by route and input size
+"""
+import logging
+from collections import defaultdict
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+from config.settings import settings
+from services.llm_gateway import LLMGateway, llm_gateway
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class ModelRoute:
+    """The model chosen for one call and why"""
+
+    route: str
+    model: str
+    tier: str
+    input_tokens: int
+    fallback: bool = False
+
+
+class ModelRouter:
+    """
+    Routing table from call route (agent type, "report" or "report:<type>") to model
+
+    Each route maps to a list of [max_input_tokens, tier] steps, checked in
+    order; the first step whose limit (null = unbounded) covers the input is
+    used. Tiers name an entry in the tier table or are used as a model name
+    as-is; tiers mapped to an empty name and routes without an entry use the
+    default model. While the shared
+    LLM gateway has at least fallback_queue_depth calls waiting, routes
+    resolve to the fallback tier instead.
+    """
+
+    def __init__(
+        self,
+        routes: Dict[str, List[Tuple[Optional[int], str]]],
+        tiers: Dict[str, str],
+        default_model: str,
+        fallback_tier: Optional[str] = None,
+        fallback_queue_depth: int = 0,
+        gateway: Optional[LLMGateway] = None,
+        enabled: bool = True,
+    ):
+        self.routes = routes
+        self.tiers = tiers
+        self.default_model = default_model
+        self.fallback_tier = fallback_tier
+        self.fallback_queue_depth = fallback_queue_depth
+        self.gateway = gateway
+        self.enabled = enabled
+        self._calls: Dict[str, int] = defaultdict(int)
+        self._fallbacks: Dict[str, int] = defaultdict(int)
+
+    def _steps(self, route: str) -> List[Tuple[Optional[int], str]]:
+        # "report:risk_report" falls back to the "report" entry
+        return self.routes.get(route) or self.routes.get(route.split(":")[0]) or []
+
+    def _model(self, tier: str) -> str:
+        if tier == "default":
+            return self.default_model
+        if tier in self.tiers:
+            return self.tiers[tier] or self.default_model
+        return tier
+
+    def signature(self, route: str) -> Any:
+        """Configured models for a route, for cache keys (ignores load fallback)"""
+        if not self.enabled:
+            return self.default_model
+        steps = self._steps(route)
+        if not steps:
+            return self.default_model
+        return [[limit, self._model(tier)] for limit, tier in steps]
+
+    def overloaded(self) -> bool:
+        return (
+            self.fallback_queue_depth > 0
+            and self.gateway is not None
+            and self.gateway.queue_depth >= self.fallback_queue_depth
+        )
+
+    def route(self, route: str, input_tokens: int) -> ModelRoute:
+        """
+        Choose the model for a call
+
+        Args:
+            route: Agent type, "report" or "report:<report type>"
+            input_tokens: Prompt size in tokens
+
+        Returns:
+            ModelRoute with the model to call
+        """
+        tier = "default"
+        if self.enabled:
+            for limit, step_tier in self._steps(route):
+                if limit is None or input_tokens <= limit:
+                    tier = step_tier
+                    break
+        choice = ModelRoute(route, self._model(tier), tier, input_tokens)
+
+        if (
+            self.enabled
+            and self.fallback_tier
+            and tier != self.fallback_tier
+            and self._model(self.fallback_tier) != choice.model
+            and self.overloaded()
+        ):
+            logger.info(
+                f"Routing {route} to {self.fallback_tier} instead of {tier}: "
+                f"{self.gateway.queue_depth} LLM calls queued"
+            )
+            choice.model = self._model(self.fallback_tier)
+            choice.tier = self.fallback_tier
+            choice.fallback = True
+            self._fallbacks[route] += 1
+
+        self._calls[f"{route}:{choice.model}"] += 1
+        return choice
+
+    def metrics(self) -> Dict[str, Any]:
+        """Call counts per route and model, and load fallbacks per route"""
+        return {
+            "enabled": self.enabled,
+            "callsByRouteModel": dict(self._calls),
+            "fallbacksByRoute": dict(self._fallbacks),
+            "overloaded": self.overloaded(),
+        }
+
+
+# Shared router used by the orchestrator and report generator
+model_router = ModelRouter(
+    routes=settings.MODEL_ROUTES,
+    tiers=settings.MODEL_TIERS,
+    default_model=settings.OPENAI_MODEL,
+    fallback_tier=settings.MODEL_FALLBACK_TIER,
+    fallback_queue_depth=settings.MODEL_FALLBACK_QUEUE_DEPTH,
+    gateway=llm_gateway,
+    enabled=settings.MODEL_ROUTING_ENABLED,
+)
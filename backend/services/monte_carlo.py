@@ -0,0 +1,376 @@
+"""
+Monte Carlo Risk Simulation - Vectorized revenue, cost, cash-flow and liquidity paths
+
+Revenue and costs follow correlated geometric random walks calibrated on a
+company's FinancialMetrics history; operating cash flow is their difference
+scaled by the historical cash conversion, and liquidity starts from the
+latest net assets and accumulates cash flow. Paths are simulated in chunks
+so the working set is bounded by settings.MONTE_CARLO_CHUNK_PATHS, and each
+chunk is reduced to fixed-size histograms: memory does not grow with paths.
+"""
+import logging
+import math
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from config.settings import settings
+from models.financial_metrics import FinancialMetrics
+
+logger = logging.getLogger(__name__)
+
+# FinancialMetrics columns used for calibration
+HISTORY_COLUMNS = ("fiscal_year", "revenue", "profit", "cash_flow", "equity", "assets", "liabilities")
+
+PERCENTILES = (5, 25, 50, 75, 95)
+CONFIDENCE_LEVELS = (0.95, 0.99)
+SERIES = ("revenue", "costs", "cashFlow", "liquidity")
+# Bins of the per-series, per-year histograms percentiles are read from
+HISTOGRAM_BINS = 8192
+
+# Assumptions used when the history is too short to estimate them
+DEFAULT_VOLATILITY = {"revenue": 0.15, "costs": 0.12}
+DEFAULT_CORRELATION = 0.6
+MIN_VOLATILITY = 0.01
+MAX_CORRELATION = 0.95
+CASH_CONVERSION_RANGE = (0.0, 2.0)
+
+
+@dataclass
+class RiskModel:
+    """Simulation parameters calibrated from a financial history"""
+
+    base_year: int
+    revenue: float
+    costs: float
+    growth_mean: np.ndarray  # mean annual log growth of (revenue, costs)
+    covariance: np.ndarray  # 2x2 covariance of the annual log growth
+    cash_conversion: float
+    starting_liquidity: float
+    history_years: int
+
+    def assumptions(self) -> Dict[str, Any]:
+        volatility = np.sqrt(np.diag(self.covariance))
+        return {
+            "historyYears": self.history_years,
+            "baseYear": self.base_year,
+            "revenueGrowthMean": round(float(self.growth_mean[0]), 4),
+            "revenueGrowthVolatility": round(float(volatility[0]), 4),
+            "costGrowthMean": round(float(self.growth_mean[1]), 4),
+            "costGrowthVolatility": round(float(volatility[1]), 4),
+            "correlation": round(float(self.covariance[0, 1] / (volatility[0] * volatility[1])), 4),
+            "cashConversion": round(self.cash_conversion, 4),
+            "startingLiquidity": round(self.starting_liquidity, 2),
+        }
+
+
+def load_history(db, company_name: str) -> List[Dict[str, Any]]:
+    """The FinancialMetrics rows of a company as dicts, oldest first"""
+    rows = db.query(FinancialMetrics).filter(
+        FinancialMetrics.company_name == company_name
+    ).order_by(FinancialMetrics.fiscal_year).all()
+    return [{column: getattr(row, column) for column in HISTORY_COLUMNS} for row in rows]
+
+
+def _log_growth(history: List[Dict[str, Any]], values: List[Optional[float]]) -> Dict[int, float]:
+    """Annualized log growth between consecutive positive values, by the later year"""
+    growth = {}
+    for (previous, earlier), (current, later) in zip(
+        zip(history, values), zip(history[1:], values[1:])
+    ):
+        years = current["fiscal_year"] - previous["fiscal_year"]
+        if earlier and later and earlier > 0 and later > 0 and years > 0:
+            growth[current["fiscal_year"]] = math.log(later / earlier) / years
+    return growth
+
+
+def calibrate(
+    history: List[Dict[str, Any]], starting_liquidity: Optional[float] = None
+) -> Optional[RiskModel]:
+    """
+    Fit a RiskModel to a financial history
+
+    Costs are revenue minus profit. Growth means, volatilities and their
+    correlation are estimated from the year-on-year log growth; with too few
+    years DEFAULT_VOLATILITY and DEFAULT_CORRELATION are used instead.
+
+    Returns:
+        The model, or None without a year of positive revenue
+    """
+    history = sorted(
+        (row for row in history if row.get("fiscal_year") is not None and (row.get("revenue") or 0) > 0),
+        key=lambda row: row["fiscal_year"],
+    )
+    if not history:
+        return None
+
+    revenues = [row["revenue"] for row in history]
+    costs = [
+        row["revenue"] - row["profit"] if row.get("profit") is not None else None
+        for row in history
+    ]
+    revenue_growth = _log_growth(history, revenues)
+    cost_growth = _log_growth(history, costs)
+
+    def moments(growth: Dict[int, float], series: str):
+        values = list(growth.values())
+        mean = float(np.mean(values)) if values else 0.0
+        volatility = float(np.std(values, ddof=1)) if len(values) >= 2 else DEFAULT_VOLATILITY[series]
+        return mean, max(volatility, MIN_VOLATILITY)
+
+    revenue_mean, revenue_volatility = moments(revenue_growth, "revenue")
+    cost_mean, cost_volatility = moments(cost_growth, "costs")
+
+    paired = sorted(set(revenue_growth) & set(cost_growth))
+    correlation = DEFAULT_CORRELATION
+    if len(paired) >= 3:
+        estimate = np.corrcoef([revenue_growth[year] for year in paired], [cost_growth[year] for year in paired])[0, 1]
+        if np.isfinite(estimate):
+            correlation = float(np.clip(estimate, -MAX_CORRELATION, MAX_CORRELATION))
+
+    covariance_term = correlation * revenue_volatility * cost_volatility
+    covariance = np.array([
+        [revenue_volatility ** 2, covariance_term],
+        [covariance_term, cost_volatility ** 2],
+    ])
+
+    conversions = [
+        row["cash_flow"] / row["profit"]
+        for row in history
+        if row.get("cash_flow") is not None and (row.get("profit") or 0) > 0
+    ]
+    cash_conversion = float(np.clip(np.mean(conversions), *CASH_CONVERSION_RANGE)) if conversions else 1.0
+
+    latest = history[-1]
+    if costs[-1] is not None:
+        base_costs = costs[-1]
+    else:
+        margins = [row["profit"] / row["revenue"] for row in history if row.get("profit") is not None]
+        base_costs = latest["revenue"] * (1 - (float(np.mean(margins)) if margins else 0.0))
+
+    if starting_liquidity is None:
+        if latest.get("equity") is not None:
+            starting_liquidity = latest["equity"]
+        elif latest.get("assets") is not None and latest.get("liabilities") is not None:
+            starting_liquidity = latest["assets"] - latest["liabilities"]
+        else:
+            starting_liquidity = 0.0
+
+    return RiskModel(
+        base_year=latest["fiscal_year"],
+        revenue=float(latest["revenue"]),
+        costs=float(max(base_costs, 0.0)),
+        growth_mean=np.array([revenue_mean, cost_mean]),
+        covariance=covariance,
+        cash_conversion=cash_conversion,
+        starting_liquidity=float(starting_liquidity),
+        history_years=len(history),
+    )
+
+
+def _chunks(
+    model: RiskModel, paths: int, horizon_years: int, seed: Optional[int], chunk_paths: int
+) -> Iterator[Tuple[np.ndarray, ...]]:
+    """(revenue, costs, cash flow, liquidity) arrays of shape (chunk, years) per chunk"""
+    rng = np.random.default_rng(seed)
+    cholesky = np.linalg.cholesky(model.covariance)
+    # Ito correction so the expected growth factor is exp(mean * t)
+    drift = model.growth_mean - 0.5 * np.diag(model.covariance)
+
+    for start in range(0, paths, chunk_paths):
+        stop = min(start + chunk_paths, paths)
+        shocks = rng.standard_normal((stop - start, horizon_years, 2)) @ cholesky.T
+        growth = np.exp(np.cumsum(drift + shocks, axis=1))
+        revenue = model.revenue * growth[..., 0]
+        costs = model.costs * growth[..., 1]
+        cash_flow = model.cash_conversion * (revenue - costs)
+        liquidity = model.starting_liquidity + np.cumsum(cash_flow, axis=1)
+        yield revenue, costs, cash_flow, liquidity
+
+
+def _bin_width(low: np.ndarray, high: np.ndarray) -> np.ndarray:
+    # Constant series get a unit width so every value lands in the first bin
+    span = high - low
+    return np.where(span > 0, span / HISTOGRAM_BINS, 1.0)
+
+
+def _bin_index(values: np.ndarray, low: np.ndarray, width: np.ndarray) -> np.ndarray:
+    return np.clip(((values - low) / width).astype(np.int64), 0, HISTOGRAM_BINS - 1)
+
+
+def _histogram_quantile(
+    counts: np.ndarray, low: float, high: float, width: float, fraction: float
+) -> Tuple[float, int, float]:
+    """
+    The value below which a fraction of the counted paths lie
+
+    Returns:
+        (value, bin, fraction of that bin's paths below the value), with the
+        value interpolated linearly within its bin and at most high
+    """
+    cdf = np.cumsum(counts)
+    target = fraction * cdf[-1]
+    index = min(int(np.searchsorted(cdf, target)), HISTOGRAM_BINS - 1)
+    below = cdf[index] - counts[index]
+    within = (target - below) / counts[index] if counts[index] else 0.0
+    return float(min(low + (index + within) * width, high)), index, within
+
+
+def simulate(
+    model: RiskModel,
+    paths: int,
+    horizon_years: int,
+    seed: Optional[int] = None,
+    liquidity_threshold: float = 0.0,
+    chunk_paths: Optional[int] = None,
+) -> Dict[str, Any]:
+    """
+    Simulate a RiskModel
+
+    The normal draws come from one generator in path order, so a seed gives
+    the same results whatever the chunk size. Without a seed a random one is
+    drawn once and reported in the results. The paths are generated twice
+    from the seed: the first pass finds each series' range per year, the
+    second counts them into HISTOGRAM_BINS bins over that range, from which
+    percentiles are interpolated (to within a bin width of the exact value).
+
+    Returns:
+        percentiles (per series and fiscal year), valueAtRisk and
+        expectedShortfall of the cumulative cash flow over the horizon (as
+        shortfalls from its mean), and breachProbability of liquidity falling
+        below liquidity_threshold or of any year's cash flow being negative
+    """
+    chunk_paths = max(1, chunk_paths or settings.MONTE_CARLO_CHUNK_PATHS)
+    # Both passes must draw the same paths
+    if seed is None:
+        seed = int(np.random.SeedSequence().entropy)
+
+    # Pass 1: ranges, the mean cumulative cash flow and breach counts
+    low = {series: np.full(horizon_years, np.inf) for series in SERIES}
+    high = {series: np.full(horizon_years, -np.inf) for series in SERIES}
+    cumulative_low, cumulative_high, cumulative_sum = np.inf, -np.inf, 0.0
+    liquidity_breaches = 0
+    negative_cash_flow = 0
+    for chunk in _chunks(model, paths, horizon_years, seed, chunk_paths):
+        for series, values in zip(SERIES, chunk):
+            np.minimum(low[series], values.min(axis=0), out=low[series])
+            np.maximum(high[series], values.max(axis=0), out=high[series])
+        cash_flow, liquidity = chunk[2], chunk[3]
+        cumulative = cash_flow.sum(axis=1)
+        cumulative_low = min(cumulative_low, float(cumulative.min()))
+        cumulative_high = max(cumulative_high, float(cumulative.max()))
+        cumulative_sum += float(cumulative.sum())
+        liquidity_breaches += int(np.count_nonzero(liquidity.min(axis=1) < liquidity_threshold))
+        negative_cash_flow += int(np.count_nonzero((cash_flow < 0).any(axis=1)))
+
+    # Pass 2: histograms per series and year, and of the cumulative cash flow
+    # with the sum of each bin's values for the expected shortfall
+    width = {series: _bin_width(low[series], high[series]) for series in SERIES}
+    counts = {series: np.zeros(horizon_years * HISTOGRAM_BINS, dtype=np.int64) for series in SERIES}
+    year_offsets = np.arange(horizon_years) * HISTOGRAM_BINS
+    cumulative_width = float(_bin_width(np.array(cumulative_low), np.array(cumulative_high)))
+    cumulative_counts = np.zeros(HISTOGRAM_BINS, dtype=np.int64)
+    cumulative_sums = np.zeros(HISTOGRAM_BINS)
+    for chunk in _chunks(model, paths, horizon_years, seed, chunk_paths):
+        for series, values in zip(SERIES, chunk):
+            bins = _bin_index(values, low[series], width[series]) + year_offsets
+            counts[series] += np.bincount(bins.ravel(), minlength=counts[series].size)
+        cumulative = chunk[2].sum(axis=1)
+        bins = _bin_index(cumulative, cumulative_low, cumulative_width)
+        cumulative_counts += np.bincount(bins, minlength=HISTOGRAM_BINS)
+        cumulative_sums += np.bincount(bins, weights=cumulative, minlength=HISTOGRAM_BINS)
+
+    years = [f"FY{model.base_year + offset}" for offset in range(1, horizon_years + 1)]
+    percentiles = {}
+    for series in SERIES:
+        year_counts = counts[series].reshape(horizon_years, HISTOGRAM_BINS)
+        percentiles[series] = {
+            year: {
+                f"p{level}": round(_histogram_quantile(
+                    year_counts[index],
+                    low[series][index],
+                    high[series][index],
+                    width[series][index],
+                    level / 100,
+                )[0], 2)
+                for level in PERCENTILES
+            }
+            for index, year in enumerate(years)
+        }
+
+    expected = cumulative_sum / paths
+    value_at_risk, expected_shortfall = {}, {}
+    for confidence in CONFIDENCE_LEVELS:
+        label = f"{confidence * 100:g}%"
+        cutoff, index, within = _histogram_quantile(
+            cumulative_counts, cumulative_low, cumulative_high, cumulative_width, 1 - confidence
+        )
+        tail_count = float(cumulative_counts[:index].sum() + within * cumulative_counts[index])
+        tail_sum = float(cumulative_sums[:index].sum() + within * cumulative_sums[index])
+        tail_mean = tail_sum / tail_count if tail_count else cutoff
+        value_at_risk[label] = round(expected - cutoff, 2)
+        expected_shortfall[label] = round(expected - tail_mean, 2)
+
+    return {
+        "paths": paths,
+        "horizonYears": horizon_years,
+        "seed": seed,
+        "assumptions": model.assumptions(),
+        "percentiles": percentiles,
+        "cumulativeCashFlow": {
+            "expected": round(expected, 2),
+            "valueAtRisk": value_at_risk,
+            "expectedShortfall": expected_shortfall,
+        },
+        "breachProbability": {
+            "liquidityThreshold": liquidity_threshold,
+            "liquidity": round(liquidity_breaches / paths, 4),
+            "negativeCashFlow": round(negative_cash_flow / paths, 4),
+        },
+    }
+
+
+def run_simulation(
+    history: List[Dict[str, Any]],
+    paths: Optional[int] = None,
+    horizon_years: Optional[int] = None,
+    seed: Optional[int] = None,
+    liquidity_threshold: float = 0.0,
+    starting_liquidity: Optional[float] = None,
+) -> Optional[Dict[str, Any]]:
+    """
+    Calibrate on a financial history and simulate it
+
+    Args:
+        history: Dicts with HISTORY_COLUMNS keys (e.g. from load_history)
+        paths: Simulated paths (settings.MONTE_CARLO_PATHS, capped at
+            settings.MONTE_CARLO_MAX_PATHS)
+        horizon_years: Years simulated (settings.MONTE_CARLO_HORIZON_YEARS,
+            capped at settings.MONTE_CARLO_MAX_HORIZON_YEARS)
+        seed: RNG seed (settings.MONTE_CARLO_SEED)
+        liquidity_threshold: Liquidity level counted as a breach
+        starting_liquidity: Overrides the latest net assets
+
+    Returns:
+        simulate() results, or None when the history has no usable year
+    """
+    model = calibrate(history, starting_liquidity)
+    if model is None:
+        return None
+
+    paths = min(max(1, int(paths or settings.MONTE_CARLO_PATHS)), settings.MONTE_CARLO_MAX_PATHS)
+    horizon_years = min(
+        max(1, int(horizon_years or settings.MONTE_CARLO_HORIZON_YEARS)),
+        settings.MONTE_CARLO_MAX_HORIZON_YEARS,
+    )
+    seed = settings.MONTE_CARLO_SEED if seed is None else seed
+
+    start = time.perf_counter()
+    results = simulate(model, paths, horizon_years, seed, liquidity_threshold)
+    logger.info(
+        f"Monte Carlo simulation: {paths} paths x {horizon_years} years in "
+        f"{(time.perf_counter() - start) * 1000:.0f}ms"
+    )
+    return results
@@ -2,24 +2,116 @@
 Multi-Agent Orchestrator - Coordinates 6 specialized AI agents for financial document analysis
 """
 import asyncio
-import json
+import copy
+import functools
+import re
+import time
 import uuid
 from datetime import datetime
-from typing import Dict, List, Any, Optional
-from openai import AsyncOpenAI
+from typing import AsyncIterator, Dict, List, Any, Optional
 from config.settings import settings
+from services.result_cache import ResultCache, content_hash, make_cache_key
+from services.document_chunker import DocumentChunk, chunk_document
+from services.document_sectionizer import (
+    PREAMBLE,
+    diff_fingerprints,
+    fingerprint,
+    sectionize,
+    select_sections,
+)
+from services.llm_backend import LLMBackend, get_llm_backend
+from services.llm_gateway import llm_gateway
+from services.llm_resilience import resilient_call
+from services.model_router import model_router
+from services.financial_extractor import extract_financials
+from services.financial_extractor import format_summary as format_financials
+from services.forensics import MIN_SAMPLES as FORENSIC_MIN_SAMPLES, format_summary, screen_amounts
+from services.single_flight import SingleFlight
+from services.prompt_compactor import compact_text
+from services.agent_schemas import AgentOutputError, finding_text, parse_agent_output
+from services.token_counter import add_usage, completion_usage, count_tokens, truncate_tokens
 import logging
 
 logger = logging.getLogger(__name__)
 
-# Initialize OpenAI client
-openai_client = AsyncOpenAI(api_key=settings.OPENAI_API_KEY)
+# Prompt template versions - bump an agent's version whenever its prompt changes
+# so that only that agent's cached results are invalidated
+AGENT_PROMPT_VERSIONS = {
+    "parser": "2",
+    "analyzer": "4",
+    "compliance": "3",
+    "fraud": "3",
+    "alert": "3",
+    "insight": "2",
+}
+
+# Agent dependency graph: an agent starts once the agents it depends on finish
+# and receives their results. Agents without dependencies start immediately.
+AGENT_DEPENDENCIES = {
+    "analyzer": ("parser",),
+    "compliance": ("parser",),
+    "alert": ("fraud", "compliance"),
+}
+# Shared context entries each agent consumes, beyond its document text
+AGENT_CONTEXT_INPUTS = {
+    "analyzer": ("financials",),
+    "fraud": ("forensics",),
+}
+# Agents whose raw document text is replaced by the parser's structured extract
+PARSER_FED_AGENTS = ("analyzer", "compliance")
+# Upstream severities that make the alert agent worth running
+ALERT_SEVERITIES = {"medium", "high", "critical"}
+
+# Document sections each agent consumes (None = whole document). The preamble
+# (title, company, period) is always included for context.
+AGENT_SECTIONS = {
+    "parser": None,
+    "analyzer": ("balance_sheet", "income_statement", "cash_flow", "equity", "mdna"),
+    "compliance": ("notes", "mdna", "auditor_report", "risk_factors", "equity"),
+    "fraud": ("income_statement", "cash_flow", "balance_sheet", "notes", "risk_factors"),
+    "alert": ("risk_factors", "notes", "mdna", "auditor_report"),
+    "insight": ("mdna", "income_statement", "risk_factors", "notes"),
+}
+
+# Tokens of document content sent to an agent in single-window mode
+AGENT_CONTENT_TOKENS = 1000
+
+SEVERITY_SCORES = {
+    "info": 0,
+    "low": 25,
+    "medium": 50,
+    "high": 75,
+    "critical": 100,
+}
+
+# Finding fields that distinguish otherwise similar findings
+FINDING_LABEL_FIELDS = ("type", "metric", "regulation")
+# Agent metadata counters that are merged across chunks by max instead of sum
+MAX_MERGED_METADATA = {"riskScore"}
+
+
+class AgentTimeoutError(Exception):
+    """Raised when an agent misses its own or the request's deadline"""
 
 
 class MultiAgentOrchestrator:
     """Orchestrates multiple AI agents for comprehensive financial analysis"""
 
-    def __init__(self):
+    def __init__(
+        self,
+        cache: Optional[ResultCache] = None,
+        backend: Optional[LLMBackend] = None,
+    ):
+        self._backend = backend
+        if cache is None and settings.RESULT_CACHE_ENABLED:
+            cache = ResultCache(
+                "multi_agent",
+                max_entries=settings.RESULT_CACHE_MAX_ENTRIES,
+                ttl_seconds=settings.RESULT_CACHE_TTL_SECONDS,
+                redis_url=settings.REDIS_URL if settings.RESULT_CACHE_USE_REDIS else None,
+            )
+        self.cache = cache
+        self.single_flight = SingleFlight("multi_agent")
         self.agents = {
             "parser": self._create_parser_agent,
             "analyzer": self._create_analyzer_agent,
@@ -29,8 +121,20 @@ class MultiAgentOrchestrator:
             "insight": self._create_insight_agent,
         }
 
+    @property
+    def backend(self) -> LLMBackend:
+        """LLM backend used by the agents (settings.LLM_BACKEND by default)"""
+        if self._backend is None:
+            self._backend = get_llm_backend()
+        return self._backend
+
     async def orchestrate(
-        self, document_content: str, file_name: str
+        self,
+        document_content: str,
+        file_name: str,
+        chunked: Optional[bool] = None,
+        timeout: Optional[float] = None,
+        previous: Optional[Dict[str, Any]] = None,
     ) -> Dict[str, Any]:
         """
         Orchestrate all agents to analyze a financial document
@@ -38,92 +142,846 @@ class MultiAgentOrchestrator:
         Args:
             document_content: The content of the financial document
             file_name: Name of the file being analyzed
+            chunked: Map-reduce every agent over token-bounded chunks of the
+                whole document instead of the first AGENT_CONTENT_TOKENS
+                tokens (defaults to settings.CHUNKED_ANALYSIS_ENABLED)
+            timeout: Request deadline in seconds (defaults to
+                settings.ANALYSIS_TIMEOUT_SECONDS); agents still running at the
+                deadline are cancelled and reported as timed out
+            previous: Stored orchestrate() payload for an earlier version of
+                the document. Agents whose inputs are unchanged reuse their
+                previous result instead of running, and the payload gains an
+                "incremental" entry listing reused/re-run agents and the
+                section-level delta.
+
+        Concurrent calls for the same document, file name and options share
+        one in-flight analysis (settings.COALESCING_ENABLED).
 
         Returns:
             Comprehensive analysis results from all agents
         """
+        run = functools.partial(
+            self._orchestrate, document_content, file_name, chunked, timeout, previous
+        )
+        if not settings.COALESCING_ENABLED or previous is not None:
+            return await run()
+
+        key = make_cache_key(
+            "orchestrate", content_hash(document_content), file_name, chunked, timeout
+        )
+        return await self.single_flight.do(key, run)
+
+    async def _orchestrate(
+        self,
+        document_content: str,
+        file_name: str,
+        chunked: Optional[bool] = None,
+        timeout: Optional[float] = None,
+        previous: Optional[Dict[str, Any]] = None,
+    ) -> Dict[str, Any]:
+        """Run orchestrate() without request coalescing"""
         task_id = str(uuid.uuid4())
         start_time = datetime.now()
 
         logger.info(f"Starting multi-agent analysis: {task_id} for {file_name}")
 
-        # Execute all agents in parallel
-        tasks = [
-            self._execute_agent(agent_type, agent_fn, document_content, file_name)
+        analysis_key, cached, agent_calls, compaction = await self._plan_analysis(
+            task_id, document_content, file_name, chunked, timeout, previous
+        )
+        if cached is not None:
+            payload = cached
+        else:
+            # Execute all agents, running independent branches in parallel
+            labelled = dict(await asyncio.gather(*self._schedule(agent_calls).values()))
+            processed_results = [labelled[agent_type] for agent_type in agent_calls]
+
+            payload = await self._finalize_analysis(
+                task_id, start_time, analysis_key, processed_results, document_content, compaction
+            )
+
+        if previous is not None:
+            payload["incremental"] = await self._incremental_summary(
+                previous, payload, document_content
+            )
+        return payload
+
+    async def orchestrate_stream(
+        self,
+        document_content: str,
+        file_name: str,
+        chunked: Optional[bool] = None,
+        timeout: Optional[float] = None,
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Orchestrate all agents, yielding each agent's result as soon as it completes
+
+        Yields events of the form {"event": name, "data": payload}:
+        - "start": task id and the agents that will run
+        - "agent": one agent result (same shape as orchestrate()'s agentResults)
+        - "complete": the aggregated overallRisk, keyFindings, recommendations,
+          executionTime and cacheHit fields of orchestrate()
+
+        Pending agents are cancelled if the consumer stops iterating.
+        """
+        task_id = str(uuid.uuid4())
+        start_time = datetime.now()
+
+        logger.info(f"Starting streaming multi-agent analysis: {task_id} for {file_name}")
+
+        analysis_key, cached, agent_calls, compaction = await self._plan_analysis(
+            task_id, document_content, file_name, chunked, timeout
+        )
+
+        if cached is not None:
+            yield {
+                "event": "start",
+                "data": {"taskId": cached.get("taskId"), "agents": list(self.agents)},
+            }
+            for agent_result in cached.get("agentResults", []):
+                yield {"event": "agent", "data": agent_result}
+            yield {"event": "complete", "data": self._summary(cached)}
+            return
+
+        yield {"event": "start", "data": {"taskId": task_id, "agents": list(agent_calls)}}
+
+        tasks = list(self._schedule(agent_calls).values())
+        results: Dict[str, Dict[str, Any]] = {}
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                agent_type, agent_result = await next_done
+                results[agent_type] = agent_result
+                yield {"event": "agent", "data": agent_result}
+        finally:
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+
+        payload = await self._finalize_analysis(
+            task_id,
+            start_time,
+            analysis_key,
+            [results[agent_type] for agent_type in agent_calls],
+            document_content,
+            compaction,
+        )
+        yield {"event": "complete", "data": self._summary(payload)}
+
+    async def _plan_analysis(
+        self,
+        task_id: str,
+        document_content: str,
+        file_name: str,
+        chunked: Optional[bool],
+        timeout: Optional[float] = None,
+        previous: Optional[Dict[str, Any]] = None,
+    ) -> tuple:
+        """
+        Resolve the analysis mode, check the cache and prepare agent calls
+
+        Returns:
+            (analysis cache key, cached payload or None, mapping of agent type
+            to a zero-argument callable returning the agent coroutine,
+            prompt compaction stats or None)
+        """
+        if chunked is None:
+            chunked = settings.CHUNKED_ANALYSIS_ENABLED
+        if timeout is None:
+            timeout = settings.ANALYSIS_TIMEOUT_SECONDS
+        deadline = time.monotonic() + timeout
+
+        analysis_mode = "window"
+        if chunked:
+            analysis_mode = f"chunked:{settings.CHUNK_MAX_TOKENS}:{settings.CHUNK_OVERLAP_TOKENS}"
+        if settings.SECTION_ROUTING_ENABLED:
+            analysis_mode += ":sections"
+        if settings.AGENT_DAG_ENABLED:
+            analysis_mode += ":dag"
+        if settings.PROMPT_COMPACTION_ENABLED:
+            analysis_mode += ":compact"
+
+        doc_hash = content_hash(document_content)
+        analysis_key = self._analysis_cache_key(doc_hash, file_name, analysis_mode)
+
+        if self.cache is not None:
+            cached = await self.cache.get(analysis_key)
+            if cached is not None:
+                logger.info(f"Multi-agent analysis cache hit: {task_id} for {file_name}")
+                cached["cacheHit"] = True
+                return analysis_key, cached, {}, None
+
+        # Agents see the compacted text; forensics and fingerprints use the original
+        prompt_content, compaction = document_content, None
+        if settings.PROMPT_COMPACTION_ENABLED:
+            compacted = await asyncio.to_thread(
+                compact_text, document_content, None, settings.OPENAI_MODEL
+            )
+            prompt_content, compaction = compacted.text, compacted.stats()
+
+        agent_inputs = await asyncio.to_thread(self._route_sections, prompt_content)
+
+        # Chunk each distinct agent input once
+        agent_chunks: Dict[str, Optional[List[DocumentChunk]]] = {}
+        if chunked:
+            chunks_by_text: Dict[str, List[DocumentChunk]] = {}
+            for agent_type, (text, _) in agent_inputs.items():
+                if count_tokens(text, settings.OPENAI_MODEL) <= AGENT_CONTENT_TOKENS:
+                    continue
+                if text not in chunks_by_text:
+                    chunks_by_text[text] = await asyncio.to_thread(
+                        chunk_document,
+                        text,
+                        settings.CHUNK_MAX_TOKENS,
+                        settings.CHUNK_OVERLAP_TOKENS,
+                        settings.OPENAI_MODEL,
+                    )
+                agent_chunks[agent_type] = chunks_by_text[text]
+            logger.info(
+                f"Chunked analysis: {task_id} chunk counts "
+                f"{ {agent_type: len(c) for agent_type, c in agent_chunks.items()} }"
+            )
+
+        # Shared, locally computed inputs for the agents
+        context: Dict[str, Any] = {}
+        if settings.FORENSIC_PRESCREEN_ENABLED and "fraud" in self.agents:
+            context["forensics"] = await asyncio.to_thread(screen_amounts, document_content)
+        if settings.FINANCIAL_EXTRACTION_ENABLED and "analyzer" in self.agents:
+            context["financials"] = await asyncio.to_thread(extract_financials, document_content)
+
+        previous_results = {
+            result.get("agentType"): result
+            for result in (previous or {}).get("agentResults", [])
+        }
+        input_hashes = self._agent_input_hashes(agent_inputs, analysis_mode, context)
+
+        agent_calls = {
+            agent_type: functools.partial(
+                self._execute_agent,
+                agent_type,
+                agent_fn,
+                agent_inputs[agent_type][0],
+                file_name,
+                doc_hash,
+                chunks=agent_chunks.get(agent_type),
+                analysis_mode=analysis_mode,
+                sections=agent_inputs[agent_type][1],
+                deadline=deadline,
+                context=context,
+                chunked=chunked,
+                previous=previous_results.get(agent_type),
+                input_hash=input_hashes[agent_type],
+            )
             for agent_type, agent_fn in self.agents.items()
-        ]
+        }
 
-        agent_results = await asyncio.gather(*tasks, return_exceptions=True)
-
-        # Process results
-        processed_results = []
-        for i, result in enumerate(agent_results):
-            agent_type = list(self.agents.keys())[i]
-            if isinstance(result, Exception):
-                logger.error(f"Agent {agent_type} failed: {str(result)}")
-                processed_results.append({
-                    "agentType": agent_type,
-                    "findings": [],
-                    "confidence": 0,
-                    "processingTime": 0,
-                    "metadata": {"error": str(result)},
-                })
-            else:
-                processed_results.append(result)
+        return analysis_key, None, agent_calls, compaction
 
-        # Aggregate results
-        all_findings = [
-            finding
-            for result in processed_results
-            for finding in result.get("findings", [])
-        ]
+    def _dependencies(self, agent_type: str) -> tuple:
+        """Agents whose results agent_type waits for"""
+        if not settings.AGENT_DAG_ENABLED:
+            return ()
+        return tuple(
+            dep for dep in AGENT_DEPENDENCIES.get(agent_type, ()) if dep in self.agents
+        )
+
+    def _schedule(self, agent_calls: Dict[str, Any]) -> Dict[str, asyncio.Task]:
+        """
+        Start every agent call as a task following the dependency graph
+
+        Each task waits for its dependencies, then runs its agent with their
+        results, so independent branches still run concurrently. Tasks return
+        (agent type, result or error result) and never raise.
+        """
+        tasks: Dict[str, asyncio.Task] = {}
+        pending = list(agent_calls)
+        while pending:
+            ready = [
+                agent_type for agent_type in pending
+                if all(dep in tasks or dep not in agent_calls for dep in self._dependencies(agent_type))
+            ]
+            if not ready:
+                raise ValueError(f"Agent dependency cycle among: {', '.join(pending)}")
+            for agent_type in ready:
+                deps = {
+                    dep: tasks[dep] for dep in self._dependencies(agent_type) if dep in tasks
+                }
+                tasks[agent_type] = asyncio.create_task(
+                    self._run_node(agent_type, agent_calls[agent_type], deps)
+                )
+                pending.remove(agent_type)
+        return tasks
+
+    async def _run_node(
+        self, agent_type: str, call, deps: Dict[str, asyncio.Task]
+    ) -> tuple:
+        """Wait for an agent's dependencies, then run it with their results"""
+        upstream = {}
+        for dep, task in deps.items():
+            # Shielded so that cancelling this agent leaves shared upstream tasks alone
+            _, upstream[dep] = await asyncio.shield(task)
+        if upstream:
+            call = functools.partial(call, upstream=upstream)
+        return await self._run_labelled(agent_type, call)
+
+    async def _run_labelled(self, agent_type: str, call) -> tuple:
+        """Run an agent call and return (agent type, result or error result)"""
+        try:
+            result = await call()
+        except Exception as e:
+            result = e
+        return agent_type, self._agent_result_or_error(agent_type, result)
+
+    def _agent_result_or_error(self, agent_type: str, result: Any) -> Dict[str, Any]:
+        """Convert an agent exception into an empty, error-tagged result"""
+        if not isinstance(result, Exception):
+            return result
+
+        logger.error(f"Agent {agent_type} failed: {str(result)}")
+        metadata = {"error": str(result)}
+        if isinstance(result, AgentTimeoutError):
+            metadata["timedOut"] = True
+        return {
+            "agentType": agent_type,
+            "findings": [],
+            "confidence": 0,
+            "processingTime": 0,
+            "metadata": metadata,
+        }
+
+    async def _finalize_analysis(
+        self,
+        task_id: str,
+        start_time: datetime,
+        analysis_key: str,
+        processed_results: List[Dict[str, Any]],
+        document_content: str,
+        compaction: Optional[Dict[str, int]] = None,
+    ) -> Dict[str, Any]:
+        """Aggregate agent results into the orchestrate() payload and cache it"""
         overall_risk = self._calculate_overall_risk(processed_results)
         key_findings = self._extract_key_findings(processed_results)
         recommendations = self._generate_recommendations(processed_results)
 
         execution_time = (datetime.now() - start_time).total_seconds() * 1000
 
+        # Tokens spent by this run (cached and reused agents cost nothing)
+        token_usage = add_usage(None, None)
+        for result in processed_results:
+            metadata = result.get("metadata", {})
+            if not metadata.get("cacheHit") and not metadata.get("reused"):
+                token_usage = add_usage(token_usage, metadata.get("tokenUsage"))
+
         logger.info(f"Multi-agent analysis completed: {task_id} in {execution_time}ms")
 
-        return {
+        payload = {
             "taskId": task_id,
             "agentResults": processed_results,
             "overallRisk": overall_risk,
             "keyFindings": key_findings,
             "recommendations": recommendations,
             "executionTime": int(execution_time),
+            "tokenUsage": token_usage,
+            "documentFingerprint": await asyncio.to_thread(fingerprint, document_content),
+            "compaction": compaction,
+            "cacheHit": False,
         }
 
+        # Only cache complete analyses from the routed models so a transient
+        # agent failure or a load fallback is retried
+        failed = any("error" in r.get("metadata", {}) for r in processed_results)
+        degraded = any(r.get("metadata", {}).get("modelFallback") for r in processed_results)
+        if self.cache is not None and not failed and not degraded:
+            await self.cache.set(analysis_key, payload)
+
+        return payload
+
+    async def _incremental_summary(
+        self,
+        previous: Dict[str, Any],
+        payload: Dict[str, Any],
+        document_content: str,
+    ) -> Dict[str, Any]:
+        """Which agents were reused from the previous analysis, and the document delta"""
+        current = payload.get("documentFingerprint") or await asyncio.to_thread(
+            fingerprint, document_content
+        )
+        reused = [
+            result["agentType"]
+            for result in payload.get("agentResults", [])
+            if payload.get("cacheHit") or result.get("metadata", {}).get("reused")
+        ]
+        return {
+            "reusedAgents": reused,
+            "rerunAgents": [
+                result["agentType"]
+                for result in payload.get("agentResults", [])
+                if result["agentType"] not in reused
+            ],
+            "previousTaskId": previous.get("taskId"),
+            "delta": diff_fingerprints(previous.get("documentFingerprint"), current),
+        }
+
+    def _summary(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        """orchestrate() payload without the per-agent results"""
+        return {key: value for key, value in payload.items() if key != "agentResults"}
+
+    def _route_sections(self, document_content: str) -> Dict[str, tuple]:
+        """
+        Select the document text each agent should see
+
+        Returns:
+            Mapping of agent type to (text, section names used). The section
+            list is None when the agent receives the whole document, either by
+            declaration or because none of its sections were detected.
+        """
+        if not settings.SECTION_ROUTING_ENABLED:
+            return {agent_type: (document_content, None) for agent_type in self.agents}
+
+        sections = sectionize(document_content)
+        detected = {section.name for section in sections}
+
+        inputs = {}
+        for agent_type in self.agents:
+            wanted = AGENT_SECTIONS.get(agent_type)
+            matched = [name for name in wanted or () if name in detected]
+            if not matched:
+                inputs[agent_type] = (document_content, None)
+                continue
+            inputs[agent_type] = (
+                select_sections(sections, [PREAMBLE, *matched]),
+                matched,
+            )
+        return inputs
+
+    def _analysis_cache_key(
+        self, doc_hash: str, file_name: str, analysis_mode: str = "window"
+    ) -> str:
+        """Cache key for a full orchestrate() payload"""
+        return make_cache_key(
+            "analysis",
+            doc_hash,
+            file_name,
+            {agent_type: model_router.signature(agent_type) for agent_type in self.agents},
+            analysis_mode,
+            {agent_type: AGENT_PROMPT_VERSIONS.get(agent_type) for agent_type in self.agents},
+        )
+
+    def _agent_cache_key(
+        self,
+        agent_type: str,
+        doc_hash: str,
+        file_name: str,
+        analysis_mode: str = "window",
+        sections: Optional[List[str]] = None,
+        upstream: Optional[Dict[str, Any]] = None,
+    ) -> str:
+        """Cache key for a single agent's result"""
+        return make_cache_key(
+            "agent",
+            agent_type,
+            AGENT_PROMPT_VERSIONS.get(agent_type),
+            doc_hash,
+            file_name,
+            model_router.signature(agent_type),
+            analysis_mode,
+            sections,
+            {dep: result.get("findings") for dep, result in (upstream or {}).items()},
+        )
+
+    def _agent_input_hashes(
+        self,
+        agent_inputs: Dict[str, tuple],
+        analysis_mode: str,
+        context: Optional[Dict[str, Any]] = None,
+    ) -> Dict[str, str]:
+        """
+        Hash of each agent's inputs, used for incremental re-analysis
+
+        An agent's hash covers its prompt version, model, analysis mode, its
+        routed document sections, the shared context it consumes and the
+        input hashes (not the findings, which vary from run to run) of the
+        agents it depends on. Agents in PARSER_FED_AGENTS do not depend on the
+        parser's hash: the parser reads the whole document, so any edit would
+        re-run them, while their own sections already capture what they
+        analyze.
+        """
+        hashes: Dict[str, str] = {}
+
+        def resolve(agent_type: str) -> str:
+            if agent_type not in hashes:
+                upstream = {
+                    dep: resolve(dep)
+                    for dep in self._dependencies(agent_type)
+                    if not (dep == "parser" and agent_type in PARSER_FED_AGENTS)
+                }
+                hashes[agent_type] = make_cache_key(
+                    agent_type,
+                    AGENT_PROMPT_VERSIONS.get(agent_type),
+                    model_router.signature(agent_type),
+                    analysis_mode,
+                    content_hash(agent_inputs[agent_type][0]),
+                    {key: (context or {}).get(key) for key in AGENT_CONTEXT_INPUTS.get(agent_type, ())},
+                    upstream,
+                )
+            return hashes[agent_type]
+
+        for agent_type in self.agents:
+            resolve(agent_type)
+        return hashes
+
     async def _execute_agent(
-        self, agent_type: str, agent_fn, content: str, file_name: str
+        self,
+        agent_type: str,
+        agent_fn,
+        content: str,
+        file_name: str,
+        doc_hash: Optional[str] = None,
+        chunks: Optional[List[DocumentChunk]] = None,
+        analysis_mode: str = "window",
+        sections: Optional[List[str]] = None,
+        deadline: Optional[float] = None,
+        context: Optional[Dict[str, Any]] = None,
+        chunked: bool = False,
+        upstream: Optional[Dict[str, Dict[str, Any]]] = None,
+        previous: Optional[Dict[str, Any]] = None,
+        input_hash: Optional[str] = None,
     ) -> Dict[str, Any]:
-        """Execute a single agent and measure performance"""
+        """
+        Execute a single agent and measure performance
+
+        The agent is bounded by settings.AGENT_TIMEOUT_SECONDS and, when given,
+        by the request deadline (a time.monotonic() timestamp); on expiry the
+        agent is cancelled and AgentTimeoutError is raised.
+
+        upstream holds the results of the agents this one depends on. Agents in
+        PARSER_FED_AGENTS receive the parser's structured extract instead of
+        raw text when the parser succeeded; all upstream results are passed
+        to the agent in context["upstream"].
+
+        previous is this agent's result from an earlier analysis of the same
+        document; it is returned as-is (marked reused) when input_hash (see
+        _agent_input_hashes) matches the one stored with it. A reused result
+        is passed downstream like a fresh one.
+        """
         start_time = datetime.now()
 
+        previous_metadata = (previous or {}).get("metadata", {})
+        if (
+            input_hash is not None
+            and previous_metadata.get("inputHash") == input_hash
+            and "error" not in previous_metadata
+        ):
+            reused = copy.deepcopy(previous)
+            reused["metadata"].pop("cacheHit", None)
+            reused["metadata"]["reused"] = True
+            return reused
+
+        input_source = None
+        if upstream:
+            context = {**(context or {}), "upstream": upstream}
+            extract = self._parser_extract(upstream.get("parser"))
+            if agent_type in PARSER_FED_AGENTS and extract is not None:
+                content = extract
+                input_source = "parser"
+                chunks = None
+                if chunked and count_tokens(extract, settings.OPENAI_MODEL) > AGENT_CONTENT_TOKENS:
+                    chunks = await asyncio.to_thread(
+                        chunk_document,
+                        extract,
+                        settings.CHUNK_MAX_TOKENS,
+                        settings.CHUNK_OVERLAP_TOKENS,
+                        settings.OPENAI_MODEL,
+                    )
+
+        if not chunks:
+            content = truncate_tokens(content, AGENT_CONTENT_TOKENS, settings.OPENAI_MODEL)
+
+        agent_key = None
+        if self.cache is not None:
+            agent_key = self._agent_cache_key(
+                agent_type,
+                doc_hash or content_hash(content),
+                file_name,
+                analysis_mode,
+                sections,
+                upstream,
+            )
+            cached = await self.cache.get(agent_key)
+            if cached is not None:
+                cached.setdefault("metadata", {})["cacheHit"] = True
+                return cached
+
+        timeout = settings.AGENT_TIMEOUT_SECONDS
+        if deadline is not None:
+            timeout = min(timeout, deadline - time.monotonic())
+
+        if timeout <= 0:
+            raise AgentTimeoutError(f"Agent {agent_type} skipped: request deadline passed")
+
         try:
-            result = await agent_fn(content, file_name)
+            if chunks:
+                run = self._execute_agent_chunked(
+                    agent_type, agent_fn, chunks, file_name, context
+                )
+            else:
+                run = agent_fn(content, file_name, context)
+            try:
+                result = await asyncio.wait_for(run, timeout=timeout)
+            except asyncio.TimeoutError:
+                raise AgentTimeoutError(f"Agent {agent_type} timed out after {timeout:.1f}s")
             processing_time = (datetime.now() - start_time).total_seconds() * 1000
 
-            return {
+            agent_result = {
                 "agentType": agent_type,
                 "findings": result.get("findings", []),
                 "confidence": result.get("confidence", 0),
                 "processingTime": int(processing_time),
                 "metadata": result.get("metadata", {}),
             }
+            if sections is not None and input_source is None:
+                agent_result["metadata"]["sections"] = sections
+            if upstream:
+                agent_result["metadata"]["upstream"] = list(upstream)
+            if input_source is not None:
+                agent_result["metadata"]["input"] = input_source
+            if input_hash is not None:
+                agent_result["metadata"]["inputHash"] = input_hash
+
+            # Results from the load fallback model are not cached in place of the routed model's
+            if agent_key is not None and not agent_result["metadata"].get("modelFallback"):
+                await self.cache.set(agent_key, agent_result)
+
+            return agent_result
         except Exception as e:
             processing_time = (datetime.now() - start_time).total_seconds() * 1000
             logger.error(f"Agent {agent_type} failed: {str(e)}")
             raise
 
+    async def _execute_agent_chunked(
+        self,
+        agent_type: str,
+        agent_fn,
+        chunks: List[DocumentChunk],
+        file_name: str,
+        context: Optional[Dict[str, Any]] = None,
+    ) -> Dict[str, Any]:
+        """Map an agent over document chunks with bounded concurrency, then reduce"""
+        semaphore = asyncio.Semaphore(settings.CHUNK_CONCURRENCY)
+
+        async def run_chunk(chunk: DocumentChunk):
+            async with semaphore:
+                chunk_start = time.perf_counter()
+                result = await agent_fn(
+                    chunk.text,
+                    f"{file_name} (part {chunk.index + 1} of {len(chunks)})",
+                    context,
+                )
+                return result, (time.perf_counter() - chunk_start) * 1000
+
+        outputs = await asyncio.gather(
+            *(run_chunk(chunk) for chunk in chunks), return_exceptions=True
+        )
+
+        errors = [output for output in outputs if isinstance(output, Exception)]
+        if len(errors) == len(outputs):
+            raise errors[0]
+        for error in errors:
+            logger.warning(f"Agent {agent_type} chunk failed: {str(error)}")
+
+        return self._reduce_chunk_results(agent_type, chunks, outputs)
+
+    def _reduce_chunk_results(
+        self, agent_type: str, chunks: List[DocumentChunk], outputs: List[Any]
+    ) -> Dict[str, Any]:
+        """
+        Merge per-chunk agent results into a single result
+
+        Duplicate findings (same label and normalized text) are collapsed,
+        keeping the highest confidence and severity and counting occurrences.
+        Overall confidence is the token-weighted mean over successful chunks.
+        """
+        merged: Dict[str, Dict[str, Any]] = {}
+        metadata: Dict[str, Any] = {}
+        weighted_confidence = 0.0
+        weight = 0
+        chunk_latencies = []
+
+        for chunk, output in zip(chunks, outputs):
+            if isinstance(output, Exception):
+                chunk_latencies.append(None)
+                continue
+
+            result, latency = output
+            chunk_latencies.append(int(latency))
+            weighted_confidence += float(result.get("confidence", 0) or 0) * chunk.tokens
+            weight += chunk.tokens
+
+            for key, value in (result.get("metadata") or {}).items():
+                if key == "tokenUsage":
+                    metadata[key] = add_usage(metadata.get(key), value)
+                elif key == "modelFallback":
+                    metadata[key] = metadata.get(key, False) or value
+                elif not isinstance(value, (int, float)) or isinstance(value, bool):
+                    # Document-level values (e.g. the forensic summary) are the same per chunk
+                    metadata.setdefault(key, value)
+                elif key in MAX_MERGED_METADATA:
+                    metadata[key] = max(metadata.get(key, value), value)
+                else:
+                    metadata[key] = metadata.get(key, 0) + value
+
+            for finding in result.get("findings", []):
+                key = self._finding_key(agent_type, finding)
+                existing = merged.get(key)
+                if existing is None:
+                    merged[key] = {**finding, "occurrences": 1}
+                    continue
+
+                existing["occurrences"] += 1
+                existing["confidence"] = max(
+                    existing.get("confidence", 0) or 0, finding.get("confidence", 0) or 0
+                )
+                severity = str(finding.get("severity", "")).lower()
+                current = str(existing.get("severity", "")).lower()
+                if SEVERITY_SCORES.get(severity, -1) > SEVERITY_SCORES.get(current, -1):
+                    existing["severity"] = finding["severity"]
+
+        metadata["chunking"] = {
+            "chunkCount": len(chunks),
+            "chunksFailed": sum(1 for output in outputs if isinstance(output, Exception)),
+            "chunkLatencyMs": chunk_latencies,
+            "totalTokens": sum(chunk.tokens for chunk in chunks),
+        }
+
+        return {
+            "findings": list(merged.values()),
+            "confidence": round(weighted_confidence / weight, 4) if weight else 0,
+            "metadata": metadata,
+        }
+
+    def _parser_extract(self, parser_result: Optional[Dict[str, Any]]) -> Optional[str]:
+        """
+        Compact text form of the parser agent's structured output
+
+        Returns None when the parser failed or found nothing, in which case
+        downstream agents fall back to the raw document text.
+        """
+        if not parser_result or "error" in parser_result.get("metadata", {}):
+            return None
+        findings = parser_result.get("findings") or []
+        if not findings:
+            return None
+
+        lines = ["Structured extract from the Document Parser Agent:"]
+        for finding in findings:
+            text = finding_text("parser", finding)
+            if text:
+                lines.append(f"- [{finding.get('type', 'item')}] {text}")
+        return "\n".join(lines)
+
+    def _upstream_findings(
+        self, upstream: Dict[str, Dict[str, Any]], agent_types: tuple
+    ) -> Optional[str]:
+        """Compact list of upstream agents' findings for a downstream prompt"""
+        lines = []
+        for agent_type in agent_types:
+            result = upstream.get(agent_type)
+            if not result or "error" in result.get("metadata", {}):
+                continue
+            for finding in result.get("findings") or []:
+                label = "/".join(
+                    str(finding[field])
+                    for field in (*FINDING_LABEL_FIELDS, "status", "severity")
+                    if finding.get(field)
+                )
+                text = finding_text(agent_type, finding)
+                lines.append(f"- {agent_type} [{label}] {text}")
+        return "\n".join(lines) if lines else None
+
+    def _alert_unnecessary(self, upstream: Dict[str, Dict[str, Any]]) -> bool:
+        """
+        True when fraud and compliance both succeeded without anything worth
+        alerting on (no medium+ severity finding and no compliance violation)
+        """
+        for agent_type in ("fraud", "compliance"):
+            result = upstream.get(agent_type)
+            if not result or "error" in result.get("metadata", {}):
+                return False
+            for finding in result.get("findings") or []:
+                if str(finding.get("severity", "")).lower() in ALERT_SEVERITIES:
+                    return False
+                if str(finding.get("status", "")).lower() == "non-compliant":
+                    return False
+        return True
+
+    def _finding_key(self, agent_type: str, finding: Dict[str, Any]) -> str:
+        """Normalized identity of a finding used for cross-chunk deduplication"""
+        label = "|".join(str(finding.get(field, "")) for field in FINDING_LABEL_FIELDS)
+        text = finding_text(agent_type, finding)
+        return re.sub(r"[^a-z0-9]+", " ", f"{label} {text}".lower()).strip()
+
+    async def _complete_json(
+        self, agent_type: str, prompt: str, temperature: float
+    ) -> Dict[str, Any]:
+        """
+        Run a JSON-mode completion through the shared LLM gateway with retries
+
+        The model is chosen by the shared model router from the agent type and
+        prompt size. The output is validated against the agent's schema and
+        repaired locally where possible (services.agent_schemas); only output
+        that cannot be repaired is sent back to the model with the error, up
+        to settings.AGENT_OUTPUT_MAX_REQUERIES times. The model, token usage
+        of every call, repairs and re-queries are recorded in the result's
+        metadata.
+        """
+        route = model_router.route(agent_type, count_tokens(prompt, settings.OPENAI_MODEL))
+        messages = [{"role": "user", "content": prompt}]
+        usage = None
+
+        for requery in range(settings.AGENT_OUTPUT_MAX_REQUERIES + 1):
+            async def attempt():
+                return await llm_gateway.chat_completion(
+                    self.backend,
+                    model=route.model,
+                    messages=messages,
+                    response_format={"type": "json_object"},
+                    temperature=temperature,
+                )
+
+            completion = await resilient_call(attempt, key=f"agent:{agent_type}")
+            usage = add_usage(usage, completion_usage(completion))
+            raw = completion.choices[0].message.content or "{}"
+            try:
+                result, repairs = parse_agent_output(agent_type, raw)
+                break
+            except AgentOutputError as e:
+                if requery == settings.AGENT_OUTPUT_MAX_REQUERIES:
+                    raise
+                logger.warning(f"{agent_type} output failed validation ({e}), re-querying")
+                messages = messages[:1] + [
+                    {"role": "assistant", "content": raw[:2000]},
+                    {
+                        "role": "user",
+                        "content": f"That output was invalid: {e}. "
+                        "Reply with only the JSON object in the requested format.",
+                    },
+                ]
+
+        if repairs:
+            result["metadata"]["schemaRepairs"] = repairs
+        if requery:
+            result["metadata"]["requeries"] = requery
+        result["metadata"]["tokenUsage"] = usage
+        result["metadata"]["model"] = route.model
+        result["metadata"]["modelFallback"] = route.fallback
+        return result
+
     async def _create_parser_agent(
-        self, content: str, file_name: str
+        self, content: str, file_name: str, context: Optional[Dict[str, Any]] = None
     ) -> Dict[str, Any]:
         """Parser Agent - Extracts structured data from financial documents"""
         prompt = f"""You are a Document Parser Agent specialized in extracting structured data from financial documents.
 
 Document: {file_name}
-Content: {content[:4000]}
+Content: {content}
 
 Extract and structure:
 1. Document metadata (type, date, company)
@@ -147,26 +1005,27 @@ Return JSON with:
   }}
 }}"""
 
-        completion = await openai_client.chat.completions.create(
-            model=settings.OPENAI_MODEL,
-            messages=[{"role": "user", "content": prompt}],
-            response_format={"type": "json_object"},
-            temperature=0.1,
-        )
-
-        return json.loads(completion.choices[0].message.content or "{}")
+        return await self._complete_json("parser", prompt, temperature=0.1)
 
     async def _create_analyzer_agent(
-        self, content: str, file_name: str
+        self, content: str, file_name: str, context: Optional[Dict[str, Any]] = None
     ) -> Dict[str, Any]:
-        """Analyzer Agent - Calculates KPIs and financial ratios"""
-        prompt = f"""You are a Financial Analyzer Agent that computes KPIs and performs trend analysis.
+        """Analyzer Agent - Interprets KPIs and financial ratios"""
+        financials = (context or {}).get("financials")
+        computed = ""
+        if financials is not None and financials["periods"]:
+            computed = f"""
+Line items and ratios computed locally from the statements (already computed - use these exact values and interpret them, do not recompute):
+{format_financials(financials)}
+"""
 
-Document: {file_name}
-Content: {content[:4000]}
+        prompt = f"""You are a Financial Analyzer Agent that interprets KPIs and performs trend analysis.
 
-Analyze and calculate:
-1. Key financial ratios (ROE, ROI, D/E, Current Ratio, etc.)
+Document: {file_name}
+Content: {content}
+{computed}
+Analyze:
+1. Key financial ratios (ROE, ROI, D/E, Current Ratio, etc.) - report the computed values when provided and only calculate ratios they do not cover
 2. Year-over-year trends
 3. Performance metrics
 4. Risk indicators
@@ -189,23 +1048,19 @@ Return JSON with:
   }}
 }}"""
 
-        completion = await openai_client.chat.completions.create(
-            model=settings.OPENAI_MODEL,
-            messages=[{"role": "user", "content": prompt}],
-            response_format={"type": "json_object"},
-            temperature=0.1,
-        )
-
-        return json.loads(completion.choices[0].message.content or "{}")
+        result = await self._complete_json("analyzer", prompt, temperature=0.1)
+        if financials is not None and isinstance(result.get("metadata"), dict):
+            result["metadata"]["financials"] = financials
+        return result
 
     async def _create_compliance_agent(
-        self, content: str, file_name: str
+        self, content: str, file_name: str, context: Optional[Dict[str, Any]] = None
     ) -> Dict[str, Any]:
         """Compliance Agent - Validates regulatory compliance"""
         prompt = f"""You are a Compliance Agent validating adherence to financial regulations.
 
 Document: {file_name}
-Content: {content[:4000]}
+Content: {content}
 
 Check compliance with:
 1. IFRS (International Financial Reporting Standards)
@@ -232,32 +1087,40 @@ Return JSON with:
   }}
 }}"""
 
-        completion = await openai_client.chat.completions.create(
-            model=settings.OPENAI_MODEL,
-            messages=[{"role": "user", "content": prompt}],
-            response_format={"type": "json_object"},
-            temperature=0.1,
-        )
-
-        return json.loads(completion.choices[0].message.content or "{}")
+        return await self._complete_json("compliance", prompt, temperature=0.1)
 
     async def _create_fraud_agent(
-        self, content: str, file_name: str
+        self, content: str, file_name: str, context: Optional[Dict[str, Any]] = None
     ) -> Dict[str, Any]:
         """Fraud Detection Agent - Identifies financial irregularities"""
+        forensics = (context or {}).get("forensics")
+        # Too few amounts score 0 without being screened, so they never skip the LLM
+        if (
+            forensics is not None
+            and forensics["amountsAnalyzed"] >= FORENSIC_MIN_SAMPLES
+            and forensics["riskScore"] < settings.FORENSIC_SKIP_THRESHOLD
+        ):
+            return self._local_fraud_result(forensics)
+
+        forensic_summary = ""
+        if forensics is not None:
+            forensic_summary = f"""
+Local forensic pre-screen of every amount in the document (already computed - interpret it, do not recompute):
+{format_summary(forensics)}
+"""
+
         prompt = f"""You are a Fraud Detection Agent specialized in identifying financial irregularities.
 
 Document: {file_name}
-Content: {content[:4000]}
-
+Content: {content}
+{forensic_summary}
 Detect:
 1. Revenue manipulation patterns
 2. Expense misclassification
 3. Hidden liabilities
 4. Undisclosed related-party transactions
-5. Round number bias
-6. Duplicate entries
-7. Unusual financial patterns
+5. Round number bias and duplicate entries (use the forensic pre-screen when provided)
+6. Unusual financial patterns
 
 Return JSON with:
 {{
@@ -277,24 +1140,61 @@ Return JSON with:
   }}
 }}"""
 
-        completion = await openai_client.chat.completions.create(
-            model=settings.OPENAI_MODEL,
-            messages=[{"role": "user", "content": prompt}],
-            response_format={"type": "json_object"},
-            temperature=0.1,
-        )
+        result = await self._complete_json("fraud", prompt, temperature=0.1)
+        if forensics is not None and isinstance(result.get("metadata"), dict):
+            result["metadata"]["forensics"] = forensics
+        return result
 
-        return json.loads(completion.choices[0].message.content or "{}")
+    def _local_fraud_result(self, forensics: Dict[str, Any]) -> Dict[str, Any]:
+        """Fraud agent result built from the forensic pre-screen alone (no LLM call)"""
+        return {
+            "findings": [
+                {
+                    "type": "forensic pre-screen",
+                    "description": flag,
+                    "severity": "low",
+                    "evidence": "Local numeric analysis of document amounts",
+                    "confidence": 0.6,
+                }
+                for flag in forensics["flags"]
+            ],
+            "confidence": 0.7,
+            "metadata": {
+                "redFlagsFound": len(forensics["flags"]),
+                "riskScore": forensics["riskScore"],
+                "llmSkipped": True,
+                "forensics": forensics,
+            },
+        }
 
     async def _create_alert_agent(
-        self, content: str, file_name: str
+        self, content: str, file_name: str, context: Optional[Dict[str, Any]] = None
     ) -> Dict[str, Any]:
         """Alert Agent - Generates actionable alerts"""
+        upstream = (context or {}).get("upstream") or {}
+        if settings.AGENT_SHORT_CIRCUIT_ENABLED and upstream and self._alert_unnecessary(upstream):
+            return {
+                "findings": [],
+                "confidence": min(
+                    float(upstream[agent_type].get("confidence", 0) or 0)
+                    for agent_type in ("fraud", "compliance")
+                ),
+                "metadata": {"alertsGenerated": 0, "criticalAlerts": 0, "shortCircuited": True},
+            }
+
+        upstream_summary = ""
+        upstream_findings = self._upstream_findings(upstream, ("fraud", "compliance"))
+        if upstream_findings:
+            upstream_summary = f"""
+Findings from the Fraud Detection and Compliance agents (already verified - turn them into alerts, do not re-derive them):
+{upstream_findings}
+"""
+
         prompt = f"""You are an Alert Agent that generates actionable notifications for critical issues.
 
 Document: {file_name}
-Content: {content[:4000]}
-
+Content: {content}
+{upstream_summary}
 Generate alerts for:
 1. Critical compliance violations
 2. High-risk fraud indicators
@@ -321,23 +1221,16 @@ Return JSON with:
   }}
 }}"""
 
-        completion = await openai_client.chat.completions.create(
-            model=settings.OPENAI_MODEL,
-            messages=[{"role": "user", "content": prompt}],
-            response_format={"type": "json_object"},
-            temperature=0.2,
-        )
-
-        return json.loads(completion.choices[0].message.content or "{}")
+        return await self._complete_json("alert", prompt, temperature=0.2)
 
     async def _create_insight_agent(
-        self, content: str, file_name: str
+        self, content: str, file_name: str, context: Optional[Dict[str, Any]] = None
     ) -> Dict[str, Any]:
         """Insight Agent - Creates plain-language summaries and recommendations"""
         prompt = f"""You are an Insight Agent that creates plain-language summaries and actionable recommendations.
 
 Document: {file_name}
-Content: {content[:4000]}
+Content: {content}
 
 Provide:
 1. Executive summary (2-3 sentences)
@@ -363,24 +1256,11 @@ Return JSON with:
   }}
 }}"""
 
-        completion = await openai_client.chat.completions.create(
-            model=settings.OPENAI_MODEL,
-            messages=[{"role": "user", "content": prompt}],
-            response_format={"type": "json_object"},
-            temperature=0.3,
-        )
-
-        return json.loads(completion.choices[0].message.content or "{}")
+        return await self._complete_json("insight", prompt, temperature=0.3)
 
     def _calculate_overall_risk(self, agent_results: List[Dict]) -> str:
         """Calculate overall risk level from all agent findings"""
-        risk_scores = {
-            "info": 0,
-            "low": 25,
-            "medium": 50,
-            "high": 75,
-            "critical": 100,
-        }
+        risk_scores = SEVERITY_SCORES
 
         total_score = 0
         count = 0
@@ -417,7 +1297,7 @@ Return JSON with:
             # Get high-confidence, high-priority findings
             for finding in findings[:3]:  # Top 3 from each agent
                 if finding.get("confidence", 0) > 0.7:
-                    content = finding.get("content") or finding.get("description") or finding.get("insight", "")
+                    content = finding_text(agent_type, finding)
                     if content:
                         key_findings.append(f"[{agent_type.upper()}] {content}")
 
@@ -0,0 +1,216 @@
+"""
+Prompt Compactor - Shrinks document text and data payloads before they are sent to an LLM
+"""
+import json
+import re
+from collections import Counter
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+
+from services.token_counter import count_tokens, truncate_tokens
+
+# Whole-line boilerplate carrying no analytical information
+BOILERPLATE_PATTERNS = [
+    re.compile(pattern, re.IGNORECASE)
+    for pattern in (
+        r"page\s+\d+(?:\s+of\s+\d+)?",
+        r"-\s*\d+\s*-",
+        r"(?:this page )?(?:has been )?intentionally left blank\.?",
+        r"(?:©|\(c\)|copyright\b).*",
+        r"(?:strictly )?(?:private (?:and|&) )?confidential\.?",
+        r"(?:for internal use only|all rights reserved)\.?",
+        r"[\s\-=_*~#.]{3,}",
+    )
+]
+TABLE_OF_CONTENTS = re.compile(r"(?:table of )?contents:?", re.IGNORECASE)
+TOC_ENTRY = re.compile(r".{2,100}?(?:\s*\.{2,}\s*|\s{2,})\d{1,3}")
+
+# Lines repeated this often (running headers and footers) are kept only once
+REPEATED_LINE_MIN = 3
+REPEATED_LINE_MIN_CHARS = 10
+
+DOT_LEADER = re.compile(r"(?<=\S)\s*\.{3,}\s*(?=\S)")
+PIPE_SEPARATOR = re.compile(r"^\|?\s*:?-{2,}:?\s*(?:\|\s*:?-{2,}:?\s*)*\|?$")
+COLUMN_GAP = re.compile(r"\t+|\s{2,}")
+NUMERIC_CELL = re.compile(r"^[(\-$€£₹¥]*\s?\d[\d,.]*%?\)?[KMBkmb]?$")
+YEAR_CELL = re.compile(r"^(?:FY\s?)?(?:19|20)\d{2}$", re.IGNORECASE)
+
+
+@dataclass
+class CompactionResult:
+    """Compacted text with before/after token counts"""
+
+    text: str
+    original_tokens: int
+    compacted_tokens: int
+
+    @property
+    def tokens_saved(self) -> int:
+        return self.original_tokens - self.compacted_tokens
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "originalTokens": self.original_tokens,
+            "compactedTokens": self.compacted_tokens,
+            "tokensSaved": self.tokens_saved,
+        }
+
+
+def drop_boilerplate(lines: List[str]) -> List[str]:
+    """Remove page furniture, tables of contents and repeated headers/footers"""
+    counts = Counter(
+        line.strip() for line in lines if len(line.strip()) >= REPEATED_LINE_MIN_CHARS
+    )
+    repeated = {line for line, count in counts.items() if count >= REPEATED_LINE_MIN}
+    seen_repeated = set()
+
+    kept = []
+    in_toc = False
+    for line in lines:
+        stripped = line.strip()
+        if in_toc:
+            if not stripped or TOC_ENTRY.fullmatch(stripped):
+                continue
+            in_toc = False
+
+        if TABLE_OF_CONTENTS.fullmatch(stripped):
+            in_toc = True
+            continue
+        if stripped and any(pattern.fullmatch(stripped) for pattern in BOILERPLATE_PATTERNS):
+            continue
+        if stripped in repeated:
+            if stripped in seen_repeated:
+                continue
+            seen_repeated.add(stripped)
+        kept.append(line)
+    return kept
+
+
+def _cells(line: str) -> List[str]:
+    stripped = line.strip()
+    if "|" in stripped:
+        return [cell.strip() for cell in stripped.strip("|").split("|")]
+    return [cell for cell in COLUMN_GAP.split(stripped) if cell]
+
+
+def _is_table_row(line: str) -> bool:
+    stripped = line.strip()
+    if stripped.count("|") >= 2:
+        return True
+    cells = _cells(line)
+    return len(cells) >= 2 and any(NUMERIC_CELL.match(cell) for cell in cells[1:])
+
+
+def _format_row(cells: List[str], header: Optional[List[str]]) -> str:
+    label, values = cells[0], cells[1:]
+    if header and len(header) == len(values):
+        pairs = [f"{name}={value}" for name, value in zip(header, values) if value]
+    else:
+        pairs = [value for value in values if value]
+    return f"{label}: {'; '.join(pairs)}" if label else "; ".join(pairs)
+
+
+def _is_header(line: str, first_row: List[str]) -> bool:
+    """Whether line labels the value columns of a table starting with first_row"""
+    cells = _cells(line)
+    return len(cells) >= 2 and len(cells) in (len(first_row) - 1, len(first_row))
+
+
+def collapse_tables(lines: List[str]) -> List[str]:
+    """
+    Rewrite pipe-delimited and column-aligned tables as dense key=value rows
+
+    "Revenue    $8.75M    $6.84M" under a "2024    2023" header becomes
+    "Revenue: 2024=$8.75M; 2023=$6.84M". A first row of years after a caption
+    ("BALANCE SHEET    2024    2023") is also a header, and its caption is
+    kept as a line of its own. Dot leaders ("Revenue ..... $8.75M") become
+    "Revenue: $8.75M".
+    """
+    output: List[str] = []
+    i = 0
+    while i < len(lines):
+        if not _is_table_row(lines[i]):
+            output.append(DOT_LEADER.sub(": ", lines[i]))
+            i += 1
+            continue
+
+        end = i
+        while end < len(lines) and (
+            _is_table_row(lines[end]) or PIPE_SEPARATOR.match(lines[end].strip())
+        ):
+            end += 1
+        rows = [
+            _cells(line) for line in lines[i:end] if not PIPE_SEPARATOR.match(line.strip())
+        ]
+        if len(rows) < 2:
+            # A lone numeric line is prose, not a table
+            output.append(lines[i])
+            i = end
+            continue
+
+        header = None
+        if "|" in lines[i] and i + 1 < end and PIPE_SEPARATOR.match(lines[i + 1].strip()):
+            header = rows.pop(0)
+        elif lines[i][:1].isspace() and _is_header(lines[i], rows[1]):
+            # Indented first row over the value columns, e.g. "        2024    2023"
+            header = rows.pop(0)
+        elif all(YEAR_CELL.match(cell) for cell in rows[0][1:]):
+            # Year columns after a caption, e.g. "BALANCE SHEET    2024    2023"
+            header = rows.pop(0)
+            if not YEAR_CELL.match(header[0]):
+                output.append(header.pop(0))
+        elif output and output[-1].strip() and _is_header(output[-1], rows[0]):
+            header = _cells(output.pop())
+        if header is not None and len(header) == len(rows[0]):
+            # Drop the caption over the label column
+            header = header[1:]
+
+        output.extend(_format_row(cells, header) for cells in rows)
+        i = end
+    return output
+
+
+def normalize_whitespace(text: str) -> str:
+    """Collapse runs of spaces and blank lines and strip line ends"""
+    lines = [re.sub(r"[^\S\n]+", " ", line).strip() for line in text.splitlines()]
+    return re.sub(r"\n{3,}", "\n\n", "\n".join(lines)).strip()
+
+
+def compact_text(
+    text: str, max_tokens: Optional[int] = None, model: Optional[str] = None
+) -> CompactionResult:
+    """
+    Compact document text for a prompt
+
+    Drops boilerplate, collapses tables, normalizes whitespace and, when
+    max_tokens is given, truncates to that many tokens.
+
+    Args:
+        text: Document text
+        max_tokens: Token budget for the result (None = unbounded)
+        model: Model whose tokenizer is used
+
+    Returns:
+        CompactionResult with the compacted text and token counts
+    """
+    lines = collapse_tables(drop_boilerplate(text.splitlines()))
+    compacted = normalize_whitespace("\n".join(lines))
+    if max_tokens is not None:
+        compacted = truncate_tokens(compacted, max_tokens, model)
+    return CompactionResult(compacted, count_tokens(text, model), count_tokens(compacted, model))
+
+
+def prune_empty(data: Any) -> Any:
+    """Recursively drop None, empty strings and empty containers"""
+    if isinstance(data, dict):
+        pruned = {key: prune_empty(value) for key, value in data.items()}
+        return {key: value for key, value in pruned.items() if value not in (None, "", [], {})}
+    if isinstance(data, (list, tuple)):
+        pruned = [prune_empty(value) for value in data]
+        return [value for value in pruned if value not in (None, "", [], {})]
+    return data
+
+
+def compact_json(data: Any) -> str:
+    """Serialize a payload for a prompt without indentation or empty values"""
+    return json.dumps(prune_empty(data), separators=(",", ":"), ensure_ascii=False, default=str)
@@ -1,24 +1,102 @@
 """
 Report Generation Service - Generates 7 types of government-compliant reports
 """
+import asyncio
 import json
-from typing import Dict, Any, Optional
+import time
+from contextvars import ContextVar
+from typing import AsyncIterator, Dict, Any, List, Optional, Tuple
 from datetime import datetime
-from openai import AsyncOpenAI
+from config.database import SessionLocal
 from config.settings import settings
+from services.llm_backend import LLMBackend, get_llm_backend
+from services.llm_gateway import llm_gateway
+from services.llm_resilience import resilient_call
+from services.model_router import model_router
+from services.prompt_compactor import compact_json
+from services.monte_carlo import load_history, run_simulation
+from services.report_sections import (
+    render_compliance_status,
+    render_simulation,
+    render_statements,
+    render_table,
+)
+from services.token_counter import add_usage, completion_usage, count_tokens
+from services.result_cache import ResultCache, make_cache_key
+from services.single_flight import SingleFlight
 import logging
 
 logger = logging.getLogger(__name__)
 
-# Initialize OpenAI client
-openai_client = AsyncOpenAI(api_key=settings.OPENAI_API_KEY)
+# Token usage accumulated by the report currently being generated
+_report_usage: ContextVar[Optional[Dict[str, int]]] = ContextVar("report_usage", default=None)
+
+# Route of the report currently being generated and the models that served it
+_report_routing: ContextVar[Optional[Dict[str, Any]]] = ContextVar("report_routing", default=None)
+
+# Prompt compaction savings accumulated by the report currently being generated
+_report_compaction: ContextVar[Optional[Dict[str, int]]] = ContextVar(
+    "report_compaction", default=None
+)
+
+# Queue receiving markdown deltas while a report is generated in streaming mode
+_report_stream: ContextVar[Optional[asyncio.Queue]] = ContextVar("report_stream", default=None)
+
+# Serialized data sections shared by the reports of a bundle, by id() of the
+# section: (section, prompt text, original tokens, compacted tokens)
+_shared_payloads: ContextVar[Optional[Dict[int, Tuple[Any, str, int, int]]]] = ContextVar(
+    "shared_payloads", default=None
+)
+
+# Report template versions - bump a report's version whenever its prompt changes
+# so that only that report type's cached reports are invalidated
+REPORT_TEMPLATE_VERSIONS = {
+    "investor_memo": "2",
+    "audit_summary": "2",
+    "board_deck": "2",
+    "compliance_report": "2",
+    "risk_report": "3",
+    "tax_filing": "2",
+    "sec_filing": "2",
+}
+REPORT_TYPES = tuple(REPORT_TEMPLATE_VERSIONS)
+
+
+class ReportStreamInterrupted(Exception):
+    """A report stream failed after content was sent, so it cannot be retried"""
 
 
 class ReportGenerator:
     """Generates professional financial reports using AI"""
 
+    def __init__(
+        self,
+        backend: Optional[LLMBackend] = None,
+        cache: Optional[ResultCache] = None,
+    ):
+        self._backend = backend
+        if cache is None and settings.REPORT_CACHE_ENABLED:
+            cache = ResultCache(
+                "reports",
+                max_entries=settings.REPORT_CACHE_MAX_ENTRIES,
+                ttl_seconds=settings.REPORT_CACHE_TTL_SECONDS,
+                redis_url=settings.REDIS_URL if settings.REPORT_CACHE_USE_REDIS else None,
+            )
+        self.cache = cache
+        # Invalidation generations ("*", "org:<id>", "type:<report type>") are
+        # counters of the cache (shared through Redis when it is used), part of
+        # every key
+        self.single_flight = SingleFlight("reports")
+
+    @property
+    def backend(self) -> LLMBackend:
+        """LLM backend used for report generation (settings.LLM_BACKEND by default)"""
+        if self._backend is None:
+            self._backend = get_llm_backend()
+        return self._backend
+
     async def generate_report(
-        self, report_type: str, data: Dict[str, Any]
+        self, report_type: str, data: Dict[str, Any], organization_id: Optional[int] = None
     ) -> Dict[str, Any]:
         """
         Generate a financial report based on type and data
@@ -26,34 +104,411 @@ class ReportGenerator:
         Args:
             report_type: Type of report to generate
             data: Data for the report
+            organization_id: Organization the report is for (scopes the cache)
+
+        Reports are cached by organization, type, data, model and template
+        version (settings.REPORT_CACHE_ENABLED), and concurrent calls with the
+        same key share one in-flight generation (settings.COALESCING_ENABLED).
 
         Returns:
-            Generated report with content and metadata
+            Generated report with content, metadata, tokenUsage, the model
+            that served it, cacheHit and (with
+            settings.PROMPT_COMPACTION_ENABLED) compaction savings
         """
-        logger.info(f"Generating report: {report_type}")
+        key = await self._cache_key(report_type, data, organization_id)
+        if not settings.COALESCING_ENABLED:
+            return await self._cached_report(key, report_type, data)
 
-        report_generators = {
-            "investor_memo": self._generate_investor_memo,
-            "audit_summary": self._generate_audit_summary,
-            "board_deck": self._generate_board_deck,
-            "compliance_report": self._generate_compliance_report,
-            "risk_report": self._generate_risk_report,
-            "tax_filing": self._generate_tax_filing,
-            "sec_filing": self._generate_sec_filing,
+        return await self.single_flight.do(
+            key, lambda: self._cached_report(key, report_type, data)
+        )
+
+    async def _cache_key(
+        self, report_type: str, data: Dict[str, Any], organization_id: Optional[int]
+    ) -> str:
+        """Key of a report: what it is built from and the invalidation generations"""
+        generations: Any = None
+        if self.cache is not None:
+            generations = await self.cache.counters(
+                [f"generation:{scope}" for scope in ("*", f"org:{organization_id}", f"type:{report_type}")]
+            )
+        return make_cache_key(
+            "report",
+            report_type,
+            organization_id,
+            data,
+            model_router.signature(f"report:{report_type}"),
+            REPORT_TEMPLATE_VERSIONS.get(report_type),
+            settings.PROMPT_COMPACTION_ENABLED,
+            generations,
+        )
+
+    async def _cached_report(
+        self, key: str, report_type: str, data: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        """Serve a report from the cache, or generate and cache it"""
+        if self.cache is not None:
+            cached = await self.cache.get(key)
+            if cached is not None:
+                logger.info(f"Report cache hit: {report_type}")
+                cached["cacheHit"] = True
+                return cached
+
+        report = await self._generate_report(report_type, data)
+        report["cacheHit"] = False
+        # Reports served by the load-fallback model are not cached
+        if self.cache is not None and not report["modelFallback"]:
+            await self.cache.set(key, report)
+        return report
+
+    async def invalidate_cache(
+        self, organization_id: Optional[int] = None, report_type: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        Invalidate cached reports of an organization and/or report type
+
+        With neither, every cached report is invalidated. Invalidated entries
+        are no longer reachable and age out of the cache. With
+        settings.REPORT_CACHE_USE_REDIS the generations live in Redis, so the
+        invalidation reaches every worker and survives restarts.
+
+        Returns:
+            The invalidated scopes
+        """
+        scopes = []
+        if organization_id is not None:
+            scopes.append(f"org:{organization_id}")
+        if report_type is not None:
+            scopes.append(f"type:{report_type}")
+        if self.cache is not None:
+            for scope in scopes or ["*"]:
+                await self.cache.increment(f"generation:{scope}")
+        logger.info(f"Invalidated cached reports: {', '.join(scopes or ['all'])}")
+        return {"scopes": scopes or ["*"]}
+
+    def cache_stats(self) -> Optional[Dict[str, Any]]:
+        """Report cache hit/miss counters (None when the cache is disabled)"""
+        return self.cache.stats() if self.cache is not None else None
+
+    async def generate_bundle(
+        self,
+        report_types: List[str],
+        data: Dict[str, Any],
+        organization_id: Optional[int] = None,
+    ) -> Dict[str, Any]:
+        """
+        Generate several reports from the same data concurrently
+
+        Every data section is serialized (and compacted) once and the same
+        text is reused by each report's prompt. The reports run concurrently
+        through generate_report(), so they share the LLM gateway's concurrency
+        limit, the report cache and request coalescing. A failed report does
+        not fail the bundle.
+
+        Args:
+            report_types: Report types to generate (duplicates are ignored)
+            data: Data for the reports
+            organization_id: Organization the reports are for
+
+        Returns:
+            Bundle with one {"reportType", "status", "report" | "error"} entry
+            per report type, succeeded/failed counts, the summed tokenUsage and
+            elapsedMs
+
+        Raises:
+            ValueError: for an unknown report type, before anything is generated
+        """
+        report_types = list(dict.fromkeys(report_types))
+        unknown = [report_type for report_type in report_types if report_type not in REPORT_TYPES]
+        if unknown:
+            raise ValueError(f"Unknown report type: {', '.join(unknown)}")
+
+        start = time.perf_counter()
+        payloads: Dict[int, Tuple[Any, str, int, int]] = {}
+        payload_token = _shared_payloads.set(payloads)
+        try:
+            # Build the shared context up front; the report tasks copy this context
+            for section in data.values():
+                self._shared_payload(section, payloads)
+            tasks = [
+                asyncio.ensure_future(self.generate_report(report_type, data, organization_id))
+                for report_type in report_types
+            ]
+        finally:
+            _shared_payloads.reset(payload_token)
+
+        outcomes = await asyncio.gather(*tasks, return_exceptions=True)
+
+        reports = []
+        token_usage = add_usage(None, None)
+        for report_type, outcome in zip(report_types, outcomes):
+            if isinstance(outcome, BaseException):
+                logger.error(f"Bundle report {report_type} failed: {str(outcome)}")
+                reports.append({"reportType": report_type, "status": "failed", "error": str(outcome)})
+                continue
+            if not outcome["cacheHit"]:
+                token_usage = add_usage(token_usage, outcome["tokenUsage"])
+            reports.append({"reportType": report_type, "status": "success", "report": outcome})
+
+        succeeded = sum(1 for report in reports if report["status"] == "success")
+        return {
+            "reports": reports,
+            "succeeded": succeeded,
+            "failed": len(reports) - succeeded,
+            "sharedSections": len(payloads),
+            "tokenUsage": token_usage,
+            "elapsedMs": round((time.perf_counter() - start) * 1000, 1),
         }
 
-        if report_type not in report_generators:
+    async def _generate_report(
+        self, report_type: str, data: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        """Run generate_report() without request coalescing"""
+        logger.info(f"Generating report: {report_type}")
+
+        if report_type not in REPORT_TYPES:
             raise ValueError(f"Unknown report type: {report_type}")
 
-        content = await report_generators[report_type](data)
+        usage_token = _report_usage.set(add_usage(None, None))
+        routing_token = _report_routing.set({"route": f"report:{report_type}", "calls": []})
+        compaction_token = _report_compaction.set(
+            {"originalTokens": 0, "compactedTokens": 0, "tokensSaved": 0}
+        )
+        try:
+            content = await getattr(self, f"_generate_{report_type}")(data)
+            token_usage = _report_usage.get()
+            models = _report_routing.get()["calls"]
+            compaction = _report_compaction.get()
+        finally:
+            _report_usage.reset(usage_token)
+            _report_routing.reset(routing_token)
+            _report_compaction.reset(compaction_token)
 
         return {
             "reportType": report_type,
             "content": content,
             "generatedAt": datetime.utcnow().isoformat(),
             "format": "markdown",
+            "tokenUsage": token_usage,
+            "model": models[-1].model if models else None,
+            "modelFallback": any(route.fallback for route in models),
+            "compaction": compaction if settings.PROMPT_COMPACTION_ENABLED else None,
         }
 
+    async def generate_report_stream(
+        self, report_type: str, data: Dict[str, Any], organization_id: Optional[int] = None
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Generate a report, yielding its markdown as it is produced
+
+        Runs the same generation as generate_report() with the completion
+        streamed; a cached report is sent as a single chunk. Streams are not
+        coalesced, since each caller needs its own deltas.
+
+        Yields:
+            {"event": "chunk", "data": {"content": markdown delta}} events,
+            then one {"event": "complete", "data": report} event whose data is
+            the generate_report() result without the content (reportType,
+            generatedAt, tokenUsage, model, ...)
+
+        Raises:
+            ValueError: for an unknown report type, before anything is yielded
+        """
+        if report_type not in REPORT_TYPES:
+            raise ValueError(f"Unknown report type: {report_type}")
+
+        key = await self._cache_key(report_type, data, organization_id)
+        queue: asyncio.Queue = asyncio.Queue()
+        stream_token = _report_stream.set(queue)
+        try:
+            # The task copies the current context, so its completions stream into queue
+            task = asyncio.ensure_future(self._cached_report(key, report_type, data))
+        finally:
+            _report_stream.reset(stream_token)
+
+        try:
+            while True:
+                delta = asyncio.ensure_future(queue.get())
+                await asyncio.wait({delta, task}, return_when=asyncio.FIRST_COMPLETED)
+                if not delta.done():
+                    delta.cancel()
+                    break
+                yield {"event": "chunk", "data": {"content": delta.result()}}
+
+            while not queue.empty():
+                yield {"event": "chunk", "data": {"content": queue.get_nowait()}}
+            report = task.result()
+            if report["cacheHit"]:
+                yield {"event": "chunk", "data": {"content": report["content"]}}
+            yield {
+                "event": "complete",
+                "data": {key: value for key, value in report.items() if key != "content"},
+            }
+        finally:
+            if not task.done():
+                task.cancel()
+
+    def _payload(self, data: Any) -> str:
+        """
+        Serialize report data for a prompt
+
+        With settings.PROMPT_COMPACTION_ENABLED the data is sent as compact
+        JSON with empty values dropped, and the tokens saved against the
+        indented form are added to the current report's compaction stats.
+        Within generate_bundle() each section is serialized only once.
+        """
+        payloads = _shared_payloads.get()
+        if payloads is not None:
+            _, text, original_tokens, compacted_tokens = self._shared_payload(data, payloads)
+        elif not settings.PROMPT_COMPACTION_ENABLED:
+            return json.dumps(data, indent=2, default=str)
+        else:
+            text = compact_json(data)
+            original_tokens = count_tokens(json.dumps(data, indent=2, default=str), settings.OPENAI_MODEL)
+            compacted_tokens = count_tokens(text, settings.OPENAI_MODEL)
+
+        stats = _report_compaction.get()
+        if stats is not None and settings.PROMPT_COMPACTION_ENABLED:
+            stats["originalTokens"] += original_tokens
+            stats["compactedTokens"] += compacted_tokens
+            stats["tokensSaved"] += original_tokens - compacted_tokens
+        return text
+
+    def _shared_payload(
+        self, data: Any, payloads: Dict[int, Tuple[Any, str, int, int]]
+    ) -> Tuple[Any, str, int, int]:
+        """Serialize a bundle data section once, memoized in payloads"""
+        shared = payloads.get(id(data))
+        if shared is None:
+            indented = json.dumps(data, indent=2, default=str)
+            if settings.PROMPT_COMPACTION_ENABLED:
+                text = compact_json(data)
+                shared = (
+                    data,
+                    text,
+                    count_tokens(indented, settings.OPENAI_MODEL),
+                    count_tokens(text, settings.OPENAI_MODEL),
+                )
+            else:
+                shared = (data, indented, 0, 0)
+            # The section itself is kept so its id() cannot be reused
+            payloads[id(data)] = shared
+        return shared
+
+    async def _complete(self, system_prompt: str, prompt: str, temperature: float) -> str:
+        """
+        Run a markdown completion through the shared LLM gateway with retries
+
+        In streaming mode (generate_report_stream) the completion is streamed
+        and each delta is put on the stream's queue as it arrives; the full
+        text is returned either way.
+        """
+        routing = _report_routing.get()
+        route = model_router.route(
+            routing["route"] if routing is not None else "report",
+            count_tokens(system_prompt + prompt, settings.OPENAI_MODEL),
+        )
+        if routing is not None:
+            routing["calls"].append(route)
+
+        request = {
+            "model": route.model,
+            "messages": [
+                {"role": "system", "content": system_prompt},
+                {"role": "user", "content": prompt},
+            ],
+            "temperature": temperature,
+        }
+        queue = _report_stream.get()
+
+        async def attempt():
+            completion = await llm_gateway.chat_completion(self.backend, **request)
+            return completion_usage(completion), completion.choices[0].message.content or ""
+
+        # Set once a delta has been queued: the client has it, so no attempt may
+        # start over (it would send the report again from the beginning)
+        streamed = False
+
+        async def stream_attempt():
+            nonlocal streamed
+            if streamed:
+                raise ReportStreamInterrupted("Report stream failed after content was sent")
+            parts = []
+            usage = None
+            try:
+                async for chunk in llm_gateway.chat_completion_stream(self.backend, **request):
+                    if chunk.usage is not None:
+                        usage = completion_usage(chunk)
+                    delta = chunk.choices[0].delta.content if chunk.choices else None
+                    if delta:
+                        parts.append(delta)
+                        streamed = True
+                        queue.put_nowait(delta)
+            except asyncio.CancelledError:
+                raise
+            except BaseException as e:
+                # Any failure after the first delta (timeouts included) is final
+                if streamed:
+                    raise ReportStreamInterrupted(
+                        f"Report stream failed: {str(e) or type(e).__name__}"
+                    ) from e
+                raise
+            content = "".join(parts)
+            if usage is None:
+                # Backends that do not report streaming usage are estimated
+                prompt_tokens = count_tokens(system_prompt + prompt, route.model)
+                completion_tokens = count_tokens(content, route.model)
+                usage = {
+                    "promptTokens": prompt_tokens,
+                    "completionTokens": completion_tokens,
+                    "totalTokens": prompt_tokens + completion_tokens,
+                    "calls": 1,
+                }
+            return usage, content
+
+        # Reports are long and expensive, so they are retried but never hedged;
+        # streams are only retried until their first delta has been sent
+        # (ReportStreamInterrupted is not retryable)
+        call_usage, content = await resilient_call(
+            stream_attempt if queue is not None else attempt, key="report", hedge=False
+        )
+        usage = _report_usage.get()
+        if usage is not None:
+            # Updated in place so calls made from child tasks are counted too
+            usage.update(add_usage(usage, call_usage))
+        return content
+
+    async def _compose(
+        self,
+        system_prompt: str,
+        prompt: str,
+        temperature: float,
+        sections: List[str],
+    ) -> str:
+        """
+        Complete a report's narrative and append its locally rendered sections
+
+        Data-driven sections (report_sections) are not sent to the LLM to
+        write; the prompt names them so they are left out of the narrative,
+        and they are appended verbatim, with exact figures, after it. In
+        streaming mode they follow the narrative's deltas as one chunk.
+        """
+        sections = [section for section in sections if section]
+        if sections:
+            titles = ", ".join(section.splitlines()[0].lstrip("# ") for section in sections)
+            prompt += (
+                "\n\nWrite only the narrative sections listed above. These sections are"
+                " rendered from the data with exact figures and appended to your report,"
+                f" so do not write them or restate their tables: {titles}."
+            )
+
+        narrative = await self._complete(system_prompt, prompt, temperature)
+        appendix = "".join(f"\n\n{section}" for section in sections)
+        queue = _report_stream.get()
+        if queue is not None and appendix:
+            queue.put_nowait(appendix)
+        return narrative + appendix
+
     async def _generate_investor_memo(self, data: Dict[str, Any]) -> str:
         """Generate professional investor memo"""
         company_data = data.get("companyData", {})
@@ -63,34 +518,26 @@ class ReportGenerator:
         prompt = f"""Generate a professional investor memo for {company_data.get('name', 'Company')}.
 
 Financial Data:
-{json.dumps(financial_data, indent=2)}
+{self._payload(financial_data)}
 
 Analysis Results:
-{json.dumps(analysis_findings, indent=2)}
+{self._payload(analysis_findings)}
 
 Create a comprehensive investor memo with:
 1. Executive Summary
 2. Financial Performance Analysis
-3. Key Metrics & Ratios
-4. Risk Assessment
-5. Investment Recommendation
+3. Risk Assessment
+4. Investment Recommendation
 
 Format as professional business document in markdown."""
 
-        completion = await openai_client.chat.completions.create(
-            model=settings.OPENAI_MODEL,
-            messages=[
-                {
-                    "role": "system",
-                    "content": "You are a financial analyst creating professional investor memos.",
-                },
-                {"role": "user", "content": prompt},
-            ],
+        return await self._compose(
+            "You are a financial analyst creating professional investor memos.",
+            prompt,
             temperature=0.3,
+            sections=[render_table("Key Metrics & Ratios", financial_data)],
         )
 
-        return completion.choices[0].message.content or ""
-
     async def _generate_audit_summary(self, data: Dict[str, Any]) -> str:
         """Generate government-compliant audit summary"""
         compliance_checks = data.get("complianceStatus", {})
@@ -99,35 +546,29 @@ Format as professional business document in markdown."""
         prompt = f"""Generate a government-compliant audit summary report.
 
 Compliance Status:
-{json.dumps(compliance_checks, indent=2)}
+{self._payload(compliance_checks)}
 
 Audit Findings:
-{json.dumps(audit_findings, indent=2)}
+{self._payload(audit_findings)}
 
 Create a comprehensive audit summary with:
 1. Executive Summary
-2. Compliance Status (IFRS, GAAP, SOX, SEBI)
-3. Fraud Risk Assessment
-4. Key Findings & Issues
-5. Recommendations
-6. Required Actions
+2. Fraud Risk Assessment
+3. Key Findings & Issues
+4. Recommendations
+5. Required Actions
 
 Follow government audit standards 2024. Format as professional audit report in markdown."""
 
-        completion = await openai_client.chat.completions.create(
-            model=settings.OPENAI_MODEL,
-            messages=[
-                {
-                    "role": "system",
-                    "content": "You are an audit professional creating formal government-compliant audit reports.",
-                },
-                {"role": "user", "content": prompt},
-            ],
+        return await self._compose(
+            "You are an audit professional creating formal government-compliant audit reports.",
+            prompt,
             temperature=0.2,
+            sections=[
+                render_compliance_status(compliance_checks, "Compliance Status (IFRS, GAAP, SOX, SEBI)"),
+            ],
         )
 
-        return completion.choices[0].message.content or ""
-
     async def _generate_board_deck(self, data: Dict[str, Any]) -> str:
         """Generate board presentation deck"""
         executive_summary = data.get("executiveSummary", "")
@@ -140,35 +581,27 @@ Executive Summary:
 {executive_summary}
 
 Key Metrics:
-{json.dumps(key_metrics, indent=2)}
+{self._payload(key_metrics)}
 
 Strategic Initiatives:
-{json.dumps(strategic_initiatives, indent=2)}
+{self._payload(strategic_initiatives)}
 
 Create a comprehensive board deck with:
 1. Executive Summary
 2. Financial Performance Dashboard
-3. Key Metrics & KPIs
-4. Strategic Initiatives
-5. Risks & Opportunities
-6. Recommendations
+3. Strategic Initiatives
+4. Risks & Opportunities
+5. Recommendations
 
 Format as presentation slides in markdown."""
 
-        completion = await openai_client.chat.completions.create(
-            model=settings.OPENAI_MODEL,
-            messages=[
-                {
-                    "role": "system",
-                    "content": "You are a senior executive creating board presentations.",
-                },
-                {"role": "user", "content": prompt},
-            ],
+        return await self._compose(
+            "You are a senior executive creating board presentations.",
+            prompt,
             temperature=0.3,
+            sections=[render_table("Key Metrics & KPIs", key_metrics, label_header="KPI")],
         )
 
-        return completion.choices[0].message.content or ""
-
     async def _generate_compliance_report(self, data: Dict[str, Any]) -> str:
         """Generate regulatory compliance report"""
         compliance_status = data.get("complianceStatus", {})
@@ -177,76 +610,97 @@ Format as presentation slides in markdown."""
         prompt = f"""Generate a regulatory compliance report for IFRS/GAAP/SOX/SEBI.
 
 Compliance Status:
-{json.dumps(compliance_status, indent=2)}
+{self._payload(compliance_status)}
 
 Audit Findings:
-{json.dumps(audit_findings, indent=2)}
+{self._payload(audit_findings)}
 
 Create a comprehensive compliance report with:
 1. Regulatory Compliance Summary
-2. IFRS/GAAP Compliance Status
-3. SOX Compliance Review
-4. SEBI Requirements
-5. ESG Disclosure Review
-6. Audit Findings & Recommendations
+2. SOX Compliance Review
+3. SEBI Requirements
+4. ESG Disclosure Review
+5. Audit Findings & Recommendations
 
 Format as professional compliance report in markdown."""
 
-        completion = await openai_client.chat.completions.create(
-            model=settings.OPENAI_MODEL,
-            messages=[
-                {
-                    "role": "system",
-                    "content": "You are a compliance officer creating regulatory reports.",
-                },
-                {"role": "user", "content": prompt},
-            ],
+        return await self._compose(
+            "You are a compliance officer creating regulatory reports.",
+            prompt,
             temperature=0.2,
+            sections=[render_compliance_status(compliance_status, "IFRS/GAAP Compliance Status")],
         )
 
-        return completion.choices[0].message.content or ""
-
     async def _generate_risk_report(self, data: Dict[str, Any]) -> str:
         """Generate comprehensive risk assessment report with Monte Carlo simulations"""
         risk_analysis = data.get("riskAnalysis", {})
         predictions = data.get("predictions", {})
         monte_carlo = data.get("monteCarloResults", {})
+        if not monte_carlo and settings.MONTE_CARLO_ENABLED:
+            monte_carlo = await asyncio.to_thread(self._simulate_risk, data) or {}
 
         prompt = f"""Generate a comprehensive risk assessment report with predictive analytics.
 
 Risk Analysis:
-{json.dumps(risk_analysis, indent=2)}
+{self._payload(risk_analysis)}
 
 Predictions:
-{json.dumps(predictions, indent=2)}
+{self._payload(predictions)}
 
 Monte Carlo Simulation Results:
-{json.dumps(monte_carlo, indent=2)}
+{self._payload(monte_carlo)}
 
 Create a detailed risk report with:
 1. Executive Summary
 2. Risk Category Analysis (Credit, Market, Operational, Liquidity)
 3. Predictive Scenarios
-4. Monte Carlo Simulation Results
-5. Value at Risk (VaR) Analysis
-6. Stress Test Results
-7. Risk Mitigation Recommendations
+4. Value at Risk (VaR) Analysis
+5. Stress Test Results
+6. Risk Mitigation Recommendations
 
 Format as professional risk assessment report in markdown."""
 
-        completion = await openai_client.chat.completions.create(
-            model=settings.OPENAI_MODEL,
-            messages=[
-                {
-                    "role": "system",
-                    "content": "You are a risk management expert creating detailed risk assessment reports.",
-                },
-                {"role": "user", "content": prompt},
-            ],
+        return await self._compose(
+            "You are a risk management expert creating detailed risk assessment reports.",
+            prompt,
             temperature=0.2,
+            sections=[render_simulation(monte_carlo)],
         )
 
-        return completion.choices[0].message.content or ""
+    def _simulate_risk(self, data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """
+        Run the Monte Carlo engine for a risk report without monteCarloResults
+
+        The history is data["financialHistory"] (FinancialMetrics-style dicts)
+        or the stored FinancialMetrics of data["companyData"]["name"] (or
+        data["companyName"]); data["monteCarloConfig"] may set paths,
+        horizonYears, seed, liquidityThreshold and startingLiquidity.
+        A failed simulation is logged and the report is written without it.
+        """
+        config = data.get("monteCarloConfig") or {}
+        history = data.get("financialHistory")
+        company_name = (data.get("companyData") or {}).get("name") or data.get("companyName")
+        try:
+            if not history and company_name:
+                db = SessionLocal()
+                try:
+                    history = load_history(db, company_name)
+                finally:
+                    db.close()
+            if not history:
+                logger.info("No financial history for a Monte Carlo simulation")
+                return None
+            return run_simulation(
+                history,
+                paths=config.get("paths"),
+                horizon_years=config.get("horizonYears"),
+                seed=config.get("seed"),
+                liquidity_threshold=config.get("liquidityThreshold", 0.0),
+                starting_liquidity=config.get("startingLiquidity"),
+            )
+        except Exception as e:
+            logger.error(f"Monte Carlo simulation failed: {str(e)}")
+            return None
 
     async def _generate_tax_filing(self, data: Dict[str, Any]) -> str:
         """Generate IRS/government-compliant tax filing report"""
@@ -257,32 +711,30 @@ Format as professional risk assessment report in markdown."""
 
 Tax Year: {tax_year}
 Financial Data:
-{json.dumps(financial_data, indent=2)}
+{self._payload(financial_data)}
 
 Create a comprehensive tax filing report with:
 1. Tax Summary Overview
-2. Income Statement for Tax Purposes
-3. Deductions and Credits
-4. Tax Liability Calculation
-5. Payment Schedule
-6. Supporting Documentation Requirements
+2. Deductions and Credits
+3. Tax Liability Calculation
+4. Payment Schedule
+5. Supporting Documentation Requirements
 
 Follow IRS and government tax filing standards. Format as official tax document in markdown."""
 
-        completion = await openai_client.chat.completions.create(
-            model=settings.OPENAI_MODEL,
-            messages=[
-                {
-                    "role": "system",
-                    "content": "You are a certified tax professional creating government-compliant tax filing documents.",
-                },
-                {"role": "user", "content": prompt},
-            ],
+        return await self._compose(
+            "You are a certified tax professional creating government-compliant tax filing documents.",
+            prompt,
             temperature=0.1,
+            sections=[
+                render_table(
+                    f"Income Statement for Tax Purposes (Tax Year {tax_year})",
+                    financial_data,
+                    label_header="Line item",
+                ),
+            ],
         )
 
-        return completion.choices[0].message.content or ""
-
     async def _generate_sec_filing(self, data: Dict[str, Any]) -> str:
         """Generate SEC filing (10-K/10-Q) compliant report"""
         company_data = data.get("companyData", {})
@@ -292,32 +744,30 @@ Follow IRS and government tax filing standards. Format as official tax document
         prompt = f"""Generate an SEC filing ({filing_type}) compliant report.
 
 Company Data:
-{json.dumps(company_data, indent=2)}
+{self._payload(company_data)}
 
 Filing Type: {filing_type}
 Fiscal Period: {fiscal_period}
 
 Create a comprehensive SEC filing with:
-1. Cover Page and Filing Information
-2. Business Overview
-3. Risk Factors
-4. Financial Statements (Balance Sheet, Income Statement, Cash Flow)
-5. Management Discussion & Analysis (MD&A)
-6. Controls and Procedures
-7. Certifications
+1. Business Overview
+2. Risk Factors
+3. Management Discussion & Analysis (MD&A)
+4. Controls and Procedures
+5. Certifications
 
 Follow SEC EDGAR filing standards. Format as official SEC document in markdown."""
 
-        completion = await openai_client.chat.completions.create(
-            model=settings.OPENAI_MODEL,
-            messages=[
-                {
-                    "role": "system",
-                    "content": "You are a securities lawyer creating SEC-compliant filing documents.",
-                },
-                {"role": "user", "content": prompt},
-            ],
+        filing_information = {
+            key: value for key, value in company_data.items() if not isinstance(value, dict)
+        }
+        filing_information.update(filingType=filing_type, fiscalPeriod=fiscal_period)
+        return await self._compose(
+            "You are a securities lawyer creating SEC-compliant filing documents.",
+            prompt,
             temperature=0.1,
+            sections=[
+                render_table("Cover Page and Filing Information", filing_information, label_header="Field"),
+                render_statements(company_data),
+            ],
         )
-
-        return completion.choices[0].message.content or ""
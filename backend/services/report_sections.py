@@ -0,0 +1,237 @@
+"""
+Report Sections - Data-driven report sections rendered locally with Jinja2
+
+Tables of figures (metrics, compliance status, filing details, tax figures,
+simulation results) are rendered from the report data so their numbers are
+exact; only the narrative sections of a report are written by the LLM.
+"""
+import re
+from typing import Any, Dict, Iterable, List, Tuple
+
+from jinja2 import DictLoader, Environment, StrictUndefined
+
+# Nesting depth flattened into "Parent / Child" row labels
+MAX_DEPTH = 3
+# List items shown before the rest are summarized as "... (N more)"
+MAX_LIST_ITEMS = 10
+
+CAMEL_BOUNDARY = re.compile(r"(?<=[a-z0-9])(?=[A-Z])|_+")
+
+TEMPLATES = {
+    "table.md.j2": """\
+## {{ title }}
+
+| {{ label_header }} | Value |
+|---|---|
+{% for label, value in rows %}
+| {{ label | cell }} | {{ value | cell }} |
+{% endfor %}
+""",
+    "compliance.md.j2": """\
+## {{ title }}
+
+| Framework | Status | Details |
+|---|---|---|
+{% for framework, status, details in rows %}
+| {{ framework | cell }} | {{ status | cell }} | {{ details | cell }} |
+{% endfor %}
+""",
+    "statements.md.j2": """\
+## {{ title }}
+{% for statement, rows in statements %}
+
+### {{ statement }}
+
+| Line item | Value |
+|---|---|
+{% for label, value in rows %}
+| {{ label | cell }} | {{ value | cell }} |
+{% endfor %}
+{% endfor %}
+""",
+    "simulation.md.j2": """\
+## {{ title }}
+
+{{ results.paths | number }} simulated paths over {{ results.horizonYears }} years \
+(seed {{ results.seed }}), calibrated on {{ results.assumptions.historyYears }} years of history.
+
+| Assumption | Value |
+|---|---|
+{% for label, value in assumptions %}
+| {{ label | cell }} | {{ value | cell }} |
+{% endfor %}
+
+### Percentile Bands
+
+| Series | Year | P5 | P25 | P50 | P75 | P95 |
+|---|---|---|---|---|---|---|
+{% for series, years in results.percentiles.items() %}
+{% for year, band in years.items() %}
+| {{ series | humanize }} | {{ year }} | {{ band.p5 | number }} | {{ band.p25 | number }} \
+| {{ band.p50 | number }} | {{ band.p75 | number }} | {{ band.p95 | number }} |
+{% endfor %}
+{% endfor %}
+
+### Cumulative Cash Flow at Risk
+
+Expected cumulative cash flow: {{ results.cumulativeCashFlow.expected | number }}
+
+| Confidence | Value at Risk | Expected Shortfall (CVaR) |
+|---|---|---|
+{% for level, value in results.cumulativeCashFlow.valueAtRisk.items() %}
+| {{ level }} | {{ value | number }} | {{ results.cumulativeCashFlow.expectedShortfall[level] | number }} |
+{% endfor %}
+
+### Breach Probability
+
+| Event | Probability |
+|---|---|
+| Liquidity below {{ results.breachProbability.liquidityThreshold | number }} \
+| {{ results.breachProbability.liquidity | percent }} |
+| Negative annual cash flow | {{ results.breachProbability.negativeCashFlow | percent }} |
+""",
+}
+
+
+def humanize(key: Any) -> str:
+    """'netProfitMargin' / 'net_profit_margin' -> 'Net Profit Margin'"""
+    words = CAMEL_BOUNDARY.sub(" ", str(key)).split()
+    return " ".join(word[:1].upper() + word[1:] for word in words)
+
+
+def format_value(value: Any) -> str:
+    """A data value as table text, with numbers shown exactly as given"""
+    if isinstance(value, bool):
+        return "Yes" if value else "No"
+    if isinstance(value, (int, float)):
+        return f"{value:,}"
+    if isinstance(value, (list, tuple)):
+        items = [format_value(item) for item in value[:MAX_LIST_ITEMS]]
+        if len(value) > MAX_LIST_ITEMS:
+            items.append(f"... ({len(value) - MAX_LIST_ITEMS} more)")
+        return ", ".join(items)
+    if isinstance(value, dict):
+        return "; ".join(f"{humanize(key)}: {format_value(item)}" for key, item in value.items())
+    return str(value)
+
+
+def _cell(value: Any) -> str:
+    """Escape text for a markdown table cell"""
+    return " ".join(str(value).split()).replace("|", "\\|")
+
+
+def _is_empty(value: Any) -> bool:
+    return value is None or value == "" or value == [] or value == {}
+
+
+def flatten_rows(data: Any, prefix: str = "", depth: int = 0) -> List[Tuple[str, str]]:
+    """
+    (label, value) table rows for a data section
+
+    Nested dicts become "Parent / Child" labels up to MAX_DEPTH, lists of
+    dicts are numbered, and empty values are skipped.
+    """
+    if isinstance(data, dict):
+        items: Iterable[Tuple[str, Any]] = ((humanize(key), value) for key, value in data.items())
+    elif isinstance(data, list) and any(isinstance(item, dict) for item in data):
+        items = ((f"Item {index}", value) for index, value in enumerate(data, 1))
+    else:
+        return [] if _is_empty(data) else [(prefix or "Value", format_value(data))]
+
+    rows = []
+    for label, value in items:
+        if _is_empty(value):
+            continue
+        label = f"{prefix} / {label}" if prefix else label
+        if isinstance(value, (dict, list)) and depth + 1 < MAX_DEPTH and (
+            isinstance(value, dict) or any(isinstance(item, dict) for item in value)
+        ):
+            rows.extend(flatten_rows(value, label, depth + 1))
+        else:
+            rows.append((label, format_value(value)))
+    return rows
+
+
+_environment = Environment(
+    loader=DictLoader(TEMPLATES),
+    autoescape=False,
+    trim_blocks=True,
+    lstrip_blocks=True,
+    undefined=StrictUndefined,
+)
+_environment.filters["cell"] = _cell
+_environment.filters["number"] = format_value
+_environment.filters["humanize"] = humanize
+_environment.filters["percent"] = lambda value: f"{value:.2%}"
+
+
+def _render(template: str, **context: Any) -> str:
+    return _environment.get_template(template).render(**context).strip()
+
+
+def render_table(title: str, data: Any, label_header: str = "Metric") -> str:
+    """A "## title" section with a label/value table, or "" without data"""
+    rows = flatten_rows(data)
+    if not rows:
+        return ""
+    return _render("table.md.j2", title=title, label_header=label_header, rows=rows)
+
+
+def render_compliance_status(data: Any, title: str = "Compliance Status") -> str:
+    """
+    A framework/status/details table, or "" without data
+
+    Each framework's value is either its status or a dict with a "status"
+    (or "compliant") field whose other fields become the details.
+    """
+    if not isinstance(data, dict):
+        return render_table(title, data, label_header="Framework")
+
+    rows = []
+    for framework, value in data.items():
+        if _is_empty(value):
+            continue
+        if isinstance(value, dict):
+            details = dict(value)
+            status = details.pop("status", None)
+            if status is None and "compliant" in details:
+                status = "Compliant" if details.pop("compliant") else "Non-compliant"
+            details = {key: item for key, item in details.items() if not _is_empty(item)}
+            status = format_value(status) if status is not None else "-"
+            rows.append((humanize(framework), status, format_value(details)))
+        else:
+            rows.append((humanize(framework), format_value(value), ""))
+    if not rows:
+        return ""
+    return _render("compliance.md.j2", title=title, rows=rows)
+
+
+def render_statements(data: Dict[str, Any], title: str = "Financial Statements") -> str:
+    """One table per nested dict of data (balance sheet, income statement, ...)"""
+    statements = [
+        (humanize(key), flatten_rows(value))
+        for key, value in data.items()
+        if isinstance(value, dict) and not _is_empty(value)
+    ]
+    statements = [(name, rows) for name, rows in statements if rows]
+    if not statements:
+        return ""
+    return _render("statements.md.j2", title=title, statements=statements)
+
+
+def render_simulation(results: Any, title: str = "Monte Carlo Simulation Results") -> str:
+    """
+    Percentile bands, cash flow at risk and breach probabilities of
+    monte_carlo.run_simulation() results; other results as a plain table
+    """
+    required = ("paths", "percentiles", "cumulativeCashFlow", "breachProbability", "assumptions")
+    if not isinstance(results, dict) or any(key not in results for key in required):
+        return render_table(title, results, label_header="Result")
+    assumptions = flatten_rows(
+        {
+            key: value
+            for key, value in results["assumptions"].items()
+            if key not in ("historyYears", "baseYear")
+        }
+    )
+    return _render("simulation.md.j2", title=title, results=results, assumptions=assumptions)
@@ -0,0 +1,238 @@
+"""
+Result Cache - Two-tier cache (in-process LRU + optional Redis) for AI results
+"""
+import copy
+import hashlib
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+try:
+    import redis.asyncio as aioredis
+except ImportError:  # pragma: no cover - redis is optional at runtime
+    aioredis = None
+
+logger = logging.getLogger(__name__)
+
+# How long to stop talking to Redis after a connection/command failure
+REDIS_RETRY_AFTER_SECONDS = 30
+
+
+def content_hash(content: str) -> str:
+    """Return a stable SHA-256 hex digest of a text payload"""
+    return hashlib.sha256(content.encode("utf-8", errors="replace")).hexdigest()
+
+
+def make_cache_key(*parts: Any) -> str:
+    """
+    Build a content-addressed cache key from arbitrary JSON-serializable parts
+
+    Args:
+        parts: Values that together identify a cached result
+
+    Returns:
+        SHA-256 hex digest of the canonical JSON encoding of the parts
+    """
+    canonical = json.dumps(parts, sort_keys=True, separators=(",", ":"), default=str)
+    return content_hash(canonical)
+
+
+class LRUCache:
+    """Thread-safe in-process LRU cache with per-entry TTL"""
+
+    def __init__(self, max_entries: int = 256, ttl_seconds: float = 3600):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Any]:
+        """Return a cached value, or None if missing or expired"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                return None
+
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: Any, ttl_seconds: Optional[float] = None):
+        """Store a value, evicting the least recently used entries when full"""
+        ttl = self.ttl_seconds if ttl_seconds is None else ttl_seconds
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def delete(self, key: str):
+        """Remove a single entry"""
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        """Remove all entries"""
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class ResultCache:
+    """
+    Two-tier result cache
+
+    Values must be JSON-serializable. Lookups hit the in-process LRU first and
+    fall back to Redis (when configured), promoting Redis hits into memory.
+    Redis failures are logged and treated as misses so the cache never breaks
+    the request path.
+
+    Counters (e.g. invalidation generations to fold into keys) are shared
+    through Redis as well, and kept in process while Redis is off or failing.
+    """
+
+    def __init__(
+        self,
+        namespace: str,
+        max_entries: int = 256,
+        ttl_seconds: int = 3600,
+        redis_url: Optional[str] = None,
+    ):
+        self.namespace = namespace
+        self.ttl_seconds = ttl_seconds
+        self.memory = LRUCache(max_entries=max_entries, ttl_seconds=ttl_seconds)
+        self.redis_url = redis_url if aioredis is not None else None
+        self._redis = None
+        self._redis_disabled_until = 0.0
+        self._counters: Dict[str, int] = {}
+        self._counters_lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _redis_key(self, key: str) -> str:
+        return f"finsight:{self.namespace}:{key}"
+
+    def _get_redis(self):
+        """Lazily create the Redis client, honouring the failure back-off"""
+        if not self.redis_url or time.monotonic() < self._redis_disabled_until:
+            return None
+        if self._redis is None:
+            self._redis = aioredis.from_url(
+                self.redis_url,
+                socket_timeout=0.5,
+                socket_connect_timeout=0.5,
+            )
+        return self._redis
+
+    def _redis_failed(self, error: Exception):
+        logger.warning(f"Result cache Redis tier unavailable: {str(error)}")
+        self._redis_disabled_until = time.monotonic() + REDIS_RETRY_AFTER_SECONDS
+
+    async def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """
+        Look up a cached value
+
+        Args:
+            key: Cache key (see make_cache_key)
+
+        Returns:
+            A copy of the cached value, or None on a miss
+        """
+        value = self.memory.get(key)
+
+        if value is None:
+            client = self._get_redis()
+            if client is not None:
+                try:
+                    raw = await client.get(self._redis_key(key))
+                    if raw is not None:
+                        value = json.loads(raw)
+                        self.memory.set(key, value)
+                except Exception as e:
+                    self._redis_failed(e)
+
+        if value is None:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        return copy.deepcopy(value)
+
+    async def set(self, key: str, value: Dict[str, Any]):
+        """Store a value in both tiers"""
+        value = copy.deepcopy(value)
+        self.memory.set(key, value)
+
+        client = self._get_redis()
+        if client is not None:
+            try:
+                await client.set(
+                    self._redis_key(key),
+                    json.dumps(value, default=str),
+                    ex=self.ttl_seconds,
+                )
+            except Exception as e:
+                self._redis_failed(e)
+
+    async def delete(self, key: str):
+        """Remove a value from both tiers"""
+        self.memory.delete(key)
+
+        client = self._get_redis()
+        if client is not None:
+            try:
+                await client.delete(self._redis_key(key))
+            except Exception as e:
+                self._redis_failed(e)
+
+    async def counters(self, names: List[str]) -> Tuple[str, List[int]]:
+        """
+        Current values of counters (0 when never incremented)
+
+        Returns:
+            ("redis" or "local", values); values from the two tiers are not
+            comparable, so keys built from them should include the tier
+        """
+        client = self._get_redis()
+        if client is not None:
+            try:
+                raw = await client.mget([self._redis_key(f"counter:{name}") for name in names])
+                return "redis", [int(value) if value is not None else 0 for value in raw]
+            except Exception as e:
+                self._redis_failed(e)
+        with self._counters_lock:
+            return "local", [self._counters.get(name, 0) for name in names]
+
+    async def increment(self, name: str) -> int:
+        """Increment a counter in both tiers; returns the shared value when Redis is up"""
+        with self._counters_lock:
+            value = self._counters[name] = self._counters.get(name, 0) + 1
+
+        client = self._get_redis()
+        if client is not None:
+            try:
+                return int(await client.incr(self._redis_key(f"counter:{name}")))
+            except Exception as e:
+                self._redis_failed(e)
+        return value
+
+    def stats(self) -> Dict[str, Any]:
+        """Return hit/miss counters for monitoring"""
+        total = self.hits + self.misses
+        return {
+            "namespace": self.namespace,
+            "entries": len(self.memory),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hitRate": round(self.hits / total, 4) if total else 0,
+            "redisEnabled": bool(self.redis_url),
+        }
@@ -0,0 +1,81 @@
+"""
+Single Flight - Coalesces concurrent identical requests onto one in-flight task
+"""
+import asyncio
+import copy
+import logging
+from typing import Any, Awaitable, Callable, Dict
+
+logger = logging.getLogger(__name__)
+
+# Every SingleFlight group by name, for metrics
+_groups: Dict[str, "SingleFlight"] = {}
+
+
+class SingleFlight:
+    """
+    Run at most one task per key; concurrent callers with the same key await it
+
+    The shared work runs in its own task and callers await it through
+    asyncio.shield, so a cancelled caller never cancels the work other callers
+    (or a later cache write) depend on. Every caller receives its own deep copy
+    of the result.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self._in_flight: Dict[str, asyncio.Task] = {}
+        self.total_calls = 0
+        self.total_executions = 0
+        self.total_coalesced = 0
+        _groups[name] = self
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Await fn() for key, sharing an identical in-flight call if there is one
+
+        Args:
+            key: Request identity (e.g. a make_cache_key() digest)
+            fn: Zero-argument callable returning the awaitable to run
+
+        Returns:
+            A deep copy of the shared result
+        """
+        self.total_calls += 1
+        task = self._in_flight.get(key)
+
+        if task is None or task.get_loop() is not asyncio.get_running_loop():
+            self.total_executions += 1
+            task = asyncio.ensure_future(fn())
+            self._in_flight[key] = task
+            task.add_done_callback(lambda done, key=key: self._forget(key, done))
+        else:
+            self.total_coalesced += 1
+            logger.info(
+                f"Coalesced {self.name} request onto in-flight {key[:12]} "
+                f"({self.total_coalesced} coalesced so far)"
+            )
+
+        result = await asyncio.shield(task)
+        return copy.deepcopy(result)
+
+    def _forget(self, key: str, task: asyncio.Task):
+        if self._in_flight.get(key) is task:
+            del self._in_flight[key]
+        if not task.cancelled() and task.exception() is not None:
+            # Retrieved here so an error nobody is still awaiting is not reported as unhandled
+            logger.debug(f"{self.name} in-flight {key[:12]} failed: {task.exception()}")
+
+    def metrics(self) -> Dict[str, Any]:
+        return {
+            "inFlight": len(self._in_flight),
+            "totalCalls": self.total_calls,
+            "totalExecutions": self.total_executions,
+            "totalCoalesced": self.total_coalesced,
+            "coalescedRatio": round(self.total_coalesced / self.total_calls, 4) if self.total_calls else 0,
+        }
+
+
+def single_flight_metrics() -> Dict[str, Dict[str, Any]]:
+    """Metrics for every SingleFlight group in the process"""
+    return {name: group.metrics() for name, group in _groups.items()}
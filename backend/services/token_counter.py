@@ -0,0 +1,207 @@
+"""
+Token Counter - Tokenizer helpers for prompt sizing
+"""
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Tuple
+
+try:
+    import tiktoken
+except ImportError:  # pragma: no cover - tiktoken is optional at runtime
+    tiktoken = None
+
+logger = logging.getLogger(__name__)
+
+# Rough characters-per-token ratio used when no tokenizer is available
+CHARS_PER_TOKEN = 4
+DEFAULT_ENCODING = "o200k_base"
+
+# Token counts are cached by content hash; shorter texts are cheaper to re-encode
+TOKEN_COUNT_CACHE_SIZE = 4096
+TOKEN_COUNT_CACHE_MIN_CHARS = 256
+TRIM_MARKER = "\n...[content trimmed to fit the token budget]...\n"
+
+_token_counts: "OrderedDict[tuple, int]" = OrderedDict()
+_token_counts_lock = threading.Lock()
+
+
+class TokenBudgetExceeded(ValueError):
+    """Raised when a prompt exceeds its token budget and cannot be trimmed"""
+
+
+@lru_cache(maxsize=16)
+def get_encoding(model: Optional[str] = None):
+    """
+    Get the tiktoken encoding for a model
+
+    Args:
+        model: OpenAI model name
+
+    Returns:
+        tiktoken Encoding, or None if tiktoken or its BPE files are unavailable
+    """
+    if tiktoken is None:
+        return None
+
+    try:
+        if model:
+            return tiktoken.encoding_for_model(model)
+    except KeyError:
+        pass
+    except Exception as e:
+        logger.warning(f"Failed to load tokenizer for {model}: {str(e)}")
+        return None
+
+    try:
+        return tiktoken.get_encoding(DEFAULT_ENCODING)
+    except Exception as e:
+        logger.warning(f"Failed to load tokenizer {DEFAULT_ENCODING}: {str(e)}")
+        return None
+
+
+def count_tokens(text: str, model: Optional[str] = None) -> int:
+    """
+    Count tokens in text, falling back to a character estimate
+
+    Counts for longer texts are cached by content hash so the same document,
+    section or prompt is only encoded once.
+    """
+    encoding = get_encoding(model)
+    if encoding is None:
+        return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+    if len(text) < TOKEN_COUNT_CACHE_MIN_CHARS:
+        return len(encoding.encode(text, disallowed_special=()))
+
+    key = (encoding.name, hashlib.sha256(text.encode("utf-8", errors="replace")).digest())
+    with _token_counts_lock:
+        count = _token_counts.get(key)
+        if count is not None:
+            _token_counts.move_to_end(key)
+            return count
+
+    count = len(encoding.encode(text, disallowed_special=()))
+    with _token_counts_lock:
+        _token_counts[key] = count
+        while len(_token_counts) > TOKEN_COUNT_CACHE_SIZE:
+            _token_counts.popitem(last=False)
+    return count
+
+
+def split_by_tokens(text: str, max_tokens: int, model: Optional[str] = None) -> List[str]:
+    """Hard-split text into pieces of at most max_tokens tokens"""
+    encoding = get_encoding(model)
+    if encoding is None:
+        step = max_tokens * CHARS_PER_TOKEN
+        return [text[i:i + step] for i in range(0, len(text), step)]
+
+    tokens = encoding.encode(text, disallowed_special=())
+    return [
+        encoding.decode(tokens[i:i + max_tokens])
+        for i in range(0, len(tokens), max_tokens)
+    ]
+
+
+def truncate_tokens(text: str, max_tokens: int, model: Optional[str] = None) -> str:
+    """Keep the first max_tokens tokens of text"""
+    if count_tokens(text, model) <= max_tokens:
+        return text
+
+    encoding = get_encoding(model)
+    if encoding is None:
+        return text[:max_tokens * CHARS_PER_TOKEN]
+    return encoding.decode(encoding.encode(text, disallowed_special=())[:max_tokens])
+
+
+def trim_middle(text: str, max_tokens: int, model: Optional[str] = None) -> str:
+    """
+    Trim text to max_tokens by removing its middle
+
+    The head (document header, context) and tail (instructions, output schema)
+    of a prompt carry the most weight, so three quarters of the budget goes to
+    the head and the rest to the tail.
+    """
+    budget = max_tokens - count_tokens(TRIM_MARKER, model)
+    if budget <= 0:
+        raise TokenBudgetExceeded(f"Cannot trim text to {max_tokens} tokens")
+
+    head_tokens = budget * 3 // 4
+    tail_tokens = budget - head_tokens
+    encoding = get_encoding(model)
+    if encoding is None:
+        head = text[:head_tokens * CHARS_PER_TOKEN]
+        tail = text[-tail_tokens * CHARS_PER_TOKEN:] if tail_tokens else ""
+        return f"{head}{TRIM_MARKER}{tail}"
+
+    tokens = encoding.encode(text, disallowed_special=())
+    head = encoding.decode(tokens[:head_tokens])
+    tail = encoding.decode(tokens[-tail_tokens:]) if tail_tokens else ""
+    return f"{head}{TRIM_MARKER}{tail}"
+
+
+def fit_to_budget(
+    messages: List[Dict[str, Any]],
+    max_prompt_tokens: int,
+    model: Optional[str] = None,
+    policy: str = "trim",
+) -> Tuple[List[Dict[str, Any]], int]:
+    """
+    Enforce a prompt token ceiling on chat messages before they are sent
+
+    Args:
+        messages: Chat messages
+        max_prompt_tokens: Ceiling (0 disables the check)
+        model: Model whose tokenizer is used
+        policy: "trim" to cut the longest message from the middle, or "reject"
+
+    Returns:
+        (messages to send, number of tokens trimmed)
+
+    Raises:
+        TokenBudgetExceeded: if policy is "reject" or trimming cannot fit
+    """
+    if max_prompt_tokens <= 0:
+        return messages, 0
+
+    counts = [count_tokens(str(m.get("content") or ""), model) for m in messages]
+    total = sum(counts)
+    if total <= max_prompt_tokens:
+        return messages, 0
+
+    if policy == "reject":
+        raise TokenBudgetExceeded(
+            f"Prompt has {total} tokens, exceeding the budget of {max_prompt_tokens}"
+        )
+
+    excess = total - max_prompt_tokens
+    longest = max(range(len(messages)), key=lambda i: counts[i])
+    trimmed = trim_middle(
+        str(messages[longest].get("content") or ""), counts[longest] - excess, model
+    )
+
+    fitted = list(messages)
+    fitted[longest] = {**messages[longest], "content": trimmed}
+    return fitted, excess
+
+
+def completion_usage(completion: Any) -> Dict[str, int]:
+    """Extract prompt/completion/total token counts from a chat completion"""
+    usage = getattr(completion, "usage", None)
+    prompt_tokens = getattr(usage, "prompt_tokens", 0) or 0
+    completion_tokens = getattr(usage, "completion_tokens", 0) or 0
+    return {
+        "promptTokens": prompt_tokens,
+        "completionTokens": completion_tokens,
+        "totalTokens": getattr(usage, "total_tokens", None) or prompt_tokens + completion_tokens,
+        "calls": 1,
+    }
+
+
+def add_usage(total: Optional[Dict[str, int]], usage: Optional[Dict[str, int]]) -> Dict[str, int]:
+    """Sum two token usage dicts (as returned by completion_usage)"""
+    result = dict(total or {"promptTokens": 0, "completionTokens": 0, "totalTokens": 0, "calls": 0})
+    for key, value in (usage or {}).items():
+        result[key] = result.get(key, 0) + (value or 0)
+    return result
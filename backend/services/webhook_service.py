@@ -7,10 +7,10 @@ import json
 import logging
 from typing import Dict, Any, List
 from datetime import datetime
-import httpx
 from sqlalchemy.orm import Session
 
 from models.webhook import Webhook
+from services.http_clients import get_http_client
 
 logger = logging.getLogger(__name__)
 
@@ -97,22 +97,21 @@ class WebhookService:
                 "X-Webhook-Event": event_type
             }
 
-            async with httpx.AsyncClient() as client:
-                response = await client.post(
-                    webhook.url,
-                    json=webhook_payload,
-                    headers=headers,
-                    timeout=30.0
-                )
+            response = await get_http_client().post(
+                webhook.url,
+                json=webhook_payload,
+                headers=headers,
+                timeout=30.0
+            )
 
-                if response.status_code == 200:
-                    logger.info(f"Webhook sent successfully to {webhook.url}")
-                    return True
-                else:
-                    logger.warning(
-                        f"Webhook failed with status {response.status_code}: {webhook.url}"
-                    )
-                    return False
+            if response.status_code == 200:
+                logger.info(f"Webhook sent successfully to {webhook.url}")
+                return True
+            else:
+                logger.warning(
+                    f"Webhook failed with status {response.status_code}: {webhook.url}"
+                )
+                return False
 
         except Exception as e:
             logger.error(f"Failed to send webhook to {webhook.url}: {str(e)}")
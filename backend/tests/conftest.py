@@ -0,0 +1,17 @@
+"""
+Test configuration - required settings for importing the backend offline
+"""
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+# The shared engine is pooled, which needs a file-backed SQLite database
+os.environ.setdefault(
+    "DATABASE_URL", f"sqlite:///{Path(tempfile.gettempdir()) / 'finsight-tests.db'}"
+)
+os.environ.setdefault("OPENAI_API_KEY", "test")
+os.environ.setdefault("SECRET_KEY", "test-secret-key-0123456789abcdef")
+os.environ.setdefault("LLM_BACKEND", "stub")
@@ -0,0 +1,94 @@
+"""
+Tests for the analysis job queue's leases
+"""
+import asyncio
+import json
+from datetime import datetime, timedelta
+
+import pytest
+
+import models  # noqa: F401 - registers every table for create_all
+from config.database import Base, SessionLocal, engine
+from models.document import Document, DocumentStatus
+from services.analysis_jobs import AnalysisJobQueue
+
+
+class FakeOrchestrator:
+    agents = {"parser": None, "analyzer": None}
+
+    async def orchestrate_stream(self, content, file_name, chunked=None, timeout=None):
+        for agent_type in self.agents:
+            yield {"event": "agent", "data": {"agentType": agent_type, "findings": [], "metadata": {}}}
+        yield {"event": "complete", "data": {"overallRisk": "low"}}
+
+
+@pytest.fixture
+def db():
+    Base.metadata.create_all(bind=engine)
+    session = SessionLocal()
+    session.query(Document).delete()
+    session.commit()
+    yield session
+    session.query(Document).delete()
+    session.commit()
+    session.close()
+
+
+def add_job(db, owner=None, lease_expires_at=None):
+    document = Document(
+        organization_id=1,
+        user_id="test",
+        file_name="report.txt",
+        status=DocumentStatus.PROCESSING,
+        analysis_result=json.dumps({"job": {"content": "Revenue: $100"}}),
+        job_owner=owner,
+        job_lease_expires_at=lease_expires_at,
+    )
+    db.add(document)
+    db.commit()
+    return document.id
+
+
+def test_recovery_skips_jobs_leased_by_a_live_worker(db):
+    live = add_job(db, "other-worker", datetime.utcnow() + timedelta(minutes=5))
+    expired = add_job(db, "crashed-worker", datetime.utcnow() - timedelta(minutes=5))
+    orphaned = add_job(db)
+    queue = AnalysisJobQueue(FakeOrchestrator())
+
+    assert queue._recover() == [expired, orphaned]
+    owners = {document.id: document.job_owner for document in db.query(Document).all()}
+    assert owners == {live: "other-worker", expired: queue.worker_id, orphaned: queue.worker_id}
+
+
+def test_only_one_queue_claims_a_job(db):
+    job = add_job(db)
+    first, second = AnalysisJobQueue(FakeOrchestrator()), AnalysisJobQueue(FakeOrchestrator())
+
+    assert first._recover() == [job]
+    assert second._recover() == []
+    assert not second._claim(db, job)
+
+
+def test_run_skips_a_job_leased_by_another_worker(db):
+    job = add_job(db, "other-worker", datetime.utcnow() + timedelta(minutes=5))
+
+    asyncio.run(AnalysisJobQueue(FakeOrchestrator())._run(job))
+
+    db.expire_all()
+    document = db.get(Document, job)
+    assert document.status == DocumentStatus.PROCESSING
+    assert document.job_owner == "other-worker"
+
+
+def test_completed_job_releases_its_lease(db):
+    job = add_job(db)
+
+    asyncio.run(AnalysisJobQueue(FakeOrchestrator())._run(job))
+
+    db.expire_all()
+    document = db.get(Document, job)
+    assert document.status == DocumentStatus.COMPLETED
+    assert document.job_owner is None and document.job_lease_expires_at is None
+    assert [r["agentType"] for r in json.loads(document.analysis_result)["agentResults"]] == [
+        "parser", "analyzer"
+    ]
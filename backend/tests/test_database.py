@@ -0,0 +1,47 @@
+"""
+Tests for config.database schema upgrades
+"""
+from sqlalchemy import create_engine, inspect, text
+from sqlalchemy.orm import sessionmaker
+
+import models  # noqa: F401 - registers every table for create_all
+from config.database import Base, add_missing_columns
+from models.document import Document
+
+# The documents table as created before the job lease columns existed
+LEGACY_DOCUMENTS = """
+CREATE TABLE documents (
+    id INTEGER PRIMARY KEY,
+    organization_id INTEGER NOT NULL,
+    user_id VARCHAR(255) NOT NULL,
+    file_name VARCHAR(500) NOT NULL,
+    file_url TEXT,
+    file_type VARCHAR(100),
+    file_size INTEGER,
+    status VARCHAR(10),
+    analysis_result TEXT,
+    risk_score FLOAT,
+    created_at DATETIME,
+    updated_at DATETIME
+)
+"""
+
+
+def test_missing_columns_are_added_to_existing_tables(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'legacy.db'}")
+    with engine.begin() as connection:
+        connection.execute(text(LEGACY_DOCUMENTS))
+    Base.metadata.create_all(bind=engine)
+
+    added = add_missing_columns(engine)
+
+    assert {"documents.job_owner", "documents.job_lease_expires_at", "documents.job_progress"} <= set(added)
+    indexes = {index["name"] for index in inspect(engine).get_indexes("documents")}
+    assert "ix_documents_job_lease_expires_at" in indexes
+    session = sessionmaker(bind=engine)()
+    session.add(Document(organization_id=1, user_id="test", file_name="report.txt", job_owner="worker"))
+    session.commit()
+    assert session.query(Document).one().job_owner == "worker"
+    session.close()
+
+    assert add_missing_columns(engine) == []
@@ -0,0 +1,49 @@
+"""
+Tests for services.document_sectionizer
+"""
+from services.document_sectionizer import PREAMBLE, fingerprint, sectionize
+
+
+BALANCE_SHEET_10K = """ACME CORP ANNUAL REPORT
+CONSOLIDATED BALANCE SHEETS
+ASSETS
+Cash 100
+Receivables 40
+LIABILITIES AND EQUITY
+Debt 50
+Equity 90
+CONSOLIDATED STATEMENTS OF OPERATIONS
+REVENUE
+Revenue 500
+OPERATING EXPENSES
+Costs 300
+"""
+
+
+def test_statement_subheadings_stay_in_their_statement():
+    sections = {section.name: section for section in sectionize(BALANCE_SHEET_10K)}
+
+    assert list(sections) == [PREAMBLE, "balance_sheet", "income_statement"]
+    balance_sheet = sections["balance_sheet"].text
+    assert "ASSETS" in balance_sheet
+    assert "Cash 100" in balance_sheet
+    assert "LIABILITIES AND EQUITY" in balance_sheet
+    assert "Debt 50" in balance_sheet
+    assert "Costs 300" in sections["income_statement"].text
+
+
+def test_all_caps_lines_before_first_section_stay_in_preamble():
+    sections = sectionize("ACME CORP\nFISCAL YEAR 2024\nRISK FACTORS\nCompetition is intense.")
+
+    assert [section.name for section in sections] == [PREAMBLE, "risk_factors"]
+    assert "FISCAL YEAR 2024" in sections[0].text
+
+
+def test_fingerprint_changes_only_the_edited_statement():
+    edited = BALANCE_SHEET_10K.replace("Debt 50", "Debt 55")
+
+    before = fingerprint(BALANCE_SHEET_10K)["sections"]
+    after = fingerprint(edited)["sections"]
+
+    assert before["balance_sheet"]["hash"] != after["balance_sheet"]["hash"]
+    assert before["income_statement"] == after["income_statement"]
@@ -0,0 +1,71 @@
+"""
+Tests for services.financial_extractor
+"""
+from pathlib import Path
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+import models  # noqa: F401 - registers every table for create_all
+from config.database import Base
+from models.financial_metrics import FinancialMetrics
+from services.financial_extractor import detect_period, extract_financials, upsert_financial_metrics
+
+SAMPLE_REPORT = Path(__file__).resolve().parents[2] / "public" / "sample-financial-report.txt"
+
+ANNUAL_REPORT = """ACME Corporation
+ANNUAL REPORT 2024
+(in millions)
+                 2024     2023
+Revenue          1,200    1,000
+Net Income       120      90
+Total Assets     2,000    1,800
+Total Equity     800      700
+"""
+
+
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(bind=engine)
+    session = sessionmaker(bind=engine)()
+    yield session
+    session.close()
+
+
+@pytest.mark.parametrize("heading, expected", [
+    ("QUARTERLY FINANCIAL REPORT - Q4 2024", ("quarter", "Q4")),
+    ("Results for the third quarter of 2024", ("quarter", "Q3")),
+    ("Form 10-Q", ("quarter", None)),
+    ("Half-year report H1 2024", ("half_year", "H1")),
+    ("Nine months ended September 30, 2024", ("nine_months", None)),
+    ("Annual Report 2024", ("annual", None)),
+    ("XYZ Corporation", ("annual", None)),
+])
+def test_detect_period(heading, expected):
+    assert detect_period([heading]) == expected
+
+
+def test_sample_quarterly_report_is_not_stored_as_a_fiscal_year(db):
+    summary = extract_financials(SAMPLE_REPORT.read_text())
+
+    assert summary["periodType"] == "quarter"
+    assert summary["fiscalPeriod"] == "Q4"
+    assert [period["fiscalYear"] for period in summary["periods"]] == [2024]
+    ratios = summary["periods"][0]["ratios"]
+    # Quarterly net income 1,053,750 on equity 4,690,000, annualized
+    assert ratios["roe"] == pytest.approx(4 * 1053750 / 4690000, abs=1e-4)
+    assert ratios["netMargin"] == pytest.approx(1053750 / 8750000, abs=1e-4)
+
+    assert upsert_financial_metrics(db, "XYZ Corporation", summary) == []
+    assert db.query(FinancialMetrics).count() == 0
+
+
+def test_annual_report_is_stored_per_fiscal_year(db):
+    summary = extract_financials(ANNUAL_REPORT)
+
+    assert summary["periodType"] == "annual"
+    rows = upsert_financial_metrics(db, "ACME Corporation", summary)
+    assert sorted(row.fiscal_year for row in rows) == [2023, 2024]
+    assert summary["periods"][0]["ratios"]["roe"] == pytest.approx(0.15)
@@ -0,0 +1,56 @@
+"""
+Tests for services.findings_store
+"""
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+import models  # noqa: F401 - registers every table for create_all
+from config.database import Base
+from models.finding import AnalysisFinding
+from services.findings_store import record_findings
+
+
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(bind=engine)
+    session = sessionmaker(bind=engine)()
+    yield session
+    session.close()
+
+
+def agent_results(description):
+    return [{
+        "agentType": "fraud",
+        "findings": [{"type": "anomaly", "severity": "high", "description": description}],
+        "metadata": {},
+    }]
+
+
+def stored_texts(db):
+    return sorted(row.text for row in db.query(AnalysisFinding).all())
+
+
+def test_same_file_name_uploads_keep_their_own_findings(db):
+    record_findings(db, 1, "report.txt", agent_results("first"), content="Revenue 100")
+    record_findings(db, 1, "report.txt", agent_results("second"), content="Revenue 200")
+    db.commit()
+
+    assert len(stored_texts(db)) == 2
+
+
+def test_reanalysis_of_the_same_upload_replaces_its_findings(db):
+    record_findings(db, 1, "report.txt", agent_results("first"), content="Revenue 100")
+    db.commit()
+    record_findings(db, 1, "report.txt", agent_results("second"), content="Revenue 100")
+    db.commit()
+
+    texts = stored_texts(db)
+    assert len(texts) == 1
+    assert "second" in texts[0]
+
+
+def test_findings_without_a_document_need_the_content(db):
+    with pytest.raises(ValueError):
+        record_findings(db, 1, "report.txt", agent_results("first"))
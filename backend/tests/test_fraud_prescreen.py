@@ -0,0 +1,52 @@
+"""
+Tests for the fraud agent's forensic pre-screen skip
+"""
+import asyncio
+
+import pytest
+
+from config.settings import settings
+from services.forensics import MIN_SAMPLES, screen_amounts
+from services.llm_backend import StubBackend
+from services.multi_agent_orchestrator import MultiAgentOrchestrator
+
+SMALL_SAMPLE = "Revenue: $8,750,000\nNet Income: $1,053,750\n"
+
+SCREENED = "\n".join(
+    f"Invoice {index}: ${amount:,}"
+    for index, amount in enumerate([
+        1234, 2871, 3519, 1742, 1188, 4623, 2390, 1567, 7312, 1825,
+        2964, 1401, 5238, 1119, 3087, 1653, 2245, 8791, 1376, 1932,
+    ])
+)
+
+
+@pytest.fixture
+def orchestrator(monkeypatch):
+    monkeypatch.setattr(settings, "FORENSIC_SKIP_THRESHOLD", 50)
+    return MultiAgentOrchestrator(backend=StubBackend(latency_ms=0, latency_sigma=0))
+
+
+def run_fraud_agent(orchestrator, content):
+    context = {"forensics": screen_amounts(content)}
+    return asyncio.run(orchestrator._create_fraud_agent(content, "report.txt", context))
+
+
+def test_small_sample_is_sent_to_the_llm(orchestrator):
+    forensics = screen_amounts(SMALL_SAMPLE)
+    assert forensics["amountsAnalyzed"] < MIN_SAMPLES
+    assert forensics["riskScore"] < settings.FORENSIC_SKIP_THRESHOLD
+
+    result = run_fraud_agent(orchestrator, SMALL_SAMPLE)
+
+    assert not result["metadata"].get("llmSkipped")
+
+
+def test_screened_low_risk_document_skips_the_llm(orchestrator):
+    forensics = screen_amounts(SCREENED)
+    assert forensics["amountsAnalyzed"] >= MIN_SAMPLES
+    assert forensics["riskScore"] < settings.FORENSIC_SKIP_THRESHOLD
+
+    result = run_fraud_agent(orchestrator, SCREENED)
+
+    assert result["metadata"]["llmSkipped"] is True
@@ -0,0 +1,21 @@
+"""
+Tests for services.model_router
+"""
+from services.model_router import ModelRouter
+
+ROUTES = {"parser": [(None, "small")], "fraud": [(1000, "small"), (None, "large")]}
+
+
+def test_empty_tiers_use_the_default_model():
+    router = ModelRouter(ROUTES, {"small": "", "large": ""}, "gpt-4o-mini")
+
+    assert router.route("fraud", 5000).model == "gpt-4o-mini"
+    assert router.route("parser", 10).model == "gpt-4o-mini"
+    assert router.route("report", 10).model == "gpt-4o-mini"
+
+
+def test_configured_tiers_are_used():
+    router = ModelRouter(ROUTES, {"small": "gpt-4o-mini", "large": "gpt-4o"}, "gpt-4o-mini")
+
+    assert router.route("fraud", 500).model == "gpt-4o-mini"
+    assert router.route("fraud", 5000).model == "gpt-4o"
@@ -0,0 +1,56 @@
+"""
+Tests for services.monte_carlo
+"""
+import numpy as np
+
+from config.settings import settings
+from services import monte_carlo
+
+HISTORY = [
+    {"fiscal_year": year, "revenue": revenue, "profit": profit, "cash_flow": cash_flow,
+     "equity": equity, "assets": None, "liabilities": None}
+    for year, revenue, profit, cash_flow, equity in [
+        (2020, 100, 10, 12, 50),
+        (2021, 110, 12, 11, 55),
+        (2022, 118, 9, 10, 60),
+        (2023, 130, 15, 16, 70),
+    ]
+]
+
+
+def test_histogram_percentiles_match_the_exact_percentiles():
+    model = monte_carlo.calibrate(HISTORY)
+    results = monte_carlo.simulate(model, 20000, 3, seed=7, chunk_paths=5000)
+
+    chunks = list(monte_carlo._chunks(model, 20000, 3, 7, 5000))
+    for position, series in enumerate(monte_carlo.SERIES):
+        values = np.concatenate([chunk[position] for chunk in chunks])
+        exact = np.percentile(values, monte_carlo.PERCENTILES, axis=0)
+        bands = results["percentiles"][series]
+        approximate = np.array([
+            [band[f"p{level}"] for band in bands.values()] for level in monte_carlo.PERCENTILES
+        ])
+        np.testing.assert_allclose(approximate, exact, rtol=1e-3, atol=0.05)
+
+
+def test_results_do_not_depend_on_the_chunk_size():
+    model = monte_carlo.calibrate(HISTORY)
+
+    assert monte_carlo.simulate(model, 1000, 3, seed=1, chunk_paths=7) == monte_carlo.simulate(
+        model, 1000, 3, seed=1, chunk_paths=1000
+    )
+
+
+def test_horizon_is_capped():
+    results = monte_carlo.run_simulation(HISTORY, paths=10, horizon_years=1000)
+
+    assert results["horizonYears"] == settings.MONTE_CARLO_MAX_HORIZON_YEARS
+
+
+def test_unseeded_simulation_reports_the_seed_it_used():
+    model = monte_carlo.calibrate(HISTORY)
+
+    results = monte_carlo.simulate(model, 2000, 3, chunk_paths=500)
+
+    assert isinstance(results["seed"], int)
+    assert monte_carlo.simulate(model, 2000, 3, seed=results["seed"], chunk_paths=500) == results
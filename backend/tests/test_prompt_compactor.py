@@ -0,0 +1,45 @@
+"""
+Tests for services.prompt_compactor
+"""
+from services.prompt_compactor import collapse_tables
+
+
+def test_caption_row_with_year_columns_is_the_header():
+    lines = [
+        "BALANCE SHEET            2024        2023",
+        "Cash                     2,450,000   1,980,000",
+        "Total Assets             10,170,000  9,020,000",
+    ]
+
+    assert collapse_tables(lines) == [
+        "BALANCE SHEET",
+        "Cash: 2024=2,450,000; 2023=1,980,000",
+        "Total Assets: 2024=10,170,000; 2023=9,020,000",
+    ]
+
+
+def test_caption_row_with_fiscal_year_columns_is_the_header():
+    lines = [
+        "INCOME STATEMENT   2024    FY2023",
+        "Revenue            $8.75M  $6.84M",
+        "Net Income         $1.05M  $0.92M",
+    ]
+
+    assert collapse_tables(lines) == [
+        "INCOME STATEMENT",
+        "Revenue: 2024=$8.75M; FY2023=$6.84M",
+        "Net Income: 2024=$1.05M; FY2023=$0.92M",
+    ]
+
+
+def test_indented_year_header():
+    lines = [
+        "              2024      2023",
+        "Revenue       $8.75M    $6.84M",
+        "Net Income    $1.05M    $0.92M",
+    ]
+
+    assert collapse_tables(lines) == [
+        "Revenue: 2024=$8.75M; 2023=$6.84M",
+        "Net Income: 2024=$1.05M; 2023=$0.92M",
+    ]
@@ -0,0 +1,69 @@
+"""
+Tests for report cache invalidation
+"""
+import asyncio
+
+from services.report_generator import ReportGenerator
+from services.result_cache import ResultCache
+
+DATA = {"companyData": {"name": "ACME Corporation"}}
+
+
+class FakeRedis:
+    """The subset of redis.asyncio used by ResultCache, shared like a server"""
+
+    def __init__(self):
+        self.values = {}
+
+    async def get(self, key):
+        return self.values.get(key)
+
+    async def mget(self, keys):
+        return [self.values.get(key) for key in keys]
+
+    async def set(self, key, value, ex=None):
+        self.values[key] = value
+
+    async def incr(self, key):
+        self.values[key] = str(int(self.values.get(key, 0)) + 1)
+        return int(self.values[key])
+
+    async def delete(self, key):
+        self.values.pop(key, None)
+
+
+def worker(redis):
+    cache = ResultCache("reports", redis_url="redis://shared")
+    cache._redis = redis
+    return ReportGenerator(cache=cache)
+
+
+def test_invalidation_reaches_other_workers_and_restarts():
+    async def scenario():
+        redis = FakeRedis()
+        first, second = worker(redis), worker(redis)
+        before = await second._cache_key("risk_report", DATA, 1)
+
+        await first.invalidate_cache(organization_id=1)
+
+        assert await second._cache_key("risk_report", DATA, 1) != before
+        other_organization = await first._cache_key("risk_report", DATA, 2)
+        assert await second._cache_key("risk_report", DATA, 2) == other_organization
+        invalidated = await first._cache_key("risk_report", DATA, 1)
+        assert await worker(redis)._cache_key("risk_report", DATA, 1) == invalidated
+
+    asyncio.run(scenario())
+
+
+def test_local_invalidation_without_redis():
+    async def scenario():
+        generator = ReportGenerator(cache=ResultCache("reports"))
+        risk = await generator._cache_key("risk_report", DATA, 1)
+        tax = await generator._cache_key("tax_report", DATA, 1)
+
+        await generator.invalidate_cache(report_type="risk_report")
+
+        assert await generator._cache_key("risk_report", DATA, 1) != risk
+        assert await generator._cache_key("tax_report", DATA, 1) == tax
+
+    asyncio.run(scenario())